@@ -1,18 +1,35 @@
 import logging
 import random
+import time
 from datetime import datetime
-from typing import List, Dict
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
 
 from SummaryBuilder import SummaryBuilder
+from datastructures.BotContent import BotContent
 from datastructures.ChatModels import Message, User
-from datastructures.States import State, get_state
-from datastructures.SummaryData import SummaryData
+from datastructures.StateDefinition import StateDefinition
+from datastructures.States import PREVIOUS_STATE, State, get_state
+from datastructures.SessionState import SessionState
+from storage.SummaryRepository import SummaryRepository, get_summary_repository
 from utils.Exceptions import NoKeywordFoundException, NoMatchingStateException
 from utils.format_utils import is_valid_startdate, is_strictly_positive_integer, is_positive_integer
-from utils.fs_utils import read_json, Paths, saved_summary_ids, \
-    save_json, read_summary_with_id
+from utils.content_utils import get_bot_content
+from utils.MetricsRegistry import get_metrics_registry
+from utils.Tracer import get_tracer
 from utils.regex_utils import find_number, find_date, find_summary_id
 
+_registry = get_metrics_registry()
+_turn_seconds = _registry.histogram(
+    'leasebot_bot_turn_duration_seconds', 'Time to respond to a user message, by the state it was answered in',
+    ('state',)
+)
+_fallbacks = _registry.counter(
+    'leasebot_bot_fallbacks_total', 'Fallback responses to messages that were not understood, by state', ('state',)
+)
+_TURN_SECONDS_BY_STATE = {state: _turn_seconds.labels(state.value) for state in State}
+_FALLBACKS_BY_STATE = {state: _fallbacks.labels(state.value) for state in State}
+
 
 class Bot:
     """
@@ -20,66 +37,55 @@ class Bot:
 
     Attributes:
         __logger (Logger): Logs critical errors.
-        __summary_data (SummaryData): Instance to manage summary-related data.
-        __state (State): Current state of the chatbot.
-        __previous_state (State): Previous state of the chatbot.
-        __questions (Dict[str, List[str]]): Dictionary storing questions for different states.
-        __fallbacks (List[str]): List of fallback responses.
-        __transitions (Dict[str, Dict[str, str]]): Dictionary mapping transitions between states.
-        __saved_summaries (List[int]): List of IDs of saved summaries.
-        __needs_additional_info (List[State]): States requiring additional user information.
-        __loaded_summary_id (int): ID of the currently loaded summary.
-        __saved_summary_id (int): ID of the saved summary.
-        __summary_builder (SummaryBuilder): Instance to build summary reports.
+        __session (SessionState): Conversation state of this chat session.
+        __content (BotContent): Shared questions, fallbacks, transitions and greetings.
+        __summaries (SummaryRepository): Shared access to the saved summaries.
+        __summary_builder (Optional[SummaryBuilder]): Instance to build summary reports, None until a
+            summary is shown.
         __current_message (str): The content of the currently built message.
+        __STATE_MACHINE (Mapping[State, StateDefinition]): Handler and additional information of every state.
     """
+    __slots__ = ('__logger', '__session', '__content', '__summaries', '__summary_builder', '__current_message')
 
-    def __init__(self):
+    def __init__(self, session: Optional[SessionState] = None):
         """
-        Initializes a Bot instance, setting up initial states, loading JSON data,
-        and preparing necessary attributes.
+        Initializes a Bot instance, setting up initial states, referencing the shared
+        bot content and preparing necessary attributes.
+
+        :param session: Conversation state to continue, a new conversation if not given.
         """
         logging.basicConfig(filename='logs/bot.log')
         self.__logger = logging.getLogger(__name__)
         self.__logger.setLevel(logging.INFO)
 
-        self.__summary_data = SummaryData()
-
-        self.__state: State = State.START
-        self.__previous_state: State = State.START
-
-        self.__questions: Dict[str, List[str]]
-        self.__fallbacks: List[str]
-        self.__transitions: Dict[str, Dict[str, str]]
+        self.__session = session or SessionState()
 
-        self.__saved_summaries: List[int]
+        self.__content: BotContent = get_bot_content()
 
-        self.__needs_additional_info = [
-            State.SUMMARY_OVERVIEW,
-            State.SHOW_LOADED_SUMMARY,
-            State.ASK_FOR_CHANGES,
-            State.SHOW_SUMMARY,
-            State.SAVE_SUMMARY
-        ]
+        self.__summaries: SummaryRepository = get_summary_repository()
 
-        self.__loaded_summary_id: int
-        self.__saved_summary_id: int
-        self.__summary_builder: SummaryBuilder
+        self.__summary_builder: Optional[SummaryBuilder] = None
 
         self.__current_message: str
 
-        self.__load_jsons()
-        self.__update_saved_summaries()
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Serializes the conversation state, so the conversation can be continued by another Bot.
+
+        :return: The conversation state as JSON compatible data.
+        """
+        return self.__session.to_json_data()
 
-    def __load_jsons(self) -> None:
+    @staticmethod
+    def restore(snapshot: Dict[str, Any]) -> 'Bot':
         """
-        Loads JSON data files into corresponding attributes (__questions, __fallbacks,
-        __transitions, __greetings) from predefined paths.
+        Creates a Bot continuing the conversation of a snapshot.
+
+        :param snapshot: Conversation state created with snapshot.
+        :return: Bot in the state of the snapshot.
+        :raises NoMatchingStateException: If the snapshot contains an unknown state.
         """
-        self.__questions = read_json(Paths.BOT_QUESTIONS)
-        self.__fallbacks = read_json(Paths.BOT_FALLBACKS)
-        self.__transitions = read_json(Paths.BOT_TRANSITIONS)
-        self.__greetings = read_json(Paths.BOT_GREETINGS)
+        return Bot(SessionState.from_json_data(snapshot))
 
     def get_greeting(self) -> Message:
         """
@@ -87,7 +93,7 @@ class Bot:
 
         :return: Bot message containing the greeting.
         """
-        self.__current_message = random.choice(self.__greetings)
+        self.__current_message = random.choice(self.__content.greetings)
         return self.__build_response()
 
     def get_start_message(self) -> Message:
@@ -108,54 +114,16 @@ class Bot:
         """
         self.__current_message = ''
         content = message.content.lower()
-        match self.__state:
-            case State.START:
-                return self.__handle_start(content)
-
-            case State.RESTART:
-                return self.__handle_restart(content)
-
-            case State.HELP:
-                return self.__handle_help()
-
-            case State.LOAD_SUMMARY:
-                return self.__handle_load_summary(content)
-
-            case State.SUMMARY_OVERVIEW:
-                return self.__handle_summary_overview(content)
-
-            case State.SHOW_LOADED_SUMMARY:
-                return self.__handle_show_loaded_summary(content)
-
-            case State.INPUT_STARTDATE:
-                return self.__handle_input_startdate(content)
-
-            case State.INPUT_MONTHS:
-                return self.__handle_input_months(content)
-
-            case State.INPUT_KM_LIMIT:
-                return self.__handle_input_km_limit(content)
-
-            case State.INPUT_KM_DRIVEN:
-                return self.__handle_input_km_driven(content)
-
-            case State.ASK_FOR_CHANGES:
-                return self.__handle_ask_for_changes(content)
-
-            case State.CHANGES:
-                return self.__handle_changes(content)
-
-            case State.SHOW_SUMMARY:
-                return self.__handle_show_summary(content)
-
-            case State.SAVE_SUMMARY:
-                return self.__handle_save_summary()
-
-            case State.EXIT:
-                return self.__handle_exit(content)
-
-            case _:
-                return self.__handle_unknown_state()
+        state = self.__session.state
+        definition = self.__STATE_MACHINE.get(state)
+        if definition is None:
+            return self.__handle_unknown_state()
+        started = time.perf_counter()
+        try:
+            with get_tracer().span('Bot.respond_to', state=state.value):
+                return definition.handle(self, content)
+        finally:
+            _TURN_SECONDS_BY_STATE[state].observe(time.perf_counter() - started)
 
     def __handle_start(self, content: str) -> Message:
         """
@@ -164,12 +132,11 @@ class Bot:
         :param content: User input message content.
         :return: Bot message containing the response to the user input.
         """
-        self.__update_saved_summaries()
         new_state_string = ''
         try:
             new_state_string = self.__spot_keywords_for_new_state(content)
             new_state = get_state(new_state_string)
-            if new_state == State.LOAD_SUMMARY and not self.__saved_summaries:
+            if new_state == State.LOAD_SUMMARY and not self.__summaries.has_summaries():
                 return self.__switch_state_and_respond(State.INPUT_STARTDATE)
             return self.__switch_state_and_respond(new_state)
         except NoKeywordFoundException:
@@ -188,7 +155,7 @@ class Bot:
         new_state_string = ''
         try:
             new_state_string = self.__spot_keywords_for_new_state(content)
-            if new_state_string == 'previous':
+            if new_state_string == PREVIOUS_STATE:
                 return self.__switch_to_previous_and_respond()
             else:
                 new_state = get_state(new_state_string)
@@ -199,10 +166,11 @@ class Bot:
             self.__logger.critical(f'Unknown state: {new_state_string}')
             return self.__random_fallback_response()
 
-    def __handle_help(self) -> Message:
+    def __handle_help(self, content: str) -> Message:
         """
         Handles user input during the HELP state.
 
+        :param content: User input message content.
         :return: Bot message containing the response to the user input.
         """
         return self.__switch_to_previous_and_respond()
@@ -224,7 +192,7 @@ class Bot:
         :return: Bot message containing the response to the user input.
         """
         try:
-            self.__loaded_summary_id = find_summary_id(content)
+            self.__session.loaded_summary_id = find_summary_id(content, self.__summaries.max_id)
             return self.__switch_state_and_respond(State.SHOW_LOADED_SUMMARY)
         except ValueError:
             return self.__response_without_functionality(content)
@@ -252,10 +220,10 @@ class Bot:
                                            'The summary only works for contracts that are already running.\n'
                                            f'{self.__random_question_of_current_state()}')
                 return self.__build_response()
-            self.__summary_data.set_start_date(startdate)
+            self.__session.summary_data.set_start_date(startdate)
             self.__add_saved_startdate_to_message()
-            if self.__previous_state == State.CHANGES:
-                return self.__switch_state_and_respond(self.__previous_state)
+            if self.__session.previous_state == State.CHANGES:
+                return self.__switch_state_and_respond(self.__session.previous_state)
             return self.__switch_state_and_respond(State.INPUT_MONTHS)
         except ValueError:
             return self.__response_without_functionality(content)
@@ -274,10 +242,10 @@ class Bot:
                                            'That means, the number must be greater than zero.\n'
                                            f'{self.__random_question_of_current_state()}')
                 return self.__build_response()
-            self.__summary_data.set_months(months)
+            self.__session.summary_data.set_months(months)
             self.__add_saved_months_to_message()
-            if self.__previous_state == State.CHANGES:
-                return self.__switch_state_and_respond(self.__previous_state)
+            if self.__session.previous_state == State.CHANGES:
+                return self.__switch_state_and_respond(self.__session.previous_state)
             return self.__switch_state_and_respond(State.INPUT_KM_LIMIT)
         except ValueError:
             return self.__response_without_functionality(content)
@@ -296,10 +264,10 @@ class Bot:
                                            'That means, the number must be greater than zero.\n'
                                            f'{self.__random_question_of_current_state()}')
                 return self.__build_response()
-            self.__summary_data.set_km_limit(km_limit)
+            self.__session.summary_data.set_km_limit(km_limit)
             self.__add_saved_km_limit_to_message()
-            if self.__previous_state == State.CHANGES:
-                return self.__switch_state_and_respond(self.__previous_state)
+            if self.__session.previous_state == State.CHANGES:
+                return self.__switch_state_and_respond(self.__session.previous_state)
             return self.__switch_state_and_respond(State.INPUT_KM_DRIVEN)
         except ValueError:
             return self.__response_without_functionality(content)
@@ -318,10 +286,10 @@ class Bot:
                                            'That means, the number must be greater than or equal to zero.\n'
                                            f'{self.__random_question_of_current_state()}')
                 return self.__build_response()
-            self.__summary_data.set_km_driven(km_driven)
+            self.__session.summary_data.set_km_driven(km_driven)
             self.__add_saved_km_driven_to_message()
-            if self.__previous_state == State.CHANGES:
-                return self.__switch_state_and_respond(self.__previous_state)
+            if self.__session.previous_state == State.CHANGES:
+                return self.__switch_state_and_respond(self.__session.previous_state)
             return self.__switch_state_and_respond(State.ASK_FOR_CHANGES)
         except ValueError:
             return self.__response_without_functionality(content)
@@ -355,17 +323,18 @@ class Bot:
             new_state_string = self.__spot_keywords_for_new_state(content)
             new_state = get_state(new_state_string)
             if new_state == State.SAVE_SUMMARY:
-                self.__saved_summary_id = self.__save_current_summary()
+                self.__session.saved_summary_id = self.__save_current_summary()
             return self.__switch_state_and_respond(new_state)
         except IOError:
             self.__switch_state(State.SHOW_SUMMARY)
             self.__current_message = 'Your summary could not be saved. I apologise for your trouble, do you want to try again?'
             return self.__build_response()
 
-    def __handle_save_summary(self) -> Message:
+    def __handle_save_summary(self, content: str) -> Message:
         """
         Handles user input during the SAVE_SUMMARY state.
 
+        :param content: User input message content.
         :return: Bot message containing the response to the user input.
         """
         return self.__switch_state_and_respond(State.RESTART)
@@ -414,11 +383,9 @@ class Bot:
         :return: Keyword identified for state transition.
         :raise NoKeywordFoundException: If no keyword is found in the user input.
         """
-        current_transitions: Dict[str, str] = self.__transitions[self.__state.value]
-        current_keywords = current_transitions.keys()
-        for keyword in current_keywords:
-            if keyword in content:
-                return current_transitions[keyword]
+        new_state_string = self.__content.keyword_matchers[self.__session.state.value].find(content)
+        if new_state_string is not None:
+            return new_state_string
         raise NoKeywordFoundException()
 
     def __switch_state_and_respond(self, state: State) -> Message:
@@ -440,7 +407,7 @@ class Bot:
 
         :return: Bot message containing the response to the user input.
         """
-        return self.__switch_state_and_respond(self.__previous_state)
+        return self.__switch_state_and_respond(self.__session.previous_state)
 
     def __switch_state(self, state: State) -> None:
         """
@@ -448,8 +415,8 @@ class Bot:
 
         :param  state: New state to switch to.
         """
-        self.__previous_state = self.__state
-        self.__state = state
+        self.__session.previous_state = self.__session.state
+        self.__session.state = state
 
     def __random_question_of_current_state(self) -> str:
         """
@@ -457,8 +424,8 @@ class Bot:
 
         :return: Randomly selected question.
         """
-        state_value = self.__state.value
-        questions = self.__questions[state_value]
+        state_value = self.__session.state.value
+        questions = self.__content.questions[state_value]
         return random.choice(questions)
 
     def __random_fallback_response(self) -> Message:
@@ -467,6 +434,7 @@ class Bot:
 
         :return: Bot message containing the fallback response.
         """
+        _FALLBACKS_BY_STATE[self.__session.state].inc()
         self.__current_message += self.__random_fallback()
         return Message(
             time_sent=datetime.now(),
@@ -481,22 +449,20 @@ class Bot:
 
         :return: Randomly selected fallback message.
         """
-        return random.choice(self.__fallbacks)
-
-    def __update_saved_summaries(self) -> None:
-        """
-        Updates the list of saved summary IDs.
-        """
-        self.__saved_summaries = saved_summary_ids()
+        return random.choice(self.__content.fallbacks)
 
     def __save_current_summary(self) -> int:
         """
-        Saves the current summary data and returns the ID of the saved summary.
+        Saves the current summary data and returns the ID of the saved summary, which may still be
+        waiting in the write queue of the repository. A bot restored from a snapshot calculates the
+        summary again, as the shown one is not part of the snapshot.
 
         :return: ID of the saved summary.
         """
+        if self.__summary_builder is None:
+            self.__build_summary_builder()
         summary_data = self.__summary_builder.get_summary_data()
-        return save_json(summary_data)
+        return self.__summaries.save(summary_data)
 
     def __build_response(self) -> Message:
         """
@@ -517,33 +483,21 @@ class Bot:
 
         :return: True if additional information is necessary, False otherwise.
         """
-        return self.__state in self.__needs_additional_info
+        return self.__STATE_MACHINE[self.__session.state].needs_additional_info
 
     def __add_info(self) -> None:
         """
         Adds additional information to the response based on the current state.
         """
-        match self.__state:
-            case State.SUMMARY_OVERVIEW:
-                self.__add_summary_overview()
-            case State.SHOW_LOADED_SUMMARY:
-                self.__add_loaded_summary()
-            case State.ASK_FOR_CHANGES:
-                self.__add_entered_data()
-            case State.SHOW_SUMMARY:
-                self.__add_summary()
-            case State.SAVE_SUMMARY:
-                self.__add_saved_summary_id()
-            case _:
-                self.__logger.critical(f'state should not require additional info: {self.__state}')
+        self.__STATE_MACHINE[self.__session.state].add_info(self)
 
     def __add_summary_overview(self) -> None:
         """
         Adds additional information to the response for the SUMMARY_OVERVIEW state.
         """
-        self.__update_saved_summaries()
-        if self.__saved_summaries:
-            formatted_numbers = ', '.join(str(num) for num in sorted(self.__saved_summaries))
+        saved_summaries = self.__summaries.ids()
+        if saved_summaries:
+            formatted_numbers = ', '.join(str(num) for num in saved_summaries)
             self.__current_message += f'\n{formatted_numbers}\nPlease choose one.'
         else:
             self.__switch_state(State.START)
@@ -553,10 +507,8 @@ class Bot:
         """
         Adds additional information to the response for the SHOW_LOADED_SUMMARY state.
         """
-        self.__update_saved_summaries()
-        if self.__loaded_summary_id in self.__saved_summaries:
-            summary_data = read_summary_with_id(self.__loaded_summary_id)
-            summary = SummaryBuilder.get_summary_from_data(summary_data)
+        if self.__summaries.contains(self.__session.loaded_summary_id):
+            summary = self.__summaries.read_rendered(self.__session.loaded_summary_id, SummaryBuilder.get_summary_from_data)
             self.__current_message += f'\n\n{summary}\n\nDo you want to load another summary?'
         else:
             self.__switch_state(State.SUMMARY_OVERVIEW)
@@ -566,14 +518,14 @@ class Bot:
         """
         Adds entered data information to the response for the ASK_FOR_CHANGES state.
         """
-        entered_data = str(self.__summary_data)
+        entered_data = str(self.__session.summary_data)
         self.__current_message += f'\n\n{entered_data}\n\nDo you need to modify any details in your contract?'
 
     def __add_summary(self) -> None:
         """
         Adds summary information to the response for the SHOW_SUMMARY state.
         """
-        if self.__summary_data.is_complete():
+        if self.__session.summary_data.is_complete():
             self.__build_summary_builder()
             summary = self.__summary_builder.get_summary()
             self.__current_message += f'\n\n{summary}\n\nDo you want to save your summary?'
@@ -586,7 +538,7 @@ class Bot:
         """
         Adds saved summary ID information to the response for the SAVE_SUMMARY state.
         """
-        self.__current_message += f' {self.__saved_summary_id}'
+        self.__current_message += f' {self.__session.saved_summary_id}'
 
     def __add_saved_startdate_to_message(self) -> None:
         """
@@ -594,7 +546,7 @@ class Bot:
 
         The start date is formatted as "dd.mm.yyyy" and appended to the current message.
         """
-        additional_info = self.__summary_data.get_start_date().strftime("%d.%m.%Y")
+        additional_info = self.__session.summary_data.get_start_date().strftime("%d.%m.%Y")
         self.__add_saved_data_message(additional_info)
 
     def __add_saved_months_to_message(self) -> None:
@@ -603,7 +555,7 @@ class Bot:
 
         The number of months is appended to the current message, with proper pluralization.
         """
-        number_of_months = self.__summary_data.get_months()
+        number_of_months = self.__session.summary_data.get_months()
         additional_info = f'{number_of_months} month{"s" if number_of_months != 1 else ""}'
         self.__add_saved_data_message(additional_info)
 
@@ -613,7 +565,7 @@ class Bot:
 
         The kilometer limit is appended to the current message.
         """
-        additional_info = f'{self.__summary_data.get_km_limit()} km'
+        additional_info = f'{self.__session.summary_data.get_km_limit()} km'
         self.__add_saved_data_message(additional_info)
 
     def __add_saved_km_driven_to_message(self) -> None:
@@ -622,7 +574,7 @@ class Bot:
 
         The kilometers driven is appended to the current message.
         """
-        additional_info = f'{self.__summary_data.get_km_driven()} km'
+        additional_info = f'{self.__session.summary_data.get_km_driven()} km'
         self.__add_saved_data_message(additional_info)
 
     def __add_saved_data_message(self, saved_data: str) -> None:
@@ -640,12 +592,31 @@ class Bot:
         """
         Builds the summary builder object using summary data.
         """
-        start_data = self.__summary_data.get_start_date()
-        months = self.__summary_data.get_months()
-        km_limit = self.__summary_data.get_km_limit()
-        km_driven = self.__summary_data.get_km_driven()
+        start_data = self.__session.summary_data.get_start_date()
+        months = self.__session.summary_data.get_months()
+        km_limit = self.__session.summary_data.get_km_limit()
+        km_driven = self.__session.summary_data.get_km_driven()
         self.__summary_builder = SummaryBuilder(start_data, months, km_limit, km_driven)
 
+    # behaviour of every state, built once and shared by all chat sessions
+    __STATE_MACHINE: Mapping[State, StateDefinition] = MappingProxyType({
+        State.START: StateDefinition(__handle_start),
+        State.RESTART: StateDefinition(__handle_restart),
+        State.HELP: StateDefinition(__handle_help),
+        State.LOAD_SUMMARY: StateDefinition(__handle_load_summary),
+        State.SUMMARY_OVERVIEW: StateDefinition(__handle_summary_overview, __add_summary_overview),
+        State.SHOW_LOADED_SUMMARY: StateDefinition(__handle_show_loaded_summary, __add_loaded_summary),
+        State.INPUT_STARTDATE: StateDefinition(__handle_input_startdate),
+        State.INPUT_MONTHS: StateDefinition(__handle_input_months),
+        State.INPUT_KM_LIMIT: StateDefinition(__handle_input_km_limit),
+        State.INPUT_KM_DRIVEN: StateDefinition(__handle_input_km_driven),
+        State.ASK_FOR_CHANGES: StateDefinition(__handle_ask_for_changes, __add_entered_data),
+        State.CHANGES: StateDefinition(__handle_changes),
+        State.SHOW_SUMMARY: StateDefinition(__handle_show_summary, __add_summary),
+        State.SAVE_SUMMARY: StateDefinition(__handle_save_summary, __add_saved_summary_id),
+        State.EXIT: StateDefinition(__handle_exit),
+    })
+
 
 # to test the bot without the frontend (in the console)
 if __name__ == '__main__':
@@ -0,0 +1,75 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.MetricsRegistry import get_metrics_registry
+
+_registry = get_metrics_registry()
+_REQUESTS = _registry.counter(
+    'leasebot_http_requests_total', 'HTTP requests by method, route and status code', ('method', 'route', 'status')
+)
+_REQUEST_SECONDS = _registry.histogram(
+    'leasebot_http_request_duration_seconds', 'Time until the response headers are sent, by method and route',
+    ('method', 'route')
+)
+_IN_PROGRESS = _registry.gauge('leasebot_http_requests_in_progress', 'HTTP requests being handled').labels()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting the HTTP requests and measuring their latency per route.
+
+    Requests are labelled with the path template of the matched route, like /chats/id/{chat_id},
+    so the number of label values stays bounded. Streaming responses are measured until their
+    headers are sent.
+
+    Attributes:
+        __app (ASGIApp): The wrapped application.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """
+        Initializes a MetricsMiddleware.
+
+        :param app: The wrapped application.
+        """
+        self.__app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Handles a connection, measuring it if it is an HTTP request.
+
+        :param scope: Connection scope.
+        :param receive: Receives the messages of the client.
+        :param send: Sends messages to the client.
+        """
+        if scope['type'] != 'http':
+            await self.__app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        observed = False
+
+        def observe() -> None:
+            nonlocal observed
+            observed = True
+            route = scope.get('route')
+            route_path = route.path if route is not None else 'unmatched'
+            _REQUEST_SECONDS.labels(scope['method'], route_path).observe(time.perf_counter() - started)
+            _REQUESTS.labels(scope['method'], route_path, str(status)).inc()
+
+        async def send_and_observe(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                observe()
+            await send(message)
+
+        _IN_PROGRESS.inc()
+        try:
+            await self.__app(scope, receive, send_and_observe)
+        finally:
+            _IN_PROGRESS.dec()
+            if not observed:
+                observe()
@@ -0,0 +1,63 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.RequestProfiler import RequestProfiler
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling the HTTP requests selected by a RequestProfiler with cProfile.
+
+    A profile covers the request until its response headers are sent, so streaming responses
+    do not hold the profiler. The number of the profile is returned in the X-Profile-Id header.
+    Requests to the /debug endpoints are never profiled.
+
+    Attributes:
+        __app (ASGIApp): The wrapped application.
+        __profiler (RequestProfiler): Decides which requests are profiled and keeps the profiles.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: RequestProfiler):
+        """
+        Initializes a ProfilingMiddleware.
+
+        :param app: The wrapped application.
+        :param profiler: Decides which requests are profiled and keeps the profiles.
+        """
+        self.__app = app
+        self.__profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Handles a connection, profiling it if it is a selected HTTP request.
+
+        :param scope: Connection scope.
+        :param receive: Receives the messages of the client.
+        :param send: Sends messages to the client.
+        """
+        if (scope['type'] != 'http' or not self.__profiler.enabled or scope['path'].startswith('/debug/')
+                or not self.__profiler.wants(scope['headers'])):
+            await self.__app(scope, receive, send)
+            return
+
+        profile = self.__profiler.start(scope['method'], scope['path'])
+        if profile is None:
+            await self.__app(scope, receive, send)
+            return
+
+        stopped = False
+
+        async def send_and_stop(message: Message) -> None:
+            nonlocal stopped
+            if message['type'] == 'http.response.start':
+                stopped = True
+                self.__profiler.stop(profile, message['status'])
+                headers = list(message.get('headers', []))
+                headers.append((b'x-profile-id', str(profile.id).encode('latin-1')))
+                message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.__app(scope, receive, send_and_stop)
+        finally:
+            if not stopped:
+                self.__profiler.stop(profile, None)
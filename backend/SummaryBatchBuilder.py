@@ -0,0 +1,183 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from datastructures.SummaryRecord import SummaryRecord
+
+
+def _round_to(values: np.ndarray, decimals: int = 1) -> np.ndarray:
+    """
+    Rounds every element like the built-in round does for a single float.
+
+    np.round scales by a power of ten before rounding, which can push values lying next to a
+    tie to the other side. Those elements are rounded again with the built-in round.
+
+    :param values: The values to round.
+    :param decimals: The number of decimal places to round to.
+    :return: Rounded values.
+    """
+    rounded = np.round(values, decimals)
+    scaled = values * 10 ** decimals
+    distance_to_tie = np.abs(scaled - np.floor(scaled) - 0.5)
+    near_tie = distance_to_tie <= 1e-9 * np.maximum(1.0, np.abs(scaled))
+    if near_tie.any():
+        rounded[near_tie] = [round(value, decimals) for value in values[near_tie].tolist()]
+    return rounded
+
+
+class SummaryBatchBuilder:
+    """
+    Builds the summary data of many leasing contracts at once.
+
+    Every metric is computed column-wise for all contracts against a single reference date.
+    The result for each contract is identical to the one of a SummaryBuilder calculated as of
+    the reference date.
+
+    Attributes:
+            __size (int): Number of contracts.
+            __start_dates (List[datetime]): Start dates of the contracts.
+            __end_dates (List[datetime]): End dates of the contracts, at the time of day they started.
+            __runtime_months (List[int]): Durations of the contracts in months.
+            __km_limits (List[int]): Kilometer limits of the contracts.
+            __km_driven (List[float]): Kilometers driven, as passed in, so they are saved unchanged.
+            __reference_date (datetime): The point in time the metrics are calculated at.
+            __columns (Dict[str, List]): Computed metrics by name, one value per contract.
+            __undefined (np.ndarray): Marks the contracts whose averages divide by zero.
+    """
+
+    def __init__(self, start_dates: Sequence[datetime], runtime_months: Sequence[int], km_limits: Sequence[int],
+                 km_driven: Sequence[float], reference_date: Optional[datetime] = None):
+        """
+        Initializes a SummaryBatchBuilder and calculates the metrics of all contracts.
+
+        :param start_dates: The start dates of the leasing contracts.
+        :param runtime_months: The durations of the contracts in months.
+        :param km_limits: The kilometer limits of the contracts.
+        :param km_driven: The kilometers already driven during the contract periods.
+        :param reference_date: The date to calculate the metrics at, now if not given.
+        :raises ValueError: If the sequences differ in length.
+        """
+        self.__size = len(start_dates)
+        if any(len(column) != self.__size for column in (runtime_months, km_limits, km_driven)):
+            raise ValueError('all contract columns must have the same length')
+
+        self.__reference_date = reference_date or datetime.now()
+        reference = np.datetime64(self.__reference_date, 'us')
+        starts = np.array(start_dates, dtype='datetime64[us]').reshape(self.__size)
+        months = np.array(runtime_months, dtype=np.int64).reshape(self.__size)
+        limits = np.array(km_limits, dtype=np.float64).reshape(self.__size)
+        driven = np.array(km_driven, dtype=np.float64).reshape(self.__size)
+
+        start_days = starts.astype('datetime64[D]')
+        end_days = self.__calculate_end_days(start_days, months)
+        runtime_days = (end_days - start_days).astype(np.int64)
+        day_numbers = (reference - starts) // np.timedelta64(1, 'D')
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            daily_average = _round_to(limits / runtime_days)
+            monthly_average = _round_to(30 * daily_average)
+            allowed_kms = _round_to(day_numbers * daily_average)
+            difference = _round_to(allowed_kms - driven)
+            daily_average_so_far = _round_to(driven / day_numbers)
+            daily_average_from_now = _round_to((limits - driven) / (runtime_days - day_numbers))
+
+        self.__start_dates = list(start_dates)
+        self.__end_dates = [datetime.combine(end_day, start_date.time(), start_date.tzinfo)
+                            for end_day, start_date in zip(end_days.tolist(), self.__start_dates)]
+        self.__runtime_months = list(runtime_months)
+        self.__km_limits = list(km_limits)
+        self.__km_driven = list(km_driven)
+        self.__undefined = (runtime_days == 0) | (day_numbers == 0) | (runtime_days == day_numbers)
+        self.__columns: Dict[str, List] = {
+            'runtime days': runtime_days.tolist(),
+            'day': day_numbers.tolist(),
+            'daily average': daily_average.tolist(),
+            'monthly average': monthly_average.tolist(),
+            'allowed kms so far': allowed_kms.tolist(),
+            'difference': difference.tolist(),
+            'daily average so far': daily_average_so_far.tolist(),
+            'daily average from now': daily_average_from_now.tolist(),
+        }
+
+    def __len__(self) -> int:
+        """
+        Retrieves the number of contracts.
+
+        :return: Number of contracts.
+        """
+        return self.__size
+
+    def columns(self) -> Dict[str, List]:
+        """
+        Retrieves the computed metrics as columns. Averages dividing by zero are inf or nan.
+
+        :return: Lists of values by metric name, one value per contract.
+        """
+        return self.__columns
+
+    def get_summary_record(self, index: int) -> SummaryRecord:
+        """
+        Retrieves the summary record of a single contract.
+
+        :param index: The position of the contract.
+        :return: Calculated summary record.
+        :raises ZeroDivisionError: If an average of the contract divides by zero.
+        """
+        if self.__undefined[index]:
+            raise ZeroDivisionError(f'summary of contract {index} divides by zero')
+
+        columns = self.__columns
+        return SummaryRecord(
+            start_date=self.__start_dates[index],
+            end_date=self.__end_dates[index],
+            runtime_months=self.__runtime_months[index],
+            runtime_days=columns['runtime days'][index],
+            km_limit=self.__km_limits[index],
+            km_driven=self.__km_driven[index],
+            as_of=self.__reference_date,
+            day_number=columns['day'][index],
+            daily_average=columns['daily average'][index],
+            monthly_average=columns['monthly average'][index],
+            allowed_kms=columns['allowed kms so far'][index],
+            difference=columns['difference'][index],
+            daily_average_so_far=columns['daily average so far'][index],
+            daily_average_from_now=columns['daily average from now'][index],
+        )
+
+    def get_summary_data(self, index: int) -> Dict[str, Any]:
+        """
+        Retrieves the summary data of a single contract in the form SummaryBuilder saves it in.
+
+        :param index: The position of the contract.
+        :return: Calculated summary data.
+        :raises ZeroDivisionError: If an average of the contract divides by zero.
+        """
+        return self.get_summary_record(index).to_json_data()
+
+    def get_all_summary_data(self) -> List[Dict[str, Any]]:
+        """
+        Retrieves the summary data of all contracts.
+
+        :return: Calculated summary data, in the order of the contracts.
+        :raises ZeroDivisionError: If an average of any contract divides by zero.
+        """
+        return [self.get_summary_data(index) for index in range(self.__size)]
+
+    @staticmethod
+    def __calculate_end_days(start_days: np.ndarray, months: np.ndarray) -> np.ndarray:
+        """
+        Calculates the end dates like calculate_end_date, clamping the day to the length of the
+        target month before going back one day.
+
+        :param start_days: The start dates of the contracts.
+        :param months: The durations of the contracts in months.
+        :return: The end dates of the contracts.
+        """
+        start_months = start_days.astype('datetime64[M]')
+        day_in_month = start_days - start_months.astype('datetime64[D]')
+        target_months = start_months + months
+        target_first_days = target_months.astype('datetime64[D]')
+        days_in_target_month = (target_months + 1).astype('datetime64[D]') - target_first_days
+        clamped_day = np.minimum(day_in_month, days_in_target_month - 1)
+        return target_first_days + clamped_day - np.timedelta64(1, 'D')
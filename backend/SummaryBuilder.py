@@ -1,9 +1,16 @@
 from datetime import datetime
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, Optional, Tuple
 
-from utils.date_utils import format_date, calculate_end_date, calculate_runtime_days
+from utils.date_utils import calculate_end_date, calculate_runtime_days
 from utils.format_utils import round_to, insert_spaces, separator_of_length
+from utils.MetricsRegistry import get_metrics_registry, timed
+from utils.Tracer import traced
 from datastructures.ChatModels import LeasingContract
+from datastructures.SummaryRecord import SummaryRecord
+
+_render_seconds = get_metrics_registry().histogram(
+    'leasebot_summary_render_duration_seconds', 'Time to format a summary record as text'
+).labels()
 
 
 class SummaryBuilder:
@@ -13,10 +20,13 @@ class SummaryBuilder:
     Attributes:
             __contract (LeasingContract): The leasing contract details.
             __km_driven (float): Kilometers driven during the contract period.
-            __summary_data (Dict[str, Any]): Summary data calculated based on the contract.
+            __as_of (datetime): The point in time the summary is calculated at.
+            __summary_record (SummaryRecord): Summary metrics calculated based on the contract.
     """
 
-    def __init__(self, start_date: datetime, runtime_months: int, km_limit: int, km_driven: float):
+    @traced()
+    def __init__(self, start_date: datetime, runtime_months: int, km_limit: int, km_driven: float,
+                 as_of: Optional[datetime] = None):
         """
         Initializes a SummaryBuilder instance with a LeasingContract and calculated summary data.
 
@@ -24,6 +34,7 @@ class SummaryBuilder:
         :param runtime_months: The duration of the contract in months.
         :param km_limit: The kilometer limit for the contract.
         :param km_driven: The kilometers already driven during the contract period.
+        :param as_of: The point in time to calculate the summary at, now if not given.
         """
         end_date = calculate_end_date(start_date, runtime_months)
         runtime_days = calculate_runtime_days(start_date, end_date)
@@ -35,51 +46,60 @@ class SummaryBuilder:
             runtime_months=runtime_months
         )
         self.__km_driven = km_driven
-        self.__summary_data = self.__calculate_summary()
+        self.__as_of = as_of or datetime.now()
+        self.__summary_record = self.__calculate_summary()
 
     def get_summary(self) -> str:
         """
-        Generates a formatted summary string from the calculated summary data.
+        Generates a formatted summary string from the calculated summary record.
 
         :return: Formatted summary string.
         """
-        return self.get_summary_from_data(self.__summary_data)
+        return self.get_summary_from_record(self.__summary_record)
 
-    def get_summary_data(self) -> Dict[str, Any]:
+    def get_summary_record(self) -> SummaryRecord:
         """
-        Retrieves the calculated summary data.
+        Retrieves the calculated summary record.
 
-        :return: Calculated summary data.
+        :return: Calculated summary record.
         """
-        return self.__summary_data
+        return self.__summary_record
 
-    def __calculate_summary(self) -> Dict[str, str]:
+    def get_summary_data(self) -> Dict[str, Any]:
         """
-        Calculates various summary metrics based on the leasing contract.
+        Retrieves the calculated summary record in the form it is saved in.
 
-        :return: Calculated summary metrics.
+        :return: Calculated summary data.
         """
-        return {
-            'contract': self.__contract_overview(),
-            'start date': format_date(self.__contract.start_date),
-            'end date': format_date(self.__contract.end_date),
-            'daily average': f'{self.__calculate_daily_average()} km/day',
-            'monthly average': f'{self.__calculate_monthly_average()} km/month',
-            'day': f'{self.__day_number_in_contract()} of {self.__contract.runtime_days} days',
-            'allowed kms so far': f'{self.__calculate_allowed_kms()} km',
-            'driven': f'{self.__km_driven} km',
-            'difference': f'{self.__calculate_allowed_km_difference()} km',
-            'daily average so far': f'{self.__calculate_daily_average_so_far()} km/day',
-            'daily average from now': f'{self.__calculate_daily_average_from_now()} km/day',
-        }
+        return self.__summary_record.to_json_data()
 
-    def __contract_overview(self) -> str:
+    def __calculate_summary(self) -> SummaryRecord:
         """
-        Generates a textual overview of the leasing contract.
+        Calculates various summary metrics based on the leasing contract.
+
+        Every metric is calculated once, after the metrics it depends on.
 
-        :return: Textual overview of the leasing contract.
+        :return: Calculated summary metrics.
         """
-        return f'{self.__contract.km_limit} km over {self.__contract.runtime_months} months'
+        day_number = self.__day_number_in_contract()
+        daily_average = self.__calculate_daily_average()
+        allowed_kms = self.__calculate_allowed_kms(day_number, daily_average)
+        return SummaryRecord(
+            start_date=self.__contract.start_date,
+            end_date=self.__contract.end_date,
+            runtime_months=self.__contract.runtime_months,
+            runtime_days=self.__contract.runtime_days,
+            km_limit=self.__contract.km_limit,
+            km_driven=self.__km_driven,
+            as_of=self.__as_of,
+            day_number=day_number,
+            daily_average=daily_average,
+            monthly_average=self.__calculate_monthly_average(daily_average),
+            allowed_kms=allowed_kms,
+            difference=self.__calculate_allowed_km_difference(allowed_kms),
+            daily_average_so_far=self.__calculate_daily_average_so_far(day_number),
+            daily_average_from_now=self.__calculate_daily_average_from_now(day_number),
+        )
 
     def __calculate_daily_average(self) -> float:
         """
@@ -92,88 +112,99 @@ class SummaryBuilder:
         daily_average = km_limit / runtime_days
         return round_to(daily_average)
 
-    def __calculate_monthly_average(self) -> float:
+    @staticmethod
+    def __calculate_monthly_average(daily_average: float) -> float:
         """
         Calculates the monthly average kilometers allowed for the contract.
 
+        :param daily_average: Daily average kilometers allowed.
         :return: Monthly average kilometers allowed.
         """
         days_per_month = 30
-        daily_average = self.__calculate_daily_average()
         monthly_average = days_per_month * daily_average
         return round_to(monthly_average)
 
     def __day_number_in_contract(self) -> int:
         """
-        Calculates the current day number within the contract.
+        Calculates the day number within the contract at the summary's point in time.
 
-        :return: Current day number within the contract.
+        :return: Day number within the contract.
         """
-        today_date = datetime.now()
         start_date = self.__contract.start_date
-        day_number = (today_date - start_date).days
+        day_number = (self.__as_of - start_date).days
         return day_number
 
-    def __calculate_allowed_kms(self) -> float:
+    @staticmethod
+    def __calculate_allowed_kms(day_number: int, daily_average: float) -> float:
         """
         Calculates the allowed kilometers driven so far in the contract.
 
+        :param day_number: Day number within the contract.
+        :param daily_average: Daily average kilometers allowed.
         :return: Allowed kilometers driven so far.
         """
-        day_number = self.__day_number_in_contract()
-        daily_average = self.__calculate_daily_average()
         allowed_kms_so_far = day_number * daily_average
         return round_to(allowed_kms_so_far)
 
-    def __calculate_allowed_km_difference(self) -> float:
+    def __calculate_allowed_km_difference(self, allowed_kms: float) -> float:
         """
         Calculates the difference between allowed kilometers and kilometers driven.
 
+        :param allowed_kms: Allowed kilometers driven so far.
         :return: Difference between allowed kilometers and kilometers driven.
         """
-        allowed_km_difference = self.__calculate_allowed_kms() - self.__km_driven
+        allowed_km_difference = allowed_kms - self.__km_driven
         return round_to(allowed_km_difference)
 
-    def __calculate_daily_average_so_far(self) -> float:
+    def __calculate_daily_average_so_far(self, day_number: int) -> float:
         """
         Calculates the average kilometers driven per day so far in the contract.
 
+        :param day_number: Day number within the contract.
         :return: Average kilometers driven per day so far.
         """
         km_driven = self.__km_driven
-        day_number = self.__day_number_in_contract()
         daily_average_so_far = km_driven / day_number
         return round_to(daily_average_so_far)
 
-    def __calculate_daily_average_from_now(self) -> float:
+    def __calculate_daily_average_from_now(self, day_number: int) -> float:
         """
         Calculates the estimated daily average kilometers needed to meet the contract limit from now.
 
+        :param day_number: Day number within the contract.
         :return: Estimated daily average kilometers needed.
         """
         remaining_km = self.__contract.km_limit - self.__km_driven
-        remaining_days = self.__contract.runtime_days - self.__day_number_in_contract()
+        remaining_days = self.__contract.runtime_days - day_number
         daily_average_from_now = remaining_km / remaining_days
         return round_to(daily_average_from_now)
 
     @staticmethod
     def get_summary_from_data(data: Dict[str, Any]) -> str:
         """
-        Generates a formatted summary string from provided summary data.
+        Generates a formatted summary string from saved summary data.
 
-        :param data: Summary data to include in the summary.
+        :param data: Saved summary data, either a record or a legacy summary of formatted text.
         :return: Formatted summary string.
+        :raises ValueError: If the data is not a valid summary.
         """
-        header, footer = SummaryBuilder.__header_and_footer()
-        summary = header + '\n'
+        return SummaryBuilder.get_summary_from_record(SummaryRecord.from_json_data(data))
 
-        for key in data.keys():
-            key_name = insert_spaces(key + ':')
-            entry = f'{key_name}{data[key]}\n'
-            summary += entry
+    @staticmethod
+    @traced()
+    @timed(_render_seconds)
+    def get_summary_from_record(record: SummaryRecord) -> str:
+        """
+        Generates a formatted summary string from a summary record.
 
-        summary += footer
-        return summary
+        :param record: Summary record to include in the summary.
+        :return: Formatted summary string.
+        """
+        header, footer = SummaryBuilder.__header_and_footer()
+        lines = [header]
+        lines.extend(f'{insert_spaces(key + ":")}{value}' for key, value in record.to_display_data().items())
+        lines.append(footer)
+        return '\n'.join(lines)
 
     @staticmethod
     def __header_and_footer() -> Tuple[str, str]:
@@ -0,0 +1,72 @@
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.Tracer import Tracer
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware recording the root span of every HTTP request, so the spans of the endpoint,
+    the bot and the storage nest in one trace per request.
+
+    The root span is named after the method and the path template of the matched route, and
+    carries the chat ID and the status code. It ends when the response headers are sent, so
+    streaming responses do not keep their trace open. Requests to the /debug endpoints are
+    not traced.
+
+    Attributes:
+        __app (ASGIApp): The wrapped application.
+        __tracer (Tracer): Records the spans and keeps the traces.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer):
+        """
+        Initializes a TracingMiddleware.
+
+        :param app: The wrapped application.
+        :param tracer: Records the spans and keeps the traces.
+        """
+        self.__app = app
+        self.__tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Handles a connection, tracing it if it is an HTTP request.
+
+        :param scope: Connection scope.
+        :param receive: Receives the messages of the client.
+        :param send: Sends messages to the client.
+        """
+        if scope['type'] != 'http' or not self.__tracer.enabled or scope['path'].startswith('/debug/'):
+            await self.__app(scope, receive, send)
+            return
+
+        span = self.__tracer.start(f'{scope["method"]} {scope["path"]}')
+        ended = False
+
+        def end(status: int, exception: Optional[BaseException] = None) -> None:
+            nonlocal ended
+            ended = True
+            route = scope.get('route')
+            if route is not None:
+                span.name = f'{scope["method"]} {route.path}'
+            chat_id = scope.get('path_params', {}).get('chat_id')
+            if chat_id is not None:
+                span.set_attribute('chat_id', chat_id)
+            span.set_attribute('status', status)
+            self.__tracer.end(span, exception)
+
+        async def send_and_end(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                end(message['status'])
+            await send(message)
+
+        try:
+            await self.__app(scope, receive, send_and_end)
+        except BaseException as exception:
+            if not ended:
+                end(500, exception)
+            raise
+        if not ended:
+            end(500)
@@ -0,0 +1,129 @@
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Set
+
+from datastructures.ChatModels import User, PresenceEntry, PresenceEvent
+
+
+class UserPresence:
+    """
+    Keeps track of the users of all chat sessions and publishes every change to subscribers.
+
+    The user list is maintained incrementally when chat sessions are created or removed,
+    instead of being rebuilt from all chat sessions on every request. All methods are
+    meant to be called from the event loop.
+
+    Attributes:
+        __users (Dict[int, User]): Users by the ID of their chat session.
+        __users_list (Optional[List[User]]): Cached list of the users, None if it has to be rebuilt.
+        __subscribers (Set[asyncio.Queue]): Event queues of the current subscribers.
+        __queue_size (int): Maximum number of pending events per subscriber.
+    """
+
+    def __init__(self, queue_size: int = 256):
+        """
+        Initializes an empty UserPresence.
+
+        :param queue_size: Maximum number of pending events per subscriber. Subscribers falling
+            further behind are disconnected and have to subscribe again.
+        """
+        self.__users: Dict[int, User] = {}
+        self.__users_list: Optional[List[User]] = []
+        self.__subscribers: Set[asyncio.Queue] = set()
+        self.__queue_size = queue_size
+
+    def join(self, chat_id: int, user: User) -> None:
+        """
+        Registers the user of a new chat session.
+
+        :param chat_id: ID of the chat session.
+        :param user: The user of the chat session.
+        """
+        if self.__users.get(chat_id) == user:
+            return
+        self.__users[chat_id] = user
+        self.__users_list = None
+        self.__publish(PresenceEvent(event='join', entries=[PresenceEntry(chat_id=chat_id, user=user)]))
+
+    def leave(self, chat_id: int) -> None:
+        """
+        Removes the user of a chat session that no longer exists.
+
+        :param chat_id: ID of the removed chat session.
+        """
+        user = self.__users.pop(chat_id, None)
+        if user is None:
+            return
+        self.__users_list = None
+        self.__publish(PresenceEvent(event='leave', entries=[PresenceEntry(chat_id=chat_id, user=user)]))
+
+    def replace(self, users: Dict[int, User]) -> None:
+        """
+        Replaces the users of all chat sessions, publishing a join or leave event for every change.
+        Used when the chat sessions are shared with other processes.
+
+        :param users: The users of all chat sessions by chat ID.
+        """
+        for chat_id in [chat_id for chat_id in self.__users if chat_id not in users]:
+            self.leave(chat_id)
+        for chat_id, user in users.items():
+            self.join(chat_id, user)
+
+    def users(self) -> List[User]:
+        """
+        Retrieves the users of all chat sessions.
+
+        :return: List of the users, one per chat session.
+        """
+        if self.__users_list is None:
+            self.__users_list = list(self.__users.values())
+        return self.__users_list
+
+    def snapshot(self) -> PresenceEvent:
+        """
+        Builds an event containing the users of all chat sessions.
+
+        :return: Snapshot event with one entry per chat session.
+        """
+        entries = [PresenceEntry(chat_id=chat_id, user=user) for chat_id, user in self.__users.items()]
+        return PresenceEvent(event='snapshot', entries=entries)
+
+    async def subscribe(self, heartbeat_seconds: float) -> AsyncIterator[Optional[PresenceEvent]]:
+        """
+        Yields a snapshot of all users followed by every join and leave event.
+
+        The iteration ends if the subscriber falls too far behind, so it has to subscribe
+        again and receives a fresh snapshot.
+
+        :param heartbeat_seconds: Time in seconds after which None is yielded if there was no event.
+        :return: Asynchronous iterator over the events, None for heartbeats.
+        """
+        queue: asyncio.Queue = asyncio.Queue(self.__queue_size)
+        self.__subscribers.add(queue)
+        try:
+            yield self.snapshot()
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event is None:
+                    return
+                yield event
+        finally:
+            self.__subscribers.discard(queue)
+
+    def __publish(self, event: PresenceEvent) -> None:
+        """
+        Hands an event to all subscribers. Subscribers with a full queue are disconnected.
+
+        :param event: The event to publish.
+        """
+        for queue in list(self.__subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.__subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
@@ -1,12 +1,54 @@
-import threading
-from typing import Dict, List
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from itertools import islice
+from typing import List, Optional, Tuple
 
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, Header, Response, WebSocket, WebSocketDisconnect
 from fastapi import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
 
 from Bot import Bot
-from datastructures.ChatModels import User, ChatSession, Message
+from MetricsMiddleware import MetricsMiddleware
+from ProfilingMiddleware import ProfilingMiddleware
+from TracingMiddleware import TracingMiddleware
+from UserPresence import UserPresence
+from datastructures.ChatModels import User, ChatSession, ChatSessionPage, Message, SessionStats, ProfileSummary, \
+    TraceData
+from storage.BotStateStore import BotStateStore
+from storage.InMemoryBotStateStore import InMemoryBotStateStore
+from storage.SessionStore import SessionStore, ChatEntry
+from storage.SqliteBotStateStore import SqliteBotStateStore
+from storage.SummaryRepository import get_summary_repository
+from utils.Exceptions import InvalidStateMachineException
+from utils.MemoryTracker import GROUP_KEYS, get_memory_tracker
+from utils.MetricsRegistry import get_metrics_registry
+from utils.RequestProfiler import SORT_KEYS, get_request_profiler
+from utils.Tracer import get_tracer, traced
+from utils.config_utils import Config
+from utils.content_utils import get_bot_content, reload_bot_content
+from utils.executor_utils import run_blocking, shutdown_blocking_executor
+
+
+def create_bot_state_store() -> BotStateStore:
+    """
+    Creates the store for chats and bot states selected by the configuration.
+
+    Returns:
+        BotStateStore: An InMemoryBotStateStore for 'memory', a SqliteBotStateStore for 'sqlite'.
+
+    Raises:
+        ValueError: If the configured store is unknown.
+    """
+    match Config.BOT_STATE_STORE:
+        case 'memory':
+            return InMemoryBotStateStore()
+        case 'sqlite':
+            return SqliteBotStateStore(Config.BOT_STATE_DATABASE, Config.APPEND_LEASE_SECONDS)
+        case _:
+            raise ValueError(f'unknown bot state store: {Config.BOT_STATE_STORE}')
 
 
 class Database:
@@ -14,10 +56,11 @@ class Database:
     Database class manages chat sessions and bots.
 
     Attributes:
-        lock (threading.Lock): Lock to ensure thread safety.
-        chat_counter (int): Counter for chat session IDs.
-        chat_sessions (Dict[int, ChatSession]): Dictionary mapping chat IDs to ChatSession objects.
-        bots (Dict[int, Bot]): Dictionary mapping chat IDs to Bot objects.
+        states (BotStateStore): Store keeping every chat and the state of its bot, allocating the chat IDs.
+        sessions (SessionStore): Cache of the chat sessions and bots in memory, with one lock per chat.
+        presence (UserPresence): Index of the users of all chat sessions, publishing joins and leaves.
+        instance_id (str): Random ID of the bot state store, making entity tags unique across restarts
+            of in-memory stores while keeping them the same in all processes sharing a store.
     """
 
     def __init__(self):
@@ -25,16 +68,35 @@ class Database:
         Initializes a new Database instance.
 
         Attributes:
-            lock (threading.Lock): Ensures thread safety when accessing shared data.
-            chat_counter (int): Counter for generating unique chat session IDs.
-            chat_sessions (Dict[int, ChatSession]): Dictionary to store active chat sessions.
-            bots (Dict[int, Bot]): Dictionary to store Bot instances associated with chat sessions.
+            states (BotStateStore): Store for the chats and bot states, selected by the configuration.
+                Every change of a chat is written to it, so a chat missing in memory can be restored
+                from it, by this or any other process sharing the store.
+            sessions (SessionStore): Cache for chat sessions and their bots. Each chat is guarded by
+                its own asyncio lock, so unrelated chats never block each other or the event loop.
+                Idle chats expire after the configured TTL and the least recently used chats are
+                evicted once the configured maximum is reached.
+            presence (UserPresence): Users of the chat sessions, updated whenever a chat session is
+                created, restored or evicted. If other processes share the state store, it is also
+                synchronized with the active chats of the store by run_presence_sync, so every
+                process shows the same users.
+
+        The bots and the state store may block on saving, loading or writing, so they are only used
+        in the shared thread pool of run_blocking and the event loop keeps serving other chats.
         """
-        self.lock = threading.Lock()
-        self.chat_counter: int = 0
-        self.chat_sessions: Dict[int, ChatSession] = {}
-        self.bots: Dict[int, Bot] = {}
-
+        self.states = create_bot_state_store()
+        self.presence = UserPresence()
+        self.sessions = SessionStore(Config.SESSION_TTL_SECONDS, Config.MAX_SESSIONS, on_evict=self.__evict)
+        self.instance_id = self.states.store_id
+
+        metrics = get_metrics_registry()
+        metrics.gauge('leasebot_sessions', 'Chat sessions in memory').labels().set_function(
+            lambda: self.sessions.stats().sessions
+        )
+        metrics.gauge('leasebot_users', 'Users of the chat sessions in memory').labels().set_function(
+            lambda: len(self.presence.users())
+        )
+
+    @traced()
     async def create_chat_session_from_user(self, name: str) -> int:
         """
         Creates a new chat session for a user with the provided name.
@@ -45,25 +107,32 @@ class Database:
         Returns:
             int: Unique ID of the created chat session.
         """
-        with self.lock:
-            self.chat_counter += 1
+        chat_id = await run_blocking(self.states.allocate_id)
 
-            bot = Bot()
-            greeting = bot.get_greeting()
-            start_message = bot.get_start_message()
-            self.bots[self.chat_counter] = bot
+        bot = Bot()
+        greeting = bot.get_greeting()
+        start_message = bot.get_start_message()
 
-            user = User(name=name)
-            chat_session = ChatSession(user=user, messages=[])
-            chat_session.messages.append(greeting)
-            chat_session.messages.append(start_message)
-            self.chat_sessions[self.chat_counter] = chat_session
+        user = User(name=name)
+        chat_session = ChatSession(user=user, messages=[greeting, start_message])
+        await run_blocking(self.states.create, chat_id, chat_session, bot)
+        self.sessions.add(chat_id, chat_session, bot, len(chat_session.messages))
+        self.presence.join(chat_id, user)
 
-            return self.chat_counter
+        return chat_id
 
+    @traced(attributes=('chat_id',))
     async def react_to_user_message(self, chat_id: int, message: Message) -> Message:
         """
         Reacts to a user message in an existing chat session and returns a BotMessage response.
+        Messages to the same chat session are handled one after another.
+
+        The exchange is only kept if the chat has not been changed in the state store meanwhile,
+        for example by another process. Otherwise the chat is reloaded and the bot responds again.
+
+        A message with a client ID that is among the recent messages of the chat has been sent
+        again, for example after a WebSocket closed before the response arrived. The bot does not
+        respond to it again, the response to the first copy is returned instead.
 
         Args:
             chat_id (int): ID of the chat session where the message is sent.
@@ -71,85 +140,283 @@ class Database:
 
         Returns:
             Message: Bot's response to the user's message.
+
+        Raises:
+            HTTPException: Raised if the chat session does not exist (404 Not Found), or if it kept
+                changing concurrently (409 Conflict).
+        """
+        entry = await self.__get_chat_entry_if_valid(chat_id)
+        async with entry.lock:
+            for _ in range(Config.APPEND_ATTEMPTS):
+                earlier_response = self.__find_earlier_response(entry.session.messages, message)
+                if earlier_response is not None:
+                    return earlier_response
+                bot_response = await run_blocking(self.__respond_and_append, chat_id, entry, message)
+                if bot_response is not None:
+                    # a store that is not shared has appended the messages to the session of the entry
+                    if self.states.shared:
+                        entry.session.messages.extend((message, bot_response))
+                    entry.version += 2
+                    return bot_response
+                if not await self.__refresh_chat_entry(chat_id, entry):
+                    raise HTTPException(status_code=404, detail="Chat session not found")
+
+        raise HTTPException(status_code=409, detail="Chat session is changed concurrently, please retry")
+
+    @traced(attributes=('chat_id',))
+    async def get_chat_session(self, chat_id: int, after_index: int = -1, since: Optional[datetime] = None,
+                               limit: Optional[int] = None) -> ChatSessionPage:
         """
-        chat_session = self.__get_chat_session_if_valid(chat_id)
-        chat_session.messages.append(message)
+        Retrieves the chat session details for the given chat ID, optionally restricted to a page of messages.
 
-        bot = self.__get_bot_if_valid(chat_id)
-        bot_response = bot.respond_to(message)
-        chat_session.messages.append(bot_response)
+        Args:
+            chat_id (int): ID of the chat session to retrieve.
+            after_index (int): Only messages with a greater index are returned, -1 to start at the first message.
+            since (Optional[datetime]): If given, only messages sent after this time are returned.
+            limit (Optional[int]): Maximum number of messages to return, None for no limit.
 
-        return bot_response
+        Returns:
+            ChatSessionPage: Details of the chat session with the provided ID and the selected messages.
 
-    async def get_chat_session(self, chat_id: int):
+        Raises:
+            HTTPException: Raised if the chat session with the given ID does not exist (404 Not Found).
+        """
+        chat_session = (await self.__get_chat_entry_if_valid(chat_id)).session
+        messages = chat_session.messages
+
+        indexed_messages = enumerate(messages[after_index + 1:], start=after_index + 1)
+        if since is not None:
+            since_timestamp = since.timestamp()
+            indexed_messages = (
+                (index, message) for index, message in indexed_messages
+                if message.time_sent.timestamp() > since_timestamp
+            )
+        page = list(islice(indexed_messages, limit))
+
+        return ChatSessionPage(
+            user=chat_session.user,
+            messages=[message for _, message in page],
+            total_messages=len(messages),
+            next_index=page[-1][0] if page else max(after_index, len(messages) - 1),
+        )
+
+    async def get_chat_session_etag(self, chat_id: int) -> str:
         """
-        Retrieves the chat session details for the given chat ID.
+        Builds an entity tag identifying the current version of a chat session.
+
+        Messages are only ever appended, so the number of messages identifies the version.
 
         Args:
-            chat_id (int): ID of the chat session to retrieve.
+            chat_id (int): ID of the chat session.
 
         Returns:
-            ChatSession: Details of the chat session with the provided ID.
+            str: Quoted entity tag of the chat session.
 
         Raises:
             HTTPException: Raised if the chat session with the given ID does not exist (404 Not Found).
         """
-        return self.__get_chat_session_if_valid(chat_id)
+        chat_session = (await self.__get_chat_entry_if_valid(chat_id)).session
+        return f'"{self.instance_id}-{chat_id}-{len(chat_session.messages)}"'
 
-    def __get_chat_session_if_valid(self, chat_id: int) -> ChatSession:
+    async def has_chat_session(self, chat_id: int) -> bool:
         """
-        Private method to retrieve a valid ChatSession object for the given chat ID.
+        Checks whether a chat session with the given chat ID exists.
+
+        Args:
+            chat_id (int): ID of the chat session.
+
+        Returns:
+            bool: True if the chat session exists, False otherwise.
+        """
+        return await self.__get_chat_entry(chat_id) is not None
+
+    async def __get_chat_entry_if_valid(self, chat_id: int) -> ChatEntry:
+        """
+        Private method to retrieve a valid ChatEntry object for the given chat ID.
 
         Args:
             chat_id (int): ID of the chat session to retrieve.
 
         Returns:
-            ChatSession: Valid ChatSession object associated with the provided chat ID.
+            ChatEntry: Valid ChatEntry object holding the chat session and bot of the provided chat ID.
 
         Raises:
             HTTPException: Raised if the chat session with the given ID does not exist (404 Not Found).
         """
-        if chat_id not in self.chat_sessions:
+        entry = await self.__get_chat_entry(chat_id)
+        if entry is None:
             raise HTTPException(status_code=404, detail="Chat session not found")
-        return self.chat_sessions[chat_id]
+        return entry
 
-    def __get_bot_if_valid(self, chat_id) -> Bot:
+    @traced(attributes=('chat_id',))
+    async def __get_chat_entry(self, chat_id: int) -> Optional[ChatEntry]:
         """
-        Private method to retrieve a valid Bot object for the given chat ID.
+        Private method to retrieve the ChatEntry of a chat ID, restoring the chat from the
+        state store if it is not in memory. If other processes share the store, a chat that
+        has been changed by them is reloaded, unless a message to it is being handled.
 
         Args:
-            chat_id (int): ID of the chat session to retrieve the associated Bot.
+            chat_id (int): ID of the chat session to retrieve.
 
         Returns:
-            Bot: Valid Bot object associated with the provided chat ID.
+            Optional[ChatEntry]: The ChatEntry of the chat, None if the chat does not exist.
+        """
+        entry = self.sessions.get(chat_id)
+        if entry is not None:
+            if not self.states.shared or entry.lock.locked():
+                return entry
+            if await run_blocking(self.states.version, chat_id) == entry.version or entry.lock.locked():
+                return entry
+            async with entry.lock:
+                return entry if await self.__refresh_chat_entry(chat_id, entry) else None
+
+        stored_chat = await run_blocking(self.states.load, chat_id)
+        if stored_chat is None:
+            return None
+        entry = self.sessions.get(chat_id)
+        if entry is not None:
+            return entry
+        entry = self.sessions.add(chat_id, stored_chat.session, stored_chat.bot, stored_chat.version)
+        self.presence.join(chat_id, stored_chat.session.user)
+        return entry
+
+    @staticmethod
+    def __find_earlier_response(messages: List[Message], message: Message) -> Optional[Message]:
+        """
+        Private method looking for the response to an earlier copy of a user message among the
+        recent messages of a chat, identified by the client ID of the message.
 
-        Raises:
-            HTTPException: Raised if the bot with the given ID does not exist (404 Not Found).
+        Args:
+            messages (List[Message]): The messages of the chat session.
+            message (Message): The user message.
+
+        Returns:
+            Optional[Message]: The response to the earlier copy, None if the message has no client ID
+                or was not answered recently.
+        """
+        if message.client_id is None:
+            return None
+        for index in islice(reversed(range(len(messages) - 1)), Config.DUPLICATE_WINDOW_MESSAGES):
+            earlier = messages[index]
+            if earlier.client_id == message.client_id and not earlier.is_bot_message:
+                return messages[index + 1]
+        return None
+
+    @traced(attributes=('chat_id',))
+    def __respond_and_append(self, chat_id: int, entry: ChatEntry, message: Message) -> Optional[Message]:
+        """
+        Private method letting the bot respond to a user message and appending the exchange to the
+        state store. The bot only responds if the chat has not been changed in the store meanwhile,
+        so side effects of a response, like saving a summary, never happen for a discarded one.
+        Blocks, so it runs in the thread pool while the lock of the entry is held.
+
+        Args:
+            chat_id (int): ID of the chat session.
+            entry (ChatEntry): The entry of the chat session.
+            message (Message): The user message.
+
+        Returns:
+            Optional[Message]: The bot's response, None if the chat was changed in the store meanwhile.
+        """
+        responses: List[Message] = []
+
+        def respond() -> Tuple[List[Message], Bot]:
+            responses.append(entry.bot.respond_to(message))
+            return [message, responses[0]], entry.bot
+
+        if self.states.exchange(chat_id, entry.version, respond):
+            return responses[0]
+        return None
+
+    @traced(attributes=('chat_id',))
+    async def __refresh_chat_entry(self, chat_id: int, entry: ChatEntry) -> bool:
+        """
+        Private method replacing the chat session and bot of a ChatEntry with the stored ones.
+        The lock of the entry has to be held.
+
+        Args:
+            chat_id (int): ID of the chat session.
+            entry (ChatEntry): The entry to refresh.
+
+        Returns:
+            bool: True if the entry was refreshed, False if the chat is not stored.
         """
-        if chat_id not in self.bots:
-            raise HTTPException(status_code=404, detail="Bot not found")
-        return self.bots[chat_id]
+        stored_chat = await run_blocking(self.states.load, chat_id)
+        if stored_chat is None:
+            return False
+        entry.session = stored_chat.session
+        entry.bot = stored_chat.bot
+        entry.version = stored_chat.version
+        return True
+
+    def __evict(self, chat_id: int) -> None:
+        """
+        Private method called for every chat removed from memory.
+
+        Args:
+            chat_id (int): ID of the removed chat.
+        """
+        # a shared chat may still be continued by another process, run_presence_sync lets it leave
+        if not self.states.shared:
+            self.presence.leave(chat_id)
+        self.states.release(chat_id)
+
+    async def run_presence_sync(self, interval_seconds: float) -> None:
+        """
+        Replaces the users periodically with the users of the chats that are active in the shared
+        state store, until the task is cancelled. A chat is active until it has been idle for the
+        session TTL, like a chat session in memory.
+
+        Args:
+            interval_seconds (float): Time in seconds between two synchronizations.
+        """
+        while True:
+            self.presence.replace(await run_blocking(self.states.active_users, Config.SESSION_TTL_SECONDS))
+            await asyncio.sleep(interval_seconds)
 
     async def get_logged_in_users(self) -> List[User]:
         """
-        Retrieves a list of users currently logged into chat sessions.
+        Retrieves a list of users currently logged into chat sessions, of all processes if the
+        state store is shared.
 
         Returns:
             List[User]: List of User objects representing users logged into active chat sessions.
         """
-        users = []
-        for chat_session in self.chat_sessions.values():
-            users.append(chat_session.user)
-
-        return users
+        return self.presence.users()
 
 
+get_bot_content()
+get_summary_repository()
 database = Database()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """
+    Runs the sweeper removing expired chat sessions while the application is running, and the
+    synchronization of the users with a shared state store. Traces the memory allocations if
+    configured. On shutdown it waits for the blocking work in the thread pool to finish and writes
+    the queued summaries.
+    """
+    tasks = [asyncio.create_task(database.sessions.run_sweeper(Config.SESSION_SWEEP_INTERVAL_SECONDS))]
+    if database.states.shared:
+        tasks.append(asyncio.create_task(database.run_presence_sync(Config.PRESENCE_SYNC_INTERVAL_SECONDS)))
+    get_memory_tracker().start()
+    yield
+    for task in tasks:
+        task.cancel()
+    shutdown_blocking_executor()
+    get_summary_repository().flush()
+    get_memory_tracker().stop()
+    get_tracer().close()
+
+
 app = FastAPI(
     title="LeaseBot API",
     version="1.0",
     description="API for managing chat sessions, messages and user interactions.",
     docs_url="/documentation",
+    lifespan=lifespan,
 )
 
 origins = ["*"]
@@ -161,6 +428,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TracingMiddleware, tracer=get_tracer())
+app.add_middleware(ProfilingMiddleware, profiler=get_request_profiler())
+app.add_middleware(MetricsMiddleware)
 
 
 @app.post("/chats/new", response_model=int)
@@ -198,21 +468,103 @@ async def react_to_user_message(chat_id: int, message: Message):
     return await database.react_to_user_message(chat_id, message)
 
 
-@app.get("/chats/id/{chat_id}", response_model=ChatSession)
-async def get_chat_session(chat_id: int):
+@app.websocket("/chats/id/{chat_id}/ws")
+async def chat_websocket(websocket: WebSocket, chat_id: int):
+    """
+    WebSocket endpoint to exchange messages with the bot of a chat session over one connection.
+
+    Every text frame sent by the client has to contain a `Message` as JSON. The bot's response
+    is sent back as a `Message` in JSON, in the order the messages were received. The endpoint
+    `/chats/id/{chat_id}/message` remains available as fallback.
+    If tracing is enabled, every message is traced like a request.
+
+    Args:
+        websocket (WebSocket): The WebSocket connection.
+        chat_id (int, path parameter): The ID of the chat session.
+
+    Close codes:
+        1007: A frame did not contain a valid message.
+        4404: The chat session does not exist (anymore).
+    """
+    # accepted first, a connection closed during the handshake is rejected with HTTP 403 instead
+    await websocket.accept()
+    if not await database.has_chat_session(chat_id):
+        await websocket.close(code=4404, reason="Chat session not found")
+        return
+
+    try:
+        while True:
+            data = await websocket.receive_text()
+            try:
+                message = Message.model_validate_json(data)
+            except ValidationError:
+                await websocket.close(code=1007, reason="Invalid message")
+                return
+            # the tracing middleware only traces HTTP requests, every message gets a trace of its own
+            with get_tracer().span('WEBSOCKET /chats/id/{chat_id}/ws', chat_id=chat_id) as span:
+                try:
+                    bot_response = await database.react_to_user_message(chat_id, message)
+                except HTTPException as exception:
+                    if span is not None:
+                        span.set_attribute('status', exception.status_code)
+                    await websocket.close(code=4000 + exception.status_code, reason=exception.detail)
+                    return
+                await websocket.send_text(bot_response.model_dump_json())
+    except WebSocketDisconnect:
+        pass
+
+
+@app.get("/chats/id/{chat_id}", response_model=ChatSessionPage)
+async def get_chat_session(
+        response: Response,
+        chat_id: int,
+        after_index: int = Query(-1, ge=-1),
+        since: Optional[datetime] = None,
+        limit: Optional[int] = Query(None, ge=1),
+        if_none_match: Optional[str] = Header(None),
+):
     """
     Endpoint to retrieve details of a chat session by its ID.
 
+    The messages can be paged with after_index and limit, or restricted to those sent after since.
+    The response carries an ETag. If it matches the If-None-Match header, the chat session has not
+    changed and 304 Not Modified is returned without a body.
+
     Args:
         chat_id (int, path parameter): The ID of the chat session.
+        after_index (int, query parameter): Only messages with a greater index are returned.
+        since (datetime, query parameter): Only messages sent after this time are returned.
+        limit (int, query parameter): Maximum number of messages to return.
+        if_none_match (str, header): Entity tags of versions the client already has.
 
     Returns:
-        ChatSession: Details of the chat session.
+        ChatSessionPage: Details of the chat session and the selected messages.
 
     Raises:
         HTTPException: If the chat session does not exist (status code 404).
     """
-    return await database.get_chat_session(chat_id)
+    etag = await database.get_chat_session_etag(chat_id)
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if if_none_match is not None and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return await database.get_chat_session(chat_id, after_index, since, limit)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Checks whether an If-None-Match header matches an entity tag, using the weak comparison.
+
+    Args:
+        if_none_match (str): Value of the If-None-Match header.
+        etag (str): Current entity tag.
+
+    Returns:
+        bool: True if the header matches the entity tag, False otherwise.
+    """
+    candidates = [candidate.strip().removeprefix('W/') for candidate in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates
 
 
 @app.get("/users", response_model=List[User])
@@ -226,7 +578,198 @@ async def get_logged_in_users():
     return await database.get_logged_in_users()
 
 
+@app.get("/users/stream", response_class=StreamingResponse)
+async def stream_logged_in_users():
+    """
+    Endpoint streaming the logged-in users as Server-Sent Events.
+
+    The first event is a 'snapshot' with all users, followed by a 'join' or 'leave' event for
+    every chat session that is created or removed. Each event carries a `PresenceEvent` as data.
+    If the client falls too far behind, the stream is closed and the client reconnects.
+
+    Returns:
+        StreamingResponse: Stream of presence events in text/event-stream format.
+    """
+    async def events():
+        async for event in database.presence.subscribe(Config.PRESENCE_HEARTBEAT_SECONDS):
+            if event is None:
+                yield ': heartbeat\n\n'
+            else:
+                yield f'event: {event.event}\ndata: {event.model_dump_json()}\n\n'
+
+    return StreamingResponse(events(), media_type='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+
+@app.get("/sessions/stats", response_model=SessionStats)
+async def get_session_stats():
+    """
+    Endpoint to retrieve the number of chat sessions in memory and the eviction counters.
+
+    Returns:
+        SessionStats: Size, limits and eviction counters of the session store.
+    """
+    return database.sessions.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Endpoint exposing the metrics of this process in the Prometheus text format.
+
+    Returns:
+        PlainTextResponse: Request, bot turn, summary and file system metrics.
+    """
+    return PlainTextResponse(get_metrics_registry().render(), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@app.get("/debug/profiles", response_model=List[ProfileSummary])
+async def get_profiles():
+    """
+    Endpoint to list the kept profiles of recent requests, newest first.
+
+    Requests are profiled if LEASEBOT_PROFILE_MODE is 'all', for a sampled fraction of the requests
+    if it is 'sample', or if they send the configured profile header if it is 'header'.
+
+    Returns:
+        List[ProfileSummary]: The kept profiles without their measurements.
+
+    Raises:
+        HTTPException: If profiling is disabled (status code 404).
+    """
+    profiler = get_request_profiler()
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    return [ProfileSummary(id=profile.id, method=profile.method, path=profile.path, status=profile.status,
+                           started_at=profile.started_at, duration_ms=profile.duration_seconds * 1000)
+            for profile in profiler.profiles()]
+
+
+@app.get("/debug/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: int, sort: str = Query('cumulative'), limit: int = Query(40, ge=1, le=1000)):
+    """
+    Endpoint to retrieve the cProfile report of a recent request.
+
+    Args:
+        profile_id (int): The number of the profile, as returned in the X-Profile-Id header.
+        sort (str, query parameter): Sort order of the functions: cumulative, tottime, ncalls or filename.
+        limit (int, query parameter): Number of functions in the report.
+
+    Returns:
+        PlainTextResponse: The pstats report of the most expensive functions.
+
+    Raises:
+        HTTPException: If profiling is disabled or the profile is not kept (status code 404), or if
+            the sort order is unknown (status code 422).
+    """
+    profiler = get_request_profiler()
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=422, detail=f"Sort order must be one of {', '.join(SORT_KEYS)}")
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(await run_blocking(profile.render, sort, limit))
+
+
+@app.get("/debug/memory", response_class=PlainTextResponse)
+async def get_memory_growth(group_by: str = Query('lineno'), limit: int = Query(25, ge=1, le=1000),
+                            reset: bool = Query(False)):
+    """
+    Endpoint to report where the traced memory grew since the baseline snapshot. The baseline is
+    taken at startup, tracing is enabled by setting LEASEBOT_TRACEMALLOC_FRAMES.
+
+    Args:
+        group_by (str, query parameter): How allocations are grouped: lineno, filename or traceback.
+        limit (int, query parameter): Number of groups in the report.
+        reset (bool, query parameter): Whether this snapshot becomes the baseline of the next report.
+
+    Returns:
+        PlainTextResponse: The largest differences in allocated memory.
+
+    Raises:
+        HTTPException: If memory tracing is disabled (status code 404), or if the grouping is
+            unknown (status code 422).
+    """
+    tracker = get_memory_tracker()
+    if not tracker.enabled:
+        raise HTTPException(status_code=404, detail="Memory tracing is disabled")
+    if group_by not in GROUP_KEYS:
+        raise HTTPException(status_code=422, detail=f"Grouping must be one of {', '.join(GROUP_KEYS)}")
+    return PlainTextResponse(await run_blocking(tracker.report, group_by, limit, reset))
+
+
+@app.get("/debug/traces", response_model=List[TraceData])
+async def get_traces(min_duration_ms: float = Query(0, ge=0), limit: int = Query(20, ge=1, le=1000)):
+    """
+    Endpoint to retrieve the nested timings of recent requests, newest first, to attribute slow
+    requests to a stage. Requests are traced if LEASEBOT_TRACE_MODE is 'memory' or 'file'.
+
+    Args:
+        min_duration_ms (float, query parameter): Only requests taking at least this long are returned.
+        limit (int, query parameter): Maximum number of traces to return.
+
+    Returns:
+        List[TraceData]: The kept traces with their spans.
+
+    Raises:
+        HTTPException: If tracing is disabled (status code 404).
+    """
+    tracer = get_tracer()
+    if not tracer.enabled:
+        raise HTTPException(status_code=404, detail="Tracing is disabled")
+    return [trace.to_json_data() for trace in islice(tracer.traces(min_duration_ms / 1000), limit)]
+
+
+@app.get("/debug/traces/{trace_id}", response_model=TraceData)
+async def get_trace(trace_id: str):
+    """
+    Endpoint to retrieve the nested timings of a recent request.
+
+    Args:
+        trace_id (str): The ID of the trace.
+
+    Returns:
+        TraceData: The trace with its spans.
+
+    Raises:
+        HTTPException: If tracing is disabled or the trace is not kept (status code 404).
+    """
+    tracer = get_tracer()
+    if not tracer.enabled:
+        raise HTTPException(status_code=404, detail="Tracing is disabled")
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace.to_json_data()
+
+
+@app.post("/bot-content/reload", status_code=204)
+async def reload_content():
+    """
+    Endpoint to reload the questions, fallbacks, transitions and greetings from the bot_data directory.
+
+    Chat sessions created afterwards use the reloaded content. Running chat sessions keep the
+    previous content while they stay in memory, but continue with the reloaded content once they
+    are restored from a shared state store, after they were evicted or changed by another process.
+    Only the content of the process handling the request is reloaded.
+
+    Raises:
+        HTTPException: If the reloaded content does not fit the states of the bot, the current
+            content is kept.
+    """
+    try:
+        reload_bot_content()
+    except InvalidStateMachineException as exception:
+        raise HTTPException(status_code=422, detail=exception.message)
+
+
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    if Config.WORKERS > 1:
+        if not database.states.shared:
+            raise SystemExit('several workers need a shared bot state store, set LEASEBOT_BOT_STATE_STORE=sqlite')
+        uvicorn.run("app:app", host="0.0.0.0", port=8080, workers=Config.WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8080)
@@ -0,0 +1,312 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+
+CREATE_CHAT = 'POST /chats/new'
+SEND_MESSAGE = 'POST /chats/id/{id}/message'
+GET_CHAT = 'GET /chats/id/{id}'
+GET_USERS = 'GET /users'
+
+
+def save_summary_messages() -> List[str]:
+    """
+    Build the user messages of a conversation going from start over all inputs to save_summary.
+    Expects at least one saved summary, so the bot asks whether to load it first.
+
+    :return: The user messages, in order.
+    """
+    start_date = (datetime.now() - timedelta(days=200)).strftime('%d.%m.%Y')
+    return ['yes', 'no', start_date, '36', '30000', '9000', 'no', 'yes']
+
+
+def load_summary_messages(summary_id: int) -> List[str]:
+    """
+    Build the user messages of a conversation loading a saved summary.
+
+    :param summary_id: ID of the summary to load.
+    :return: The user messages, in order.
+    """
+    return ['yes', 'yes', str(summary_id)]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    Calculate a percentile with the nearest-rank method.
+
+    :param sorted_values: The values in ascending order, at least one.
+    :param fraction: The percentile as fraction between 0 and 1.
+    :return: The smallest value with at least the given fraction of values less or equal.
+    """
+    rank = max(1, -(-len(sorted_values) * fraction // 1))
+    return sorted_values[int(rank) - 1]
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """
+    Read the resident set size of a process from /proc.
+
+    :param pid: ID of the process.
+    :return: The resident memory in bytes, None if it cannot be read on this system.
+    """
+    try:
+        with open(f'/proc/{pid}/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class LoadTest:
+    """
+    Drives scripted conversations against the API and records the latency of every request.
+
+    Attributes:
+        __client (httpx.AsyncClient): Client sending the requests.
+        __latencies (Dict[str, List[float]]): Latencies in seconds by endpoint.
+        __errors (int): Number of requests that failed or returned an unexpected status.
+        __summary_id (Optional[int]): ID of a saved summary for the load-summary conversations.
+    """
+
+    def __init__(self, client: httpx.AsyncClient):
+        """
+        Initializes a LoadTest sending its requests with the given client.
+
+        :param client: Client connected to the API.
+        """
+        self.__client = client
+        self.__latencies: Dict[str, List[float]] = defaultdict(list)
+        self.__errors = 0
+        self.__summary_id: Optional[int] = None
+
+    async def prepare(self) -> None:
+        """
+        Saves a summary outside of the measurement, so both conversation scripts can run.
+        """
+        chat_id = await self.__create_chat()
+        response = None
+        for content in save_summary_messages():
+            response = await self.__send_message(chat_id, content)
+        self.__summary_id = int(re.findall(r'\d+', response['content'])[-1])
+        self.__latencies.clear()
+        self.__errors = 0
+
+    async def run(self, conversations: int, concurrency: int, load_ratio: float) -> None:
+        """
+        Runs the conversations with the given number of concurrent users.
+
+        :param conversations: Total number of conversations.
+        :param concurrency: Number of conversations running at the same time.
+        :param load_ratio: Fraction of conversations loading a summary instead of saving one.
+        """
+        remaining = iter(range(conversations))
+
+        async def user() -> None:
+            for _ in remaining:
+                try:
+                    if random.random() < load_ratio:
+                        await self.__converse(load_summary_messages(self.__summary_id))
+                    else:
+                        await self.__converse(save_summary_messages())
+                except (httpx.HTTPError, ValueError):
+                    self.__errors += 1
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+
+    def results(self) -> Dict:
+        """
+        Summarizes the recorded requests.
+
+        :return: Number of requests and errors and the latency percentiles in milliseconds by endpoint.
+        """
+        latency_ms = {}
+        for endpoint, latencies in sorted(self.__latencies.items()):
+            ordered = sorted(latencies)
+            latency_ms[endpoint] = {
+                'count': len(ordered),
+                'p50': round(percentile(ordered, 0.50) * 1000, 3),
+                'p95': round(percentile(ordered, 0.95) * 1000, 3),
+                'p99': round(percentile(ordered, 0.99) * 1000, 3),
+            }
+        return {
+            'requests': sum(len(latencies) for latencies in self.__latencies.values()),
+            'errors': self.__errors,
+            'latency_ms': latency_ms,
+        }
+
+    async def __converse(self, messages: List[str]) -> None:
+        """
+        Runs one conversation, polling the chat after every message like the frontend does.
+
+        :param messages: The user messages, in order.
+        """
+        chat_id = await self.__create_chat()
+        await self.__request(GET_USERS, 'GET', '/users')
+        for content in messages:
+            await self.__send_message(chat_id, content)
+            await self.__request(GET_CHAT, 'GET', f'/chats/id/{chat_id}')
+
+    async def __create_chat(self) -> int:
+        """
+        Creates a chat session.
+
+        :return: ID of the chat session.
+        """
+        return await self.__request(CREATE_CHAT, 'POST', '/chats/new', params={'name': 'load test'})
+
+    async def __send_message(self, chat_id: int, content: str) -> Dict:
+        """
+        Sends a user message to a chat session.
+
+        :param chat_id: ID of the chat session.
+        :param content: Content of the message.
+        :return: The response of the bot.
+        """
+        message = {'time_sent': datetime.now().isoformat(), 'sender': 'load test', 'content': content,
+                   'is_bot_message': False}
+        return await self.__request(SEND_MESSAGE, 'POST', f'/chats/id/{chat_id}/message', json=message)
+
+    async def __request(self, endpoint: str, method: str, url: str, **kwargs):
+        """
+        Sends a request and records its latency.
+
+        :param endpoint: Name of the endpoint the latency is recorded for.
+        :param method: HTTP method.
+        :param url: URL relative to the API.
+        :param kwargs: Further arguments of httpx.AsyncClient.request.
+        :return: The parsed JSON body of the response.
+        :raises httpx.HTTPStatusError: If the response has an error status.
+        """
+        started = time.perf_counter()
+        response = await self.__client.request(method, url, **kwargs)
+        self.__latencies[endpoint].append(time.perf_counter() - started)
+        response.raise_for_status()
+        return response.json()
+
+
+@contextlib.asynccontextmanager
+async def in_process_client() -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Run the app in this process, with chats in memory and summaries in a temporary SQLite
+    database unless configured otherwise, and connect a client to it.
+
+    :return: Context manager yielding the client.
+    """
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ.setdefault('LEASEBOT_SUMMARY_BACKEND', 'sqlite')
+        os.environ.setdefault('LEASEBOT_SUMMARY_DATABASE', os.path.join(data_dir, 'summaries.db'))
+        from app import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://load-test') as client:
+                yield client
+
+
+async def run(url: Optional[str], server_pid: Optional[int], conversations: int, concurrency: int,
+              load_ratio: float) -> Dict:
+    """
+    Run the load test in this process or against a running server.
+
+    :param url: URL of a running server, None to run the app in this process.
+    :param server_pid: ID of the server process to measure the memory of, if running at url.
+    :param conversations: Total number of conversations.
+    :param concurrency: Number of conversations running at the same time.
+    :param load_ratio: Fraction of conversations loading a summary instead of saving one.
+    :return: The results as JSON compatible data.
+    """
+    if url is None:
+        client_context = in_process_client()
+        server_pid = os.getpid()
+    else:
+        client_context = httpx.AsyncClient(base_url=url, limits=httpx.Limits(max_connections=concurrency), timeout=30)
+
+    async with client_context as client:
+        load_test = LoadTest(client)
+        await load_test.prepare()
+        memory_before = rss_bytes(server_pid) if server_pid else None
+        started = time.perf_counter()
+        await load_test.run(conversations, concurrency, load_ratio)
+        duration = time.perf_counter() - started
+        memory_after = rss_bytes(server_pid) if server_pid else None
+
+    results = load_test.results()
+    return {
+        'mode': 'in-process' if url is None else url,
+        'conversations': conversations,
+        'concurrency': concurrency,
+        'duration_seconds': round(duration, 3),
+        'requests_per_second': round(results['requests'] / duration, 1),
+        **results,
+        'memory_growth_bytes': None if memory_before is None or memory_after is None else memory_after - memory_before,
+    }
+
+
+def compare(baseline: Dict, results: Dict, threshold: float) -> List[str]:
+    """
+    Print the results next to a baseline and find the regressions.
+
+    :param baseline: Results of an earlier run.
+    :param results: Results of this run.
+    :param threshold: Relative change counted as regression, for example 0.1 for 10 percent.
+    :return: Descriptions of the regressions.
+    """
+    rows = [('requests/s', baseline['requests_per_second'], results['requests_per_second'], False)]
+    for endpoint, latencies in results['latency_ms'].items():
+        for name in ('p50', 'p95', 'p99'):
+            before = baseline['latency_ms'].get(endpoint, {}).get(name)
+            rows.append((f'{endpoint} {name} ms', before, latencies[name], True))
+    rows.append(('memory growth bytes', baseline.get('memory_growth_bytes'), results['memory_growth_bytes'], True))
+
+    regressions = []
+    print(f'{"metric":<44}{"baseline":>12}{"current":>12}{"change":>9}')
+    for name, before, current, lower_is_better in rows:
+        if before is None or current is None:
+            print(f'{name:<44}{"-" if before is None else before:>12}{"-" if current is None else current:>12}')
+            continue
+        change = (current - before) / before if before else 0.0
+        regressed = change > threshold if lower_is_better else change < -threshold
+        print(f'{name:<44}{before:>12}{current:>12}{change:>+9.1%}{"  REGRESSION" if regressed else ""}')
+        if regressed:
+            regressions.append(f'{name}: {before} -> {current}')
+    return regressions
+
+
+# run from the backend directory: python -m benchmarks.load_test
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Drive scripted conversations against the LeaseBot API.')
+    parser.add_argument('--url', help='URL of a running server, the app runs in this process if not given')
+    parser.add_argument('--server-pid', type=int, help='process ID of the server at --url, to measure its memory')
+    parser.add_argument('--conversations', type=int, default=500, help='total number of conversations')
+    parser.add_argument('--concurrency', type=int, default=20, help='number of concurrent conversations')
+    parser.add_argument('--load-ratio', type=float, default=0.3, help='fraction of conversations loading a summary')
+    parser.add_argument('--seed', type=int, default=0, help='seed choosing the conversation scripts')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='compare with the JSON results of an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.1, help='relative change counted as regression')
+    arguments = parser.parse_args()
+
+    random.seed(arguments.seed)
+    load_test_results = asyncio.run(run(arguments.url, arguments.server_pid, arguments.conversations,
+                                        arguments.concurrency, arguments.load_ratio))
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(load_test_results, file, indent=2)
+
+    if arguments.compare:
+        with open(arguments.compare) as file:
+            found_regressions = compare(json.load(file), load_test_results, arguments.threshold)
+        if found_regressions:
+            sys.exit(f'{len(found_regressions)} regressions beyond {arguments.threshold:.0%}')
+    else:
+        print(json.dumps(load_test_results, indent=2))
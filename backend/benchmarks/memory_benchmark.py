@@ -0,0 +1,118 @@
+import argparse
+import gc
+import json
+import platform
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from Bot import Bot
+from datastructures.ChatModels import Message
+
+
+def entered_data_messages() -> List[str]:
+    """
+    Build the user messages that lead a new session to the overview of the entered contract data.
+
+    :return: The user messages, in order.
+    """
+    start_date = (datetime.now() - timedelta(days=200)).strftime('%d.%m.%Y')
+    return ['yes', 'no', start_date, '36', '30000', '9000']
+
+
+def create_idle_session() -> Bot:
+    """
+    Create a session the way a new chat does, greeting the user and asking the first question.
+
+    :return: The bot of the session.
+    """
+    bot = Bot()
+    bot.get_greeting()
+    bot.get_start_message()
+    return bot
+
+
+def create_entered_session() -> Bot:
+    """
+    Create a session that has entered all data of a contract.
+
+    :return: The bot of the session.
+    """
+    bot = create_idle_session()
+    for content in entered_data_messages():
+        bot.respond_to(Message(time_sent=datetime.now(), sender='benchmark', content=content, is_bot_message=False))
+    return bot
+
+
+def measure_bytes_per_session(create_session: Callable[[], Bot], sessions: int) -> float:
+    """
+    Measure the memory retained per session with tracemalloc.
+
+    :param create_session: Creates one session.
+    :param sessions: Number of sessions to create.
+    :return: Retained bytes per session.
+    """
+    create_session()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        retained = [create_session() for _ in range(sessions)]
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del retained
+    return (after - before) / sessions
+
+
+def run(sessions: int) -> Dict:
+    """
+    Measure the memory per session for idle sessions and for sessions with entered data.
+
+    :param sessions: Number of sessions per measurement.
+    :return: The results as JSON compatible data.
+    """
+    return {
+        'python': platform.python_version(),
+        'sessions': sessions,
+        'bytes_per_session': {
+            'idle': round(measure_bytes_per_session(create_idle_session, sessions), 1),
+            'entered': round(measure_bytes_per_session(create_entered_session, sessions), 1),
+        },
+    }
+
+
+def print_comparison(baseline: Dict, results: Dict) -> None:
+    """
+    Print the memory per session of the results next to a baseline.
+
+    :param baseline: Results of an earlier run.
+    :param results: Results of this run.
+    """
+    print(f'{"session":<10}{"baseline":>12}{"current":>12}{"change":>10}')
+    for name, current in results['bytes_per_session'].items():
+        before = baseline['bytes_per_session'].get(name)
+        if before is None:
+            print(f'{name:<10}{"-":>12}{current:>12.1f}{"-":>10}')
+        else:
+            print(f'{name:<10}{before:>12.1f}{current:>12.1f}{(current - before) / before:>+10.1%}')
+
+
+# run from the backend directory: python -m benchmarks.memory_benchmark
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the memory retained per chat session.')
+    parser.add_argument('--sessions', type=int, default=10_000, help='number of sessions per measurement')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='compare with the results of an earlier run')
+    arguments = parser.parse_args()
+
+    results = run(arguments.sessions)
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2)
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            print_comparison(json.load(file), results)
+    else:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,263 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import tempfile
+import timeit
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+# the bot saves summaries while being measured, keep them out of the summaries directory
+_data_dir = tempfile.TemporaryDirectory()
+os.environ.setdefault('LEASEBOT_SUMMARY_BACKEND', 'sqlite')
+os.environ.setdefault('LEASEBOT_SUMMARY_DATABASE', os.path.join(_data_dir.name, 'summaries.db'))
+
+from Bot import Bot
+from SummaryBuilder import SummaryBuilder
+from datastructures.ChatModels import Message
+from datastructures.SessionState import SessionState
+from datastructures.States import State
+from storage.SummaryRepository import get_summary_repository
+from utils.KeywordMatcher import KeywordMatcher
+from utils.content_utils import get_bot_content
+from utils.regex_utils import find_date, find_number, find_summary_id
+
+START_DATE = datetime.now() - timedelta(days=200)
+
+# message answered in each state, the lower case content the handlers see
+STATE_MESSAGES: List[Tuple[State, str]] = [
+    (State.START, 'yes'),
+    (State.RESTART, 'yes'),
+    (State.HELP, 'okay'),
+    (State.LOAD_SUMMARY, 'yes'),
+    (State.SUMMARY_OVERVIEW, 'please show me summary 1'),
+    (State.SHOW_LOADED_SUMMARY, 'no'),
+    (State.INPUT_STARTDATE, f'it started on {START_DATE.strftime("%d.%m.%Y")}'),
+    (State.INPUT_MONTHS, '36'),
+    (State.INPUT_KM_LIMIT, '30000 km'),
+    (State.INPUT_KM_DRIVEN, '9000'),
+    (State.ASK_FOR_CHANGES, 'no'),
+    (State.CHANGES, 'the months'),
+    (State.SHOW_SUMMARY, 'no'),
+    (State.SAVE_SUMMARY, 'okay'),
+    (State.EXIT, 'restart'),
+]
+
+
+def long_text(length: int, seed: int = 0) -> str:
+    """
+    Build a text of random words without vowels and digits. It contains no keyword and no
+    number, so matching has to scan all of it.
+
+    :param length: Number of characters.
+    :param seed: Seed of the random words.
+    :return: The text.
+    """
+    generator = random.Random(seed)
+    words = []
+    size = 0
+    while size < length:
+        word = ''.join(generator.choices('bcdfghjklmpqvwxz', k=generator.randint(3, 9)))
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words)[:length]
+
+
+def large_keyword_set(size: int, seed: int = 1) -> Dict[str, str]:
+    """
+    Build a keyword mapping far larger than the bot content, with keywords sharing prefixes.
+
+    :param size: Number of keywords.
+    :param seed: Seed of the random keywords.
+    :return: Mapping of keywords to target names, ordered by priority.
+    """
+    generator = random.Random(seed)
+    keywords = {}
+    while len(keywords) < size:
+        keyword = ''.join(generator.choices(string.ascii_lowercase, k=generator.randint(4, 12)))
+        keywords[keyword] = f'state_{len(keywords) % 15}'
+    return keywords
+
+
+def baseline_find(keywords: Mapping[str, str], content: str) -> Optional[str]:
+    """
+    Find a keyword like the bot did before the KeywordMatcher, testing every keyword in turn.
+
+    :param keywords: Mapping of keywords to their values, ordered by priority.
+    :param content: The text to search.
+    :return: Value of the first keyword occurring in the content, None if there is none.
+    """
+    for keyword in keywords.keys():
+        if keyword in content:
+            return keywords[keyword]
+    return None
+
+
+def create_bot(state: State) -> Bot:
+    """
+    Create a bot in the given state with all contract data entered.
+
+    :param state: The state of the conversation.
+    :return: The bot.
+    """
+    session = SessionState(state=state, previous_state=State.START)
+    session.summary_data.set_start_date(START_DATE)
+    session.summary_data.set_months(36)
+    session.summary_data.set_km_limit(30000)
+    session.summary_data.set_km_driven(9000)
+    return Bot(session)
+
+
+def respond_to_case(state: State, content: str) -> Callable[[], Callable[[], Any]]:
+    """
+    Build a case answering a message in the given state, every call with a fresh bot.
+
+    :param state: The state of the conversation.
+    :param content: The content of the user message.
+    :return: Preparation of a single call.
+    """
+    message = Message(time_sent=datetime.now(), sender='benchmark', content=content, is_bot_message=False)
+
+    def prepare() -> Callable[[], Any]:
+        bot = create_bot(state)
+        return lambda: bot.respond_to(message)
+
+    return prepare
+
+
+def repeated_case(call: Callable[[], Any]) -> Callable[[], Callable[[], Any]]:
+    """
+    Build a case calling the same function every time.
+
+    :param call: The function to measure.
+    :return: Preparation of a single call.
+    """
+    return lambda: call
+
+
+def build_cases() -> Dict[str, Callable[[], Callable[[], Any]]]:
+    """
+    Build all cases with their representative inputs.
+
+    :return: Preparation of a single call by case name.
+    """
+    get_summary_repository().save(SummaryBuilder(START_DATE, 36, 30000, 9000).get_summary_data())
+    content = get_bot_content()
+    start_matcher = content.keyword_matchers[State.START.value]
+    changes_matcher = content.keyword_matchers[State.CHANGES.value]
+    start_keywords = content.transitions[State.START.value]
+    changes_keywords = content.transitions[State.CHANGES.value]
+    keywords = large_keyword_set(5000)
+    large_matcher = KeywordMatcher(keywords)
+    medium_message = long_text(200)
+    long_message = long_text(10000)
+    date = START_DATE.strftime('%d.%m.%Y')
+    builder = SummaryBuilder(START_DATE, 36, 30000, 9000)
+
+    cases = {f'respond_to/{state.value}': respond_to_case(state, message) for state, message in STATE_MESSAGES}
+    cases.update({
+        'respond_to/show_summary_save': respond_to_case(State.SHOW_SUMMARY, 'yes'),
+        'respond_to/fallback_long_message': respond_to_case(State.INPUT_STARTDATE, long_message),
+        'keywords/start_short': repeated_case(lambda: start_matcher.find('yes')),
+        'keywords/changes_short': repeated_case(lambda: changes_matcher.find('i want to change the driven kilometers')),
+        'keywords/start_medium_no_match': repeated_case(lambda: start_matcher.find(medium_message)),
+        'keywords/start_long_no_match': repeated_case(lambda: start_matcher.find(long_message)),
+        'keywords/large_set_long_no_match': repeated_case(lambda: large_matcher.find(long_message)),
+        'keywords/large_set_build': repeated_case(lambda: KeywordMatcher(keywords)),
+        'keywords_baseline/start_short': repeated_case(lambda: baseline_find(start_keywords, 'yes')),
+        'keywords_baseline/changes_short': repeated_case(
+            lambda: baseline_find(changes_keywords, 'i want to change the driven kilometers')),
+        'keywords_baseline/start_medium_no_match': repeated_case(lambda: baseline_find(start_keywords, medium_message)),
+        'keywords_baseline/start_long_no_match': repeated_case(lambda: baseline_find(start_keywords, long_message)),
+        'keywords_baseline/large_set_long_no_match': repeated_case(lambda: baseline_find(keywords, long_message)),
+        'find_date/short': repeated_case(lambda: find_date(f'it started on {date}')),
+        'find_date/long': repeated_case(lambda: find_date(f'{long_message} {date}')),
+        'find_number/short': repeated_case(lambda: find_number('30000 km')),
+        'find_number/long': repeated_case(lambda: find_number(f'{long_message} 30000')),
+        'find_summary_id/short': repeated_case(lambda: find_summary_id('summary 1')),
+        'find_summary_id/long': repeated_case(lambda: find_summary_id(f'{long_message} 42')),
+        'summary_builder/construct': repeated_case(lambda: SummaryBuilder(START_DATE, 36, 30000, 9000)),
+        'summary_builder/render': repeated_case(builder.get_summary),
+        'summary_builder/from_data': repeated_case(
+            lambda data=builder.get_summary_data(): SummaryBuilder.get_summary_from_data(data)),
+        'bot/construct': repeated_case(Bot),
+    })
+    return cases
+
+
+def measure(prepare: Callable[[], Callable[[], Any]], number: int, repeat: int,
+            run_seconds: float = 0.05) -> Dict[str, float]:
+    """
+    Measure the time per call of a case. The calls are prepared before each timed run and the
+    garbage collector is disabled while timing, like timeit does. Slow cases make fewer calls,
+    so a timed run takes about run_seconds.
+
+    :param prepare: Prepares a single call.
+    :param number: Maximum number of calls per timed run.
+    :param repeat: Number of timed runs.
+    :param run_seconds: Targeted duration of a timed run.
+    :return: Number of calls per timed run, fastest and median time per call in nanoseconds.
+    """
+    call = prepare()
+    started = timeit.default_timer()
+    call()
+    number = max(1, min(number, int(run_seconds / (timeit.default_timer() - started))))
+    timings = []
+    for _ in range(repeat):
+        calls = [prepare() for _ in range(number)]
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            started = timeit.default_timer()
+            for call in calls:
+                call()
+            elapsed = timeit.default_timer() - started
+        finally:
+            if gc_enabled:
+                gc.enable()
+        timings.append(elapsed / number * 1e9)
+    return {'number': number, 'best_ns': round(min(timings), 1), 'median_ns': round(statistics.median(timings), 1)}
+
+
+def run(number: int, repeat: int, selected: str = '') -> Dict:
+    """
+    Measure every case whose name contains the selection.
+
+    :param number: Maximum number of calls per timed run.
+    :param repeat: Number of timed runs.
+    :param selected: Part of the case names to measure, all cases if empty.
+    :return: The results as JSON compatible data.
+    """
+    results = {}
+    for name, prepare in build_cases().items():
+        if selected in name:
+            results[name] = measure(prepare, number, repeat)
+    return {
+        'python': platform.python_version(),
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'repeat': repeat,
+        'cases': results,
+    }
+
+
+# run from the backend directory: python -m benchmarks.micro_benchmark
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the functions running on every chat turn.')
+    parser.add_argument('--number', type=int, default=1000, help='maximum calls per timed run')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per case')
+    parser.add_argument('--select', default='', help='only measure cases whose name contains this text')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    arguments = parser.parse_args()
+
+    micro_results = run(arguments.number, arguments.repeat, arguments.select)
+    print(f'{"case":<40}{"calls":>8}{"best µs":>12}{"median µs":>12}')
+    for case, timing in micro_results['cases'].items():
+        print(f'{case:<40}{timing["number"]:>8}{timing["best_ns"] / 1000:>12.2f}{timing["median_ns"] / 1000:>12.2f}')
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(micro_results, file, indent=2)
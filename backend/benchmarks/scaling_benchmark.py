@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def conversation_messages() -> List[str]:
+    """
+    Build the user messages of a conversation that enters a contract and saves its summary.
+
+    :return: The user messages, in order.
+    """
+    start_date = (datetime.now() - timedelta(days=200)).strftime('%d.%m.%Y')
+    return ['yes', 'no', start_date, '36', '30000', '9000', 'no', 'yes']
+
+
+def free_port() -> int:
+    """
+    Find a TCP port that is currently free on localhost.
+
+    :return: The port number.
+    """
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def start_server(workers: int, port: int, data_dir: str) -> subprocess.Popen:
+    """
+    Start the API with the given number of workers, sharing chats and summaries in SQLite databases.
+
+    :param workers: Number of worker processes.
+    :param port: Port to listen on.
+    :param data_dir: Directory for the databases.
+    :return: The server process.
+    """
+    environment = dict(
+        os.environ,
+        LEASEBOT_WORKERS=str(workers),
+        LEASEBOT_BOT_STATE_STORE='sqlite',
+        LEASEBOT_BOT_STATE_DATABASE=os.path.join(data_dir, 'chats.db'),
+        LEASEBOT_SUMMARY_BACKEND='sqlite',
+        LEASEBOT_SUMMARY_DATABASE=os.path.join(data_dir, 'summaries.db'),
+    )
+    command = [sys.executable, '-m', 'uvicorn', 'app:app', '--port', str(port), '--workers', str(workers),
+               '--log-level', 'warning']
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=environment)
+
+
+def wait_until_ready(base_url: str, timeout_seconds: float = 30) -> None:
+    """
+    Wait until the API answers requests.
+
+    :param base_url: URL of the API.
+    :param timeout_seconds: Time to wait at most.
+    :raises TimeoutError: If the API does not answer in time.
+    """
+    deadline = time.monotonic() + timeout_seconds
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f'{base_url}/sessions/stats').status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f'{base_url} did not start within {timeout_seconds} seconds')
+
+
+async def run_conversations(base_url: str, concurrency: int, duration_seconds: float) -> Dict[str, int]:
+    """
+    Run scripted conversations with several concurrent users until the duration has passed.
+
+    :param base_url: URL of the API.
+    :param concurrency: Number of concurrent conversations.
+    :param duration_seconds: Time to keep starting new conversations.
+    :return: Number of successful and failed requests.
+    """
+    counts = {'requests': 0, 'errors': 0}
+    deadline = time.monotonic() + duration_seconds
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def user() -> None:
+            while time.monotonic() < deadline:
+                response = await client.post('/chats/new', params={'name': 'benchmark'})
+                if response.status_code != 200:
+                    counts['errors'] += 1
+                    continue
+                counts['requests'] += 1
+                chat_id = response.json()
+                for content in conversation_messages():
+                    message = {'time_sent': datetime.now().isoformat(), 'sender': 'benchmark',
+                               'content': content, 'is_bot_message': False}
+                    response = await client.post(f'/chats/id/{chat_id}/message', json=message)
+                    counts['requests' if response.status_code == 200 else 'errors'] += 1
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+    return counts
+
+
+def client_process(base_url: str, concurrency: int, duration_seconds: float) -> Dict[str, int]:
+    """
+    Entry point of a load generating process.
+
+    :param base_url: URL of the API.
+    :param concurrency: Number of concurrent conversations of this process.
+    :param duration_seconds: Time to keep starting new conversations.
+    :return: Number of successful and failed requests.
+    """
+    return asyncio.run(run_conversations(base_url, concurrency, duration_seconds))
+
+
+def measure(workers: int, clients: int, concurrency: int, duration_seconds: float) -> Dict:
+    """
+    Measure the throughput of the API with the given number of workers.
+
+    :param workers: Number of worker processes.
+    :param clients: Number of load generating processes.
+    :param concurrency: Number of concurrent conversations per load generating process.
+    :param duration_seconds: Duration of the measurement.
+    :return: The throughput and error count.
+    """
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    with tempfile.TemporaryDirectory() as data_dir:
+        server = start_server(workers, port, data_dir)
+        try:
+            wait_until_ready(base_url)
+            started = time.monotonic()
+            with multiprocessing.Pool(clients) as pool:
+                results = pool.starmap(client_process, [(base_url, concurrency, duration_seconds)] * clients)
+            elapsed = time.monotonic() - started
+        finally:
+            server.terminate()
+            server.wait()
+
+    requests = sum(result['requests'] for result in results)
+    return {
+        'workers': workers,
+        'requests': requests,
+        'errors': sum(result['errors'] for result in results),
+        'requests_per_second': round(requests / elapsed, 1),
+    }
+
+
+# run from the backend directory: python -m benchmarks.scaling_benchmark
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure how the API throughput scales with the number of workers.')
+    parser.add_argument('--workers', default='1,2,4', help='comma separated worker counts to measure')
+    parser.add_argument('--clients', type=int, default=os.cpu_count() or 1, help='number of client processes')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent conversations per client process')
+    parser.add_argument('--duration', type=float, default=20, help='duration of each measurement in seconds')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    arguments = parser.parse_args()
+
+    measurements = [
+        measure(int(workers), arguments.clients, arguments.concurrency, arguments.duration)
+        for workers in arguments.workers.split(',')
+    ]
+    baseline = measurements[0]['requests_per_second'] / measurements[0]['workers']
+    print(f'{"workers":>8}{"requests/s":>12}{"speedup":>10}{"efficiency":>12}{"errors":>8}')
+    for measurement in measurements:
+        speedup = measurement['requests_per_second'] / baseline
+        measurement['speedup'] = round(speedup, 2)
+        print(f'{measurement["workers"]:>8}{measurement["requests_per_second"]:>12.1f}{speedup:>10.2f}'
+              f'{speedup / measurement["workers"]:>12.0%}{measurement["errors"]:>8}')
+    print(f'cpu cores: {os.cpu_count()}')
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump({'cpu_count': os.cpu_count(), 'measurements': measurements}, file, indent=2)
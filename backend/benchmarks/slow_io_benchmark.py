@@ -0,0 +1,259 @@
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+import httpx
+import uvicorn
+
+from benchmarks.load_test import load_summary_messages, percentile, save_summary_messages
+from benchmarks.scaling_benchmark import free_port
+
+import storage.SummaryRepository as summary_repository_module
+from app import app
+from storage.SqliteSummaryBackend import SqliteSummaryBackend
+from storage.SummaryBackend import SummaryBackend
+from storage.SummaryRepository import SummaryRepository
+
+
+class SlowSummaryBackend(SummaryBackend):
+    """
+    Summary backend delaying every access, like a slow disk or a network file system would.
+
+    Attributes:
+        delay_seconds (float): Time every access blocks for.
+        __backend (SummaryBackend): Backend actually storing the summaries.
+    """
+
+    def __init__(self, backend: SummaryBackend, delay_seconds: float = 0):
+        """
+        Initializes a SlowSummaryBackend around another backend.
+
+        :param backend: Backend actually storing the summaries.
+        :param delay_seconds: Time every access blocks for.
+        """
+        self.__backend = backend
+        self.delay_seconds = delay_seconds
+        self.max_id = backend.max_id
+
+    def ids(self) -> List[int]:
+        """
+        Reads the IDs of all saved summaries after the delay.
+
+        :return: List of the saved summary IDs.
+        """
+        time.sleep(self.delay_seconds)
+        return self.__backend.ids()
+
+    def read(self, id: int) -> Dict:
+        """
+        Reads a summary after the delay.
+
+        :param id: The ID of the summary.
+        :return: The saved summary data.
+        """
+        time.sleep(self.delay_seconds)
+        return self.__backend.read(id)
+
+    def version(self, id: int) -> Hashable:
+        """
+        Retrieves the version of a summary after the delay.
+
+        :param id: The ID of the summary.
+        :return: The version of the summary.
+        """
+        time.sleep(self.delay_seconds)
+        return self.__backend.version(id)
+
+    def allocate_id(self, taken_ids: Set[int]) -> int:
+        """
+        Allocates the ID for a new summary after the delay.
+
+        :param taken_ids: IDs known to be in use.
+        :return: The allocated ID.
+        """
+        time.sleep(self.delay_seconds)
+        return self.__backend.allocate_id(taken_ids)
+
+    def write(self, id: int, data: Dict) -> None:
+        """
+        Writes a summary after the delay.
+
+        :param id: The ID of the summary.
+        :param data: The summary data.
+        """
+        time.sleep(self.delay_seconds)
+        self.__backend.write(id, data)
+
+    def write_many(self, summaries: Iterable[Tuple[int, Dict]]) -> None:
+        """
+        Writes several summaries after a single delay.
+
+        :param summaries: Pairs of summary ID and summary data.
+        """
+        time.sleep(self.delay_seconds)
+        self.__backend.write_many(summaries)
+
+    def delete(self, id: int) -> None:
+        """
+        Deletes a summary after the delay.
+
+        :param id: The ID of the summary.
+        """
+        time.sleep(self.delay_seconds)
+        self.__backend.delete(id)
+
+    def close(self) -> None:
+        """
+        Releases the resources held by the wrapped backend.
+        """
+        self.__backend.close()
+
+
+
+async def send(client: httpx.AsyncClient, chat_id: int, content: str) -> Dict:
+    """
+    Send a user message to a chat session.
+
+    :param client: Client connected to the API.
+    :param chat_id: ID of the chat session.
+    :param content: Content of the message.
+    :return: The response of the bot.
+    """
+    message = {'time_sent': datetime.now().isoformat(), 'sender': 'benchmark', 'content': content,
+               'is_bot_message': False}
+    response = await client.post(f'/chats/id/{chat_id}/message', json=message)
+    response.raise_for_status()
+    return response.json()
+
+
+async def summary_user(client: httpx.AsyncClient, summary_id: int, deadline: float) -> None:
+    """
+    Save and load summaries until the deadline, every access blocking for the configured delay.
+
+    :param client: Client connected to the API.
+    :param summary_id: ID of a saved summary to load.
+    :param deadline: Monotonic time to stop at.
+    """
+    while time.monotonic() < deadline:
+        for messages in (save_summary_messages(), load_summary_messages(summary_id)):
+            chat_id = (await client.post('/chats/new', params={'name': 'summaries'})).json()
+            for content in messages:
+                await send(client, chat_id, content)
+
+
+async def chat_user(client: httpx.AsyncClient, deadline: float, latencies: List[float]) -> None:
+    """
+    Chat without touching the summaries until the deadline, recording the latency of every request.
+
+    :param client: Client connected to the API.
+    :param deadline: Monotonic time to stop at.
+    :param latencies: List the latencies in seconds are appended to.
+    """
+    chat_id = (await client.post('/chats/new', params={'name': 'chat'})).json()
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        await send(client, chat_id, 'hello')
+        (await client.get(f'/chats/id/{chat_id}', params={'after_index': 0})).raise_for_status()
+        latencies.append(time.perf_counter() - started)
+
+
+async def measure(client: httpx.AsyncClient, backend: SlowSummaryBackend, delay_seconds: float, summary_users: int,
+                  chat_users: int, duration_seconds: float) -> Dict:
+    """
+    Measure the latency of chats not touching the summaries while other chats save and load them.
+
+    :param client: Client connected to the API.
+    :param backend: Backend of the summary repository the app uses.
+    :param delay_seconds: Time every summary access blocks for.
+    :param summary_users: Number of concurrent users saving and loading summaries.
+    :param chat_users: Number of concurrent users only chatting.
+    :param duration_seconds: Duration of the measurement.
+    :return: The latency percentiles of the chatting users in milliseconds.
+    """
+    backend.delay_seconds = 0
+    chat_id = (await client.post('/chats/new', params={'name': 'summaries'})).json()
+    for content in save_summary_messages():
+        saved = await send(client, chat_id, content)
+    summary_id = int(saved['content'].split()[-1])
+
+    backend.delay_seconds = delay_seconds
+    latencies: List[float] = []
+    deadline = time.monotonic() + duration_seconds
+    await asyncio.gather(
+        *(summary_user(client, summary_id, deadline) for _ in range(summary_users)),
+        *(chat_user(client, deadline, latencies) for _ in range(chat_users)),
+    )
+    ordered = sorted(latencies)
+    return {
+        'delay_ms': delay_seconds * 1000,
+        'requests': len(ordered),
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+async def run(backend: SlowSummaryBackend, delays: List[float], summary_users: int, chat_users: int,
+              duration_seconds: float) -> List[Dict]:
+    """
+    Serve the app from a thread of this process and measure the chat latency for every delay.
+    The requests go over sockets, so the server has to handle them concurrently on its own.
+    The summary repository of the app has to store its summaries in the given backend.
+
+    :param backend: Backend of the summary repository the app uses.
+    :param delays: Delays of the summary accesses in seconds.
+    :param summary_users: Number of concurrent users saving and loading summaries.
+    :param chat_users: Number of concurrent users only chatting.
+    :param duration_seconds: Duration of each measurement.
+    :return: The measurements, in the order of the delays.
+    """
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning'))
+    server_thread = threading.Thread(target=server.run, daemon=True)
+    server_thread.start()
+    try:
+        while not server.started:
+            await asyncio.sleep(0.05)
+        limits = httpx.Limits(max_connections=summary_users + chat_users)
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{port}', limits=limits, timeout=60) as client:
+            return [await measure(client, backend, delay, summary_users, chat_users, duration_seconds)
+                    for delay in delays]
+    finally:
+        server.should_exit = True
+        server_thread.join()
+
+
+# run from the backend directory: python -m benchmarks.slow_io_benchmark
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure whether slow summary storage delays unrelated chats.')
+    parser.add_argument('--delays', default='0,50,200', help='comma separated delays of a summary access in ms')
+    parser.add_argument('--summary-users', type=int, default=4, help='users saving and loading summaries')
+    parser.add_argument('--chat-users', type=int, default=8, help='users only chatting')
+    parser.add_argument('--duration', type=float, default=5, help='duration of each measurement in seconds')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    arguments = parser.parse_args()
+
+    # summaries go to a temporary database, which is slowed down while measuring
+    with tempfile.TemporaryDirectory() as data_dir:
+        slow_backend = SlowSummaryBackend(SqliteSummaryBackend(os.path.join(data_dir, 'summaries.db')))
+        summary_repository_module._repository = SummaryRepository(slow_backend)
+        try:
+            measurements = asyncio.run(run(slow_backend, [float(delay) / 1000 for delay in arguments.delays.split(',')],
+                                           arguments.summary_users, arguments.chat_users, arguments.duration))
+        finally:
+            slow_backend.close()
+    print(f'{"delay ms":>9}{"requests":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"max ms":>10}')
+    for measurement in measurements:
+        print(f'{measurement["delay_ms"]:>9.0f}{measurement["requests"]:>10}{measurement["p50_ms"]:>10.2f}'
+              f'{measurement["p95_ms"]:>10.2f}{measurement["p99_ms"]:>10.2f}{measurement["max_ms"]:>10.2f}')
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(measurements, file, indent=2)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the backend runs from its own directory, with top-level imports and data paths relative to it
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _BACKEND_DIR)
+os.chdir(_BACKEND_DIR)
@@ -0,0 +1,69 @@
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Tuple
+
+from datastructures.States import validate_state_machine
+from utils.KeywordMatcher import KeywordMatcher
+
+
+@dataclass(frozen=True)
+class BotContent:
+    """
+    Immutable snapshot of the conversational content in the bot_data directory.
+
+    A single instance is shared by all Bot instances, so neither the instance nor
+    its nested containers may be modified.
+
+    Attributes:
+        questions (Mapping[str, Tuple[str, ...]]): Questions for each state, keyed by state value.
+        fallbacks (Tuple[str, ...]): Fallback responses.
+        transitions (Mapping[str, Mapping[str, str]]): Keyword to target state mapping for each state.
+        greetings (Tuple[str, ...]): Greeting messages.
+        keyword_matchers (Mapping[str, KeywordMatcher]): Precompiled transition keyword matcher for each state.
+    """
+    questions: Mapping[str, Tuple[str, ...]]
+    fallbacks: Tuple[str, ...]
+    transitions: Mapping[str, Mapping[str, str]]
+    greetings: Tuple[str, ...]
+    keyword_matchers: Mapping[str, KeywordMatcher]
+
+    @staticmethod
+    def from_json_data(questions: Dict[str, List[str]], fallbacks: List[str],
+                       transitions: Dict[str, Dict[str, str]], greetings: List[str]) -> 'BotContent':
+        """
+        Builds a frozen BotContent from the parsed JSON structures.
+
+        Args:
+            questions (Dict[str, List[str]]): Parsed content of questions.json.
+            fallbacks (List[str]): Parsed content of fallback.json.
+            transitions (Dict[str, Dict[str, str]]): Parsed content of transitions.json.
+            greetings (List[str]): Parsed content of greetings.json.
+
+        Returns:
+            BotContent: Read-only view of the given content.
+
+        Raises:
+            InvalidStateMachineException: If the questions and transitions do not cover every state,
+                or a transition leads to an unknown state.
+        """
+        validate_state_machine(questions, transitions)
+        return BotContent(
+            questions=_freeze_mapping({state: tuple(texts) for state, texts in questions.items()}),
+            fallbacks=tuple(fallbacks),
+            transitions=_freeze_mapping({state: _freeze_mapping(keywords) for state, keywords in transitions.items()}),
+            greetings=tuple(greetings),
+            keyword_matchers=_freeze_mapping({state: KeywordMatcher(keywords) for state, keywords in transitions.items()}),
+        )
+
+
+def _freeze_mapping(mapping: Dict[str, Any]) -> Mapping[str, Any]:
+    """
+    Wraps a copy of the given dictionary into a read-only mapping, keeping its insertion order.
+
+    Args:
+        mapping (Dict[str, Any]): The dictionary to freeze.
+
+    Returns:
+        Mapping[str, Any]: Read-only view of the copied dictionary.
+    """
+    return MappingProxyType(dict(mapping))
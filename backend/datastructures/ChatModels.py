@@ -1,4 +1,4 @@
-from typing import List
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel
 from datetime import datetime
@@ -23,11 +23,13 @@ class Message(BaseModel):
         sender: (str): The origin of the message.
         content (str): The content of the message.
         is_bot_message (bool): Shows if the message was sent by the bot.
+        client_id (Optional[str]): ID the client gave a user message, so a message sent again is answered only once.
     """
     time_sent: datetime
     sender: str
     content: str
     is_bot_message: bool
+    client_id: Optional[str] = None
 
 
 class ChatSession(BaseModel):
@@ -42,6 +44,123 @@ class ChatSession(BaseModel):
     messages: List[Message]
 
 
+class ChatSessionPage(ChatSession):
+    """
+    Represents a page of the messages of a chat session.
+
+    Attributes:
+        total_messages (int): Number of messages in the whole chat session.
+        next_index (int): Index of the last message in this page, to be passed as after_index
+            to fetch the following messages.
+    """
+    total_messages: int
+    next_index: int
+
+
+class PresenceEntry(BaseModel):
+    """
+    Represents the user of a chat session in the presence feed.
+
+    Attributes:
+        chat_id (int): The ID of the chat session.
+        user (User): The user of the chat session.
+    """
+    chat_id: int
+    user: User
+
+
+class PresenceEvent(BaseModel):
+    """
+    Represents a change of the logged-in users, sent by the presence feed.
+
+    Attributes:
+        event (str): 'snapshot' for the complete list of users, 'join' or 'leave' for a change.
+        entries (List[PresenceEntry]): All users for a snapshot, otherwise the user that joined or left.
+    """
+    event: Literal['snapshot', 'join', 'leave']
+    entries: List[PresenceEntry]
+
+
+class SessionStats(BaseModel):
+    """
+    Represents the size, limits and eviction counters of the session store.
+
+    Attributes:
+        sessions (int): Number of chat sessions currently kept in memory.
+        max_sessions (int): Maximum number of chat sessions kept in memory.
+        ttl_seconds (float): Idle time in seconds after which a chat session expires.
+        evicted_expired (int): Number of chat sessions removed because they expired.
+        evicted_lru (int): Number of least recently used chat sessions removed because the store was full.
+    """
+    sessions: int
+    max_sessions: int
+    ttl_seconds: float
+    evicted_expired: int
+    evicted_lru: int
+
+
+class ProfileSummary(BaseModel):
+    """
+    Represents a kept profile of a request, without its measurements.
+
+    Attributes:
+        id (int): Number of the profile.
+        method (str): HTTP method of the request.
+        path (str): Path of the request.
+        status (Optional[int]): Status code of the response, None if no response was sent.
+        started_at (datetime): Time the request was received.
+        duration_ms (float): Time until the response headers were sent in milliseconds.
+    """
+    id: int
+    method: str
+    path: str
+    status: Optional[int]
+    started_at: datetime
+    duration_ms: float
+
+
+class SpanData(BaseModel):
+    """
+    Represents a timed stage of a traced request.
+
+    Attributes:
+        span_id (int): Number of the span within its trace.
+        parent_id (Optional[int]): Number of the enclosing span, None for the root span.
+        name (str): Name of the stage, like Bot.respond_to.
+        thread (str): Name of the thread the stage ran on.
+        start_ms (float): Start of the stage in milliseconds after the start of the request.
+        duration_ms (float): Duration of the stage in milliseconds.
+        attributes (Dict[str, Any]): Details of the stage, like the chat ID or the state.
+        error (Optional[str]): Type of the exception the stage ended with, None if it succeeded.
+    """
+    span_id: int
+    parent_id: Optional[int]
+    name: str
+    thread: str
+    start_ms: float
+    duration_ms: float
+    attributes: Dict[str, Any]
+    error: Optional[str]
+
+
+class TraceData(BaseModel):
+    """
+    Represents the nested timings of a traced request.
+
+    Attributes:
+        trace_id (str): Random ID of the trace.
+        name (str): Name of the root span, the method and route of the request.
+        started_at (datetime): Time the request was received.
+        duration_ms (float): Duration of the request in milliseconds.
+        spans (List[SpanData]): The stages of the request, ordered by their start.
+    """
+    trace_id: str
+    name: str
+    started_at: datetime
+    duration_ms: float
+    spans: List[SpanData]
+
+
 class LeasingContract(BaseModel):
     """
     Pydantic BaseModel representing a leasing contract with start_date, end_date, km_limit,
@@ -0,0 +1,73 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from datastructures.States import State, get_state
+from datastructures.SummaryData import SummaryData
+
+
+@dataclass(slots=True)
+class SessionState:
+    """
+    Mutable conversation state of a single chat session.
+
+    Everything shared between the sessions, like the bot content and the saved summaries,
+    is referenced by the Bot instead, so a session only carries what it changes.
+
+    Attributes:
+        state (State): Current state of the chatbot.
+        previous_state (State): Previous state of the chatbot.
+        summary_data (SummaryData): Contract data entered by the user.
+        loaded_summary_id (Optional[int]): ID of the currently loaded summary.
+        saved_summary_id (Optional[int]): ID of the summary saved last.
+    """
+    state: State = State.START
+    previous_state: State = State.START
+    summary_data: SummaryData = field(default_factory=SummaryData)
+    loaded_summary_id: Optional[int] = None
+    saved_summary_id: Optional[int] = None
+
+    def to_json_data(self) -> Dict[str, Any]:
+        """
+        Converts the state into compact JSON compatible data.
+
+        Returns:
+            Dict[str, Any]: The state with the states as values and the start date in ISO 8601 format.
+        """
+        return {
+            'state': self.state.value,
+            'previous_state': self.previous_state.value,
+            'start_date': self.summary_data.get_start_date().isoformat(),
+            'months': self.summary_data.get_months(),
+            'km_limit': self.summary_data.get_km_limit(),
+            'km_driven': self.summary_data.get_km_driven(),
+            'loaded_summary_id': self.loaded_summary_id,
+            'saved_summary_id': self.saved_summary_id,
+        }
+
+    @staticmethod
+    def from_json_data(data: Dict[str, Any]) -> 'SessionState':
+        """
+        Restores a state converted with to_json_data.
+
+        Args:
+            data (Dict[str, Any]): The converted state.
+
+        Returns:
+            SessionState: The restored state.
+
+        Raises:
+            NoMatchingStateException: If a state value is unknown.
+        """
+        summary_data = SummaryData()
+        summary_data.set_start_date(datetime.fromisoformat(data['start_date']))
+        summary_data.set_months(data['months'])
+        summary_data.set_km_limit(data['km_limit'])
+        summary_data.set_km_driven(data['km_driven'])
+        return SessionState(
+            state=get_state(data['state']),
+            previous_state=get_state(data['previous_state']),
+            summary_data=summary_data,
+            loaded_summary_id=data['loaded_summary_id'],
+            saved_summary_id=data['saved_summary_id'],
+        )
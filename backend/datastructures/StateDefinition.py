@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+
+@dataclass(frozen=True, slots=True)
+class StateDefinition:
+    """
+    Behaviour of the chatbot in one state.
+
+    The callables are unbound methods of the chatbot, so a single table of definitions is
+    shared by all chat sessions.
+
+    Attributes:
+        handle (Callable[[Any, str], Any]): Responds to the content of a user message in the state.
+        add_info (Optional[Callable[[Any], None]]): Appends additional information to the question
+            of the state, None if the question is complete on its own.
+    """
+    handle: Callable[[Any, str], Any]
+    add_info: Optional[Callable[[Any], None]] = None
+
+    @property
+    def needs_additional_info(self) -> bool:
+        """
+        Checks whether the question of the state is followed by additional information.
+
+        Returns:
+            bool: True if additional information is added, False otherwise.
+        """
+        return self.add_info is not None
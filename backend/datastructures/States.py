@@ -1,5 +1,10 @@
 from enum import Enum
-from utils.Exceptions import NoMatchingStateException
+from typing import Mapping, Sequence
+
+from utils.Exceptions import InvalidStateMachineException, NoMatchingStateException
+
+# transition target leading back to the state before the current one
+PREVIOUS_STATE = 'previous'
 
 
 class State(Enum):
@@ -58,3 +63,36 @@ def get_state(state_string: str) -> State:
         return State(state_string)
     except ValueError:
         raise NoMatchingStateException(f'no matching state for string: {state_string}')
+
+
+def validate_state_machine(questions: Mapping[str, Sequence[str]], transitions: Mapping[str, Mapping[str, str]]) -> None:
+    """
+    Checks that the questions and transitions define a complete state machine over State.
+
+    Every state needs at least one question and an entry in the transitions, and every
+    transition has to lead to a state, or back to the previous one when leaving the
+    RESTART state.
+
+    Args:
+        questions (Mapping[str, Sequence[str]]): Questions for each state, keyed by state value.
+        transitions (Mapping[str, Mapping[str, str]]): Keyword to target state mapping for each state.
+
+    Raises:
+        InvalidStateMachineException: If a state or transition is missing or unknown.
+    """
+    state_values = {state.value for state in State}
+    for state_value in state_values:
+        if not questions.get(state_value):
+            raise InvalidStateMachineException(f'no questions for state: {state_value}')
+        if state_value not in transitions:
+            raise InvalidStateMachineException(f'no transitions for state: {state_value}')
+
+    for state_value, keywords in transitions.items():
+        if state_value not in state_values:
+            raise InvalidStateMachineException(f'transitions for unknown state: {state_value}')
+        for keyword, target in keywords.items():
+            if target == PREVIOUS_STATE and state_value == State.RESTART.value:
+                continue
+            if target not in state_values:
+                raise InvalidStateMachineException(
+                    f'transition "{keyword}" of state {state_value} leads to unknown state: {target}')
@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+
+from Bot import Bot
+from datastructures.ChatModels import ChatSession
+
+
+@dataclass(slots=True)
+class StoredChat:
+    """
+    A chat as kept by a BotStateStore, enough to continue it in any process.
+
+    Attributes:
+        session (ChatSession): The chat session with the user and the message history.
+        bot (Bot): The bot answering in the chat.
+        version (int): Number of stored messages, identifying the stored version of the chat.
+    """
+    session: ChatSession
+    bot: Bot
+    version: int
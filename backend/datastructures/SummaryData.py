@@ -1,28 +1,30 @@
 from datetime import datetime
 
+_UNSET_DATE = datetime(1970, 1, 1)
+
 
 class SummaryData:
     """
     Represents summary data including start date, months, kilometer limit, and kilometers driven.
 
+    The values are kept in slots instead of a dictionary, as every chat session holds an instance.
+
     Attributes:
-        __data (dict): Dictionary holding summary data with default values:
-            - 'start_date': Initial date set to January 1, 1970.
-            - 'months': Initial value set to 0.
-            - 'km_limit': Initial value set to 0.
-            - 'km_driven': Initial value set to 0.
+        __start_date (datetime): The start date, initially January 1, 1970.
+        __months (int): The number of months, initially 0.
+        __km_limit (int): The kilometer limit, initially 0.
+        __km_driven (int): The kilometers driven, initially 0.
     """
+    __slots__ = ('__start_date', '__months', '__km_limit', '__km_driven')
 
     def __init__(self):
         """
         Initializes a SummaryData object with default values.
         """
-        self.__data = {
-            'start_date': datetime(1970, 1, 1),
-            'months': 0,
-            'km_limit': 0,
-            'km_driven': 0
-        }
+        self.__start_date = _UNSET_DATE
+        self.__months = 0
+        self.__km_limit = 0
+        self.__km_driven = 0
 
     def is_complete(self) -> bool:
         """
@@ -31,8 +33,8 @@ class SummaryData:
         Returns:
             bool: True if all attributes are set, False otherwise.
         """
-        for value in self.__data.values():
-            if value == 0 or value == datetime(1970, 1, 1):
+        for value in (self.__start_date, self.__months, self.__km_limit, self.__km_driven):
+            if value == 0 or value == _UNSET_DATE:
                 return False
         return True
 
@@ -43,7 +45,7 @@ class SummaryData:
         Returns:
             datetime: The start date.
         """
-        return self.__data['start_date']
+        return self.__start_date
 
     def set_start_date(self, date: datetime):
         """
@@ -52,7 +54,7 @@ class SummaryData:
         Args:
             date (datetime): The start date to set.
         """
-        self.__data['start_date'] = date
+        self.__start_date = date
 
     def get_months(self) -> int:
         """
@@ -61,7 +63,7 @@ class SummaryData:
         Returns:
             int: The number of months.
         """
-        return self.__data['months']
+        return self.__months
 
     def set_months(self, months: int):
         """
@@ -70,7 +72,7 @@ class SummaryData:
         Args:
             months (int): The number of months to set.
         """
-        self.__data['months'] = months
+        self.__months = months
 
     def get_km_limit(self) -> int:
         """
@@ -79,7 +81,7 @@ class SummaryData:
         Returns:
             int: The kilometer limit.
         """
-        return self.__data['km_limit']
+        return self.__km_limit
 
     def set_km_limit(self, km_limit: int):
         """
@@ -88,7 +90,7 @@ class SummaryData:
         Args:
             km_limit (int): The kilometer limit to set.
         """
-        self.__data['km_limit'] = km_limit
+        self.__km_limit = km_limit
 
     def get_km_driven(self) -> int:
         """
@@ -97,7 +99,7 @@ class SummaryData:
         Returns:
             int: The kilometers driven.
         """
-        return self.__data['km_driven']
+        return self.__km_driven
 
     def set_km_driven(self, km_driven: int):
         """
@@ -106,7 +108,7 @@ class SummaryData:
         Args:
             km_driven (int): The kilometers driven to set.
         """
-        self.__data['km_driven'] = km_driven
+        self.__km_driven = km_driven
 
     def __repr__(self) -> str:
         """
@@ -115,10 +117,10 @@ class SummaryData:
         Returns:
             str: String representation including start date, months, kilometer limit, and kilometers driven.
         """
-        start_date_str = self.__data['start_date'].strftime("%d.%m.%Y") if self.__data['start_date'] else 'None'
+        start_date_str = self.__start_date.strftime("%d.%m.%Y") if self.__start_date else 'None'
         return (
             f"  start date: {start_date_str},\n"
-            f"  months: {self.__data['months']},\n"
-            f"  km limit: {self.__data['km_limit']},\n"
-            f"  km driven: {self.__data['km_driven']}"
+            f"  months: {self.__months},\n"
+            f"  km limit: {self.__km_limit},\n"
+            f"  km driven: {self.__km_driven}"
         )
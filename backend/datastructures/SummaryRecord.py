@@ -0,0 +1,203 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Tuple
+
+from utils.date_utils import format_date
+
+SUMMARY_RECORD_VERSION = 2
+
+_NUMBER = r'(-?\d+(?:\.\d+)?(?:e[+-]?\d+)?)'
+
+
+@dataclass(frozen=True, slots=True)
+class SummaryRecord:
+    """
+    Numeric summary of a leasing contract, calculated at a point in time.
+
+    The record is what gets persisted. It is only turned into text when a summary is rendered,
+    so saved summaries can be recomputed, aggregated and compared without parsing.
+
+    Attributes:
+        start_date (datetime): The start date of the leasing contract.
+        end_date (datetime): The end date of the leasing contract.
+        runtime_months (int): The duration of the contract in months.
+        runtime_days (int): The duration of the contract in days.
+        km_limit (int): The kilometer limit for the contract.
+        km_driven (float): Kilometers driven during the contract period.
+        as_of (datetime): The point in time the metrics were calculated at.
+        day_number (int): Day number within the contract at as_of.
+        daily_average (float): Daily average kilometers allowed.
+        monthly_average (float): Monthly average kilometers allowed.
+        allowed_kms (float): Allowed kilometers driven so far.
+        difference (float): Difference between allowed kilometers and kilometers driven.
+        daily_average_so_far (float): Average kilometers driven per day so far.
+        daily_average_from_now (float): Daily average kilometers needed to meet the limit from now.
+    """
+    start_date: datetime
+    end_date: datetime
+    runtime_months: int
+    runtime_days: int
+    km_limit: int
+    km_driven: float
+    as_of: datetime
+    day_number: int
+    daily_average: float
+    monthly_average: float
+    allowed_kms: float
+    difference: float
+    daily_average_so_far: float
+    daily_average_from_now: float
+
+    def to_display_data(self) -> Dict[str, str]:
+        """
+        Formats the record as the labelled lines of a summary report.
+
+        Returns:
+            Dict[str, str]: Formatted values by label, in report order.
+        """
+        return {
+            'contract': f'{self.km_limit} km over {self.runtime_months} months',
+            'start date': format_date(self.start_date),
+            'end date': format_date(self.end_date),
+            'daily average': f'{self.daily_average} km/day',
+            'monthly average': f'{self.monthly_average} km/month',
+            'day': f'{self.day_number} of {self.runtime_days} days',
+            'allowed kms so far': f'{self.allowed_kms} km',
+            'driven': f'{self.km_driven} km',
+            'difference': f'{self.difference} km',
+            'daily average so far': f'{self.daily_average_so_far} km/day',
+            'daily average from now': f'{self.daily_average_from_now} km/day',
+        }
+
+    def to_json_data(self) -> Dict[str, Any]:
+        """
+        Converts the record into JSON compatible data, dates as ISO 8601 strings.
+
+        Returns:
+            Dict[str, Any]: The data to persist.
+        """
+        return {
+            'version': SUMMARY_RECORD_VERSION,
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'runtime_months': self.runtime_months,
+            'runtime_days': self.runtime_days,
+            'km_limit': self.km_limit,
+            'km_driven': self.km_driven,
+            'as_of': self.as_of.isoformat(),
+            'day_number': self.day_number,
+            'daily_average': self.daily_average,
+            'monthly_average': self.monthly_average,
+            'allowed_kms': self.allowed_kms,
+            'difference': self.difference,
+            'daily_average_so_far': self.daily_average_so_far,
+            'daily_average_from_now': self.daily_average_from_now,
+        }
+
+    @staticmethod
+    def from_json_data(data: Dict[str, Any]) -> 'SummaryRecord':
+        """
+        Builds a record from persisted data, parsing summaries saved as preformatted text.
+
+        Args:
+            data (Dict[str, Any]): The persisted summary data.
+
+        Returns:
+            SummaryRecord: The numeric summary.
+
+        Raises:
+            ValueError: If the data is neither a record nor a legacy text summary.
+        """
+        if is_legacy_summary_data(data):
+            return _parse_legacy_summary_data(data)
+        try:
+            return SummaryRecord(
+                start_date=datetime.fromisoformat(data['start_date']),
+                end_date=datetime.fromisoformat(data['end_date']),
+                runtime_months=data['runtime_months'],
+                runtime_days=data['runtime_days'],
+                km_limit=data['km_limit'],
+                km_driven=data['km_driven'],
+                as_of=datetime.fromisoformat(data['as_of']),
+                day_number=data['day_number'],
+                daily_average=data['daily_average'],
+                monthly_average=data['monthly_average'],
+                allowed_kms=data['allowed_kms'],
+                difference=data['difference'],
+                daily_average_so_far=data['daily_average_so_far'],
+                daily_average_from_now=data['daily_average_from_now'],
+            )
+        except (KeyError, TypeError) as error:
+            raise ValueError(f'invalid summary data: {error}') from error
+
+
+def is_legacy_summary_data(data: Dict[str, Any]) -> bool:
+    """
+    Checks whether persisted summary data holds preformatted text instead of a record.
+
+    Args:
+        data (Dict[str, Any]): The persisted summary data.
+
+    Returns:
+        bool: True for summaries saved as formatted text, False otherwise.
+    """
+    return 'version' not in data and 'contract' in data
+
+
+def _parse_legacy_summary_data(data: Dict[str, str]) -> SummaryRecord:
+    """
+    Parses a summary saved as formatted text back into a record. The time of the calculation
+    was not saved, it is restored as the start of its day in the contract.
+
+    Args:
+        data (Dict[str, str]): The formatted summary data.
+
+    Returns:
+        SummaryRecord: The numeric summary.
+
+    Raises:
+        ValueError: If a value does not have the format written by SummaryBuilder.
+    """
+    try:
+        km_limit, runtime_months = _parse_legacy_value(data['contract'], rf'{_NUMBER} km over {_NUMBER} months')
+        day_number, runtime_days = _parse_legacy_value(data['day'], rf'{_NUMBER} of {_NUMBER} days')
+        start_date = datetime.strptime(data['start date'], '%d.%m.%Y')
+        return SummaryRecord(
+            start_date=start_date,
+            end_date=datetime.strptime(data['end date'], '%d.%m.%Y'),
+            runtime_months=runtime_months,
+            runtime_days=runtime_days,
+            km_limit=km_limit,
+            km_driven=_parse_legacy_value(data['driven'], rf'{_NUMBER} km')[0],
+            as_of=start_date + timedelta(days=day_number),
+            day_number=day_number,
+            daily_average=_parse_legacy_value(data['daily average'], rf'{_NUMBER} km/day')[0],
+            monthly_average=_parse_legacy_value(data['monthly average'], rf'{_NUMBER} km/month')[0],
+            allowed_kms=_parse_legacy_value(data['allowed kms so far'], rf'{_NUMBER} km')[0],
+            difference=_parse_legacy_value(data['difference'], rf'{_NUMBER} km')[0],
+            daily_average_so_far=_parse_legacy_value(data['daily average so far'], rf'{_NUMBER} km/day')[0],
+            daily_average_from_now=_parse_legacy_value(data['daily average from now'], rf'{_NUMBER} km/day')[0],
+        )
+    except KeyError as error:
+        raise ValueError(f'legacy summary is missing {error}') from error
+
+
+def _parse_legacy_value(text: str, pattern: str) -> Tuple:
+    """
+    Extracts the numbers of a formatted summary value, keeping integers as int.
+
+    Args:
+        text (str): The formatted value.
+        pattern (str): Regular expression matching the whole value, one group per number.
+
+    Returns:
+        Tuple: The numbers in the order of the groups.
+
+    Raises:
+        ValueError: If the value does not match the pattern.
+    """
+    match = re.fullmatch(pattern, text)
+    if match is None:
+        raise ValueError(f'unexpected summary value: {text!r}')
+    return tuple(int(number) if number.lstrip('-').isdigit() else float(number) for number in match.groups())
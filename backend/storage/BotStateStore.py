@@ -0,0 +1,122 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+
+from Bot import Bot
+from datastructures.ChatModels import ChatSession, Message, User
+from datastructures.StoredChat import StoredChat
+
+
+class BotStateStore(ABC):
+    """
+    Storage for the chats and the state of their bots, addressed by chat IDs.
+
+    Chat IDs are allocated by the store, so every process sharing a store hands out unique
+    IDs and can continue any chat. The version of a chat is its number of stored messages,
+    messages are only appended if the caller knows the current version. Implementations must
+    be thread-safe.
+
+    Shared stores keep snapshots of the bots and copies of the messages. A store that is not
+    shared lives in the process of its caller and keeps the chat session and the bot of the
+    caller by reference instead: the messages it appends end up in the session of the caller,
+    and load returns the objects the chat was created with.
+
+    Attributes:
+        shared (bool): Whether other processes can change the stored chats.
+    """
+    shared: bool = False
+
+    @property
+    @abstractmethod
+    def store_id(self) -> str:
+        """
+        Random ID of the store, different for every store that can hand out the same chat IDs.
+        """
+
+    @abstractmethod
+    def allocate_id(self) -> int:
+        """
+        Allocates a new, unique chat ID.
+
+        :return: The allocated chat ID.
+        """
+
+    @abstractmethod
+    def create(self, chat_id: int, session: ChatSession, bot: Bot) -> None:
+        """
+        Stores a new chat.
+
+        :param chat_id: ID allocated with allocate_id.
+        :param session: The chat session with the user and the first messages.
+        :param bot: The bot answering in the chat.
+        """
+
+    def append(self, chat_id: int, messages: List[Message], bot: Bot, expected_version: int) -> bool:
+        """
+        Appends messages to a stored chat and replaces the state of its bot, unless the chat
+        has been changed since the expected version.
+
+        :param chat_id: ID of the chat.
+        :param messages: The messages to append.
+        :param bot: The bot after the messages.
+        :param expected_version: The version the messages and the bot state are based on.
+        :return: True if the messages were appended, False if the chat has another version or does not exist.
+        """
+        return self.exchange(chat_id, expected_version, lambda: (messages, bot))
+
+    @abstractmethod
+    def exchange(self, chat_id: int, expected_version: int, respond: Callable[[], Tuple[List[Message], Bot]]) -> bool:
+        """
+        Lets respond create the messages to append to a stored chat and the new state of its bot,
+        and stores them, if the chat has the expected version. Other writers of the chat wait while
+        respond runs, writers of other chats do not, so respond only runs if its result can be
+        stored, and side effects of the bot, like saving a summary, do not happen for a response
+        that is thrown away.
+
+        :param chat_id: ID of the chat.
+        :param expected_version: The version the bot in memory is based on.
+        :param respond: Creates the messages to append and returns them with the bot after them.
+        :return: True if the messages were appended, False if the chat has another version or does
+            not exist, in which case respond has not been called.
+        :raises Exception: Any exception raised by respond, nothing is stored then.
+        """
+
+    @abstractmethod
+    def version(self, chat_id: int) -> Optional[int]:
+        """
+        Retrieves the current version of a stored chat.
+
+        :param chat_id: ID of the chat.
+        :return: The number of stored messages, None if there is no chat with this ID.
+        """
+
+    @abstractmethod
+    def load(self, chat_id: int) -> Optional[StoredChat]:
+        """
+        Loads a stored chat.
+
+        :param chat_id: ID of the chat.
+        :return: The chat, None if there is no chat with this ID.
+        """
+
+    @abstractmethod
+    def active_users(self, idle_seconds: float) -> Dict[int, User]:
+        """
+        Retrieves the users of the chats created or continued recently, by any process sharing the store.
+
+        :param idle_seconds: Time in seconds after its last message a chat no longer counts as active.
+        :return: The users of the active chats by chat ID.
+        """
+
+    @abstractmethod
+    def release(self, chat_id: int) -> None:
+        """
+        Called when a process drops a chat from its memory. Stores that live in the process
+        delete the chat, shared stores keep it so it can be continued later.
+
+        :param chat_id: ID of the dropped chat.
+        """
+
+    def close(self) -> None:
+        """
+        Releases the resources held by the store.
+        """
@@ -0,0 +1,98 @@
+import os
+from typing import Dict, Hashable, List, Set
+
+from storage.SummaryBackend import SummaryBackend
+from utils.Exceptions import SummaryNotFoundException
+from utils.Tracer import traced
+from utils.fs_utils import Paths, saved_summary_ids, read_summary_with_id, write_summary_with_id, \
+    remove_summary_with_id, reserve_summary_id, summary_path_from_id
+
+
+class FileSummaryBackend(SummaryBackend):
+    """
+    Stores every summary as a JSON file in the summary directory.
+
+    IDs are limited to two digits. Once all of them are in use, saving fails until a summary
+    is deleted, saved summaries are never replaced. IDs are reserved with exclusively created reservation files
+    and summaries are replaced atomically, so several processes can share the directory.
+    """
+    max_id = Paths.SUMMARY_MAX_ID
+
+    def __init__(self):
+        """
+        Initializes a FileSummaryBackend, creating the summary directory if necessary.
+        """
+        os.makedirs(Paths.SUMMARY_DIR, exist_ok=True)
+
+    @traced()
+    def ids(self) -> List[int]:
+        """
+        Reads the IDs of all saved summaries from the summary directory.
+
+        :return: List of the saved summary IDs.
+        """
+        return saved_summary_ids()
+
+    @traced(attributes=('id',))
+    def read(self, id: int) -> Dict:
+        """
+        Reads the summary file with the given ID.
+
+        :param id: The ID of the summary.
+        :return: The saved summary data.
+        :raises SummaryNotFoundException: If the summary file does not exist.
+        """
+        try:
+            return read_summary_with_id(id)
+        except FileNotFoundError:
+            raise SummaryNotFoundException(f'no summary with id: {id}')
+
+    @traced(attributes=('id',))
+    def version(self, id: int) -> Hashable:
+        """
+        Retrieves the modification time and size of the summary file with the given ID.
+        Summary files are replaced as a whole, so these change with every write.
+
+        :param id: The ID of the summary.
+        :return: The version of the summary.
+        :raises SummaryNotFoundException: If the summary file does not exist.
+        """
+        try:
+            status = os.stat(summary_path_from_id(id))
+        except FileNotFoundError:
+            raise SummaryNotFoundException(f'no summary with id: {id}')
+        return status.st_mtime_ns, status.st_ino, status.st_size
+
+    @traced()
+    def allocate_id(self, taken_ids: Set[int]) -> int:
+        """
+        Reserves the smallest free ID. The reservation is released when the summary is written.
+
+        :param taken_ids: IDs known to be in use, these are skipped without touching the directory.
+        :return: The allocated ID.
+        :raises IOError: If every ID is in use or reserved by another writer.
+        """
+        return reserve_summary_id(taken_ids)
+
+    @traced(attributes=('id',))
+    def write(self, id: int, data: Dict) -> None:
+        """
+        Writes the summary file with the given ID atomically.
+
+        :param id: The ID of the summary.
+        :param data: The summary data.
+        """
+        write_summary_with_id(id, data)
+
+    @traced(attributes=('id',))
+    def delete(self, id: int) -> None:
+        """
+        Removes the summary file with the given ID.
+
+        :param id: The ID of the summary.
+        :raises SummaryNotFoundException: If the summary file does not exist.
+        """
+        try:
+            remove_summary_with_id(id)
+        except FileNotFoundError:
+            raise SummaryNotFoundException(f'no summary with id: {id}')
@@ -0,0 +1,131 @@
+import itertools
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from Bot import Bot
+from datastructures.ChatModels import ChatSession, Message, User
+from datastructures.StoredChat import StoredChat
+from storage.BotStateStore import BotStateStore
+
+
+class InMemoryBotStateStore(BotStateStore):
+    """
+    Keeps the chats in the memory of the process. Chats do not survive a restart and are
+    only visible to the process that created them.
+
+    The chat sessions and bots are kept by reference, they are the ones the caller works with.
+    Neither the messages are copied nor the bots snapshotted, so a chat takes no memory beyond
+    its session and bot.
+
+    Attributes:
+        __store_id (str): Random ID of the store.
+        __ids (itertools.count): Allocator for chat IDs.
+        __chats (Dict[int, StoredChat]): Stored chats by chat ID.
+        __lock (threading.Lock): Lock guarding the stored chats.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty InMemoryBotStateStore.
+        """
+        self.__store_id = uuid.uuid4().hex
+        self.__ids = itertools.count(1)
+        self.__chats: Dict[int, StoredChat] = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def store_id(self) -> str:
+        """
+        Random ID of the store, new for every process.
+        """
+        return self.__store_id
+
+    def allocate_id(self) -> int:
+        """
+        Allocates a new, unique chat ID.
+
+        :return: The allocated chat ID.
+        """
+        with self.__lock:
+            return next(self.__ids)
+
+    def create(self, chat_id: int, session: ChatSession, bot: Bot) -> None:
+        """
+        Stores a new chat, keeping its session and bot by reference.
+
+        :param chat_id: ID allocated with allocate_id.
+        :param session: The chat session with the user and the first messages.
+        :param bot: The bot answering in the chat.
+        """
+        with self.__lock:
+            self.__chats[chat_id] = StoredChat(session, bot, len(session.messages))
+
+    def exchange(self, chat_id: int, expected_version: int, respond: Callable[[], Tuple[List[Message], Bot]]) -> bool:
+        """
+        Lets respond create the messages to append to a stored chat and the new state of its bot,
+        and appends the messages to the stored session, if the chat has the expected version.
+
+        Only this process changes the chats, so respond runs without holding the lock of the store.
+        The version is checked again before appending, as the chat may have been released meanwhile.
+
+        :param chat_id: ID of the chat.
+        :param expected_version: The version the bot in memory is based on.
+        :param respond: Creates the messages to append and returns them with the bot after them.
+        :return: True if the messages were appended, False if the chat has another version or does
+            not exist, in which case respond has not been called.
+        :raises Exception: Any exception raised by respond, nothing is stored then.
+        """
+        if self.version(chat_id) != expected_version:
+            return False
+        messages, bot = respond()
+        with self.__lock:
+            chat = self.__chats.get(chat_id)
+            if chat is None or chat.version != expected_version:
+                return False
+            chat.session.messages.extend(messages)
+            chat.bot = bot
+            chat.version += len(messages)
+            return True
+
+    def version(self, chat_id: int) -> Optional[int]:
+        """
+        Retrieves the current version of a stored chat.
+
+        :param chat_id: ID of the chat.
+        :return: The number of stored messages, None if there is no chat with this ID.
+        """
+        with self.__lock:
+            chat = self.__chats.get(chat_id)
+            return None if chat is None else chat.version
+
+    def load(self, chat_id: int) -> Optional[StoredChat]:
+        """
+        Loads a stored chat, with the session and bot it was created with.
+
+        :param chat_id: ID of the chat.
+        :return: The chat, None if there is no chat with this ID.
+        """
+        with self.__lock:
+            chat = self.__chats.get(chat_id)
+            return None if chat is None else StoredChat(chat.session, chat.bot, chat.version)
+
+    def active_users(self, idle_seconds: float) -> Dict[int, User]:
+        """
+        Retrieves the users of all stored chats. Chats are released when they expire in the
+        session store of this process, so every stored chat is active.
+
+        :param idle_seconds: Ignored, expired chats are not stored.
+        :return: The users of the stored chats by chat ID.
+        """
+        with self.__lock:
+            return {chat_id: chat.session.user for chat_id, chat in self.__chats.items()}
+
+    def release(self, chat_id: int) -> None:
+        """
+        Deletes a chat dropped from memory, as nobody can continue it anymore.
+
+        :param chat_id: ID of the dropped chat.
+        """
+        with self.__lock:
+            self.__chats.pop(chat_id, None)
@@ -0,0 +1,195 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from Bot import Bot
+from datastructures.ChatModels import ChatSession, SessionStats
+
+
+class ChatEntry:
+    """
+    Holds everything belonging to one chat: the chat session, its bot and the lock
+    serializing the messages sent to this chat.
+
+    Attributes:
+        session (ChatSession): The chat session with the user and the message history.
+        bot (Bot): The bot answering in this chat.
+        lock (asyncio.Lock): Lock that has to be held while the chat or its bot is modified.
+        last_access (float): Monotonic time of the last access to this chat.
+        version (int): Version of the chat in the bot state store this entry is based on.
+    """
+    __slots__ = ('session', 'bot', 'lock', 'last_access', 'version')
+
+    def __init__(self, session: ChatSession, bot: Bot, version: int):
+        """
+        Initializes a ChatEntry for the given chat session and bot.
+
+        :param session: The chat session.
+        :param bot: The bot answering in the chat session.
+        :param version: Version of the chat in the bot state store.
+        """
+        self.session = session
+        self.bot = bot
+        self.lock = asyncio.Lock()
+        self.last_access = time.monotonic()
+        self.version = version
+
+
+class SessionStore:
+    """
+    Bounded in-memory cache for chat entries with one lock per chat.
+
+    Chats that have not been accessed for longer than the idle TTL expire, and if the
+    store is full, the least recently used chat is evicted. Expired chats are removed
+    lazily on access and by a periodic sweep.
+
+    All methods are meant to be called from the event loop. They never await, so each
+    call is atomic with respect to other coroutines and unrelated chats never wait for
+    each other. Work on a single chat is serialized by the lock of its entry.
+
+    Attributes:
+        __entries (OrderedDict[int, ChatEntry]): Chat entries by chat ID, least recently used first.
+        __ttl_seconds (float): Idle time after which a chat expires.
+        __max_sessions (int): Maximum number of stored chats.
+        __evicted_expired (int): Number of chats removed because they expired.
+        __evicted_lru (int): Number of chats removed because the store was full.
+        __on_evict (Callable[[int], None]): Called with the chat ID of every removed chat.
+    """
+
+    def __init__(self, ttl_seconds: float, max_sessions: int, on_evict: Callable[[int], None] = lambda chat_id: None):
+        """
+        Initializes an empty SessionStore.
+
+        :param ttl_seconds: Idle time in seconds after which a chat expires.
+        :param max_sessions: Maximum number of chats kept in memory.
+        :param on_evict: Called with the chat ID of every chat removed from the store.
+        """
+        self.__entries: OrderedDict[int, ChatEntry] = OrderedDict()
+        self.__ttl_seconds = ttl_seconds
+        self.__max_sessions = max_sessions
+        self.__evicted_expired = 0
+        self.__evicted_lru = 0
+        self.__on_evict = on_evict
+
+    def add(self, chat_id: int, session: ChatSession, bot: Bot, version: int) -> ChatEntry:
+        """
+        Stores a chat session and its bot under the given chat ID, evicting the least
+        recently used chat if the store is full.
+
+        :param chat_id: ID of the chat.
+        :param session: The chat session to store.
+        :param bot: The bot answering in the chat session.
+        :param version: Version of the chat in the bot state store.
+        :return: The stored chat entry.
+        """
+        entry = ChatEntry(session, bot, version)
+        self.__entries[chat_id] = entry
+        while len(self.__entries) > self.__max_sessions:
+            if not self.__evict_least_recently_used(keep=chat_id):
+                break
+        return entry
+
+    def get(self, chat_id: int) -> Optional[ChatEntry]:
+        """
+        Retrieves the chat entry with the given chat ID and marks it as recently used.
+
+        :param chat_id: ID of the chat.
+        :return: The chat entry, None if there is no chat with this ID or it has expired.
+        """
+        entry = self.__entries.get(chat_id)
+        if entry is None:
+            return None
+
+        now = time.monotonic()
+        if self.__is_expired(entry, now) and not entry.lock.locked():
+            self.__remove(chat_id)
+            self.__evicted_expired += 1
+            return None
+
+        entry.last_access = now
+        self.__entries.move_to_end(chat_id)
+        return entry
+
+    def sessions(self) -> List[ChatSession]:
+        """
+        Retrieves all stored chat sessions.
+
+        :return: List of the stored chat sessions.
+        """
+        return [entry.session for entry in self.__entries.values()]
+
+    def sweep(self) -> int:
+        """
+        Removes all expired chats. Chats that are currently locked are kept.
+
+        :return: Number of removed chats.
+        """
+        now = time.monotonic()
+        removed = 0
+        for chat_id, entry in list(self.__entries.items()):
+            if not self.__is_expired(entry, now):
+                break
+            if entry.lock.locked():
+                continue
+            self.__remove(chat_id)
+            removed += 1
+        self.__evicted_expired += removed
+        return removed
+
+    async def run_sweeper(self, interval_seconds: float) -> None:
+        """
+        Sweeps expired chats periodically until the task is cancelled.
+
+        :param interval_seconds: Time in seconds between two sweeps.
+        """
+        while True:
+            await asyncio.sleep(interval_seconds)
+            self.sweep()
+
+    def stats(self) -> SessionStats:
+        """
+        Retrieves the size, limits and eviction counters of the store.
+
+        :return: Statistics of the store.
+        """
+        return SessionStats(
+            sessions=len(self.__entries),
+            max_sessions=self.__max_sessions,
+            ttl_seconds=self.__ttl_seconds,
+            evicted_expired=self.__evicted_expired,
+            evicted_lru=self.__evicted_lru,
+        )
+
+    def __is_expired(self, entry: ChatEntry, now: float) -> bool:
+        """
+        Checks whether a chat has been idle for longer than the TTL.
+
+        :param entry: The chat entry to check.
+        :param now: Current monotonic time.
+        :return: True if the chat has expired, False otherwise.
+        """
+        return now - entry.last_access > self.__ttl_seconds
+
+    def __evict_least_recently_used(self, keep: int) -> bool:
+        """
+        Removes the least recently used chat that is not locked.
+
+        :param keep: ID of a chat that must not be removed.
+        :return: True if a chat was removed, False if no other chat can be removed.
+        """
+        for chat_id, entry in self.__entries.items():
+            if chat_id != keep and not entry.lock.locked():
+                self.__remove(chat_id)
+                self.__evicted_lru += 1
+                return True
+        return False
+
+    def __remove(self, chat_id: int) -> None:
+        """
+        Removes a chat from the store and reports it to the eviction callback.
+
+        :param chat_id: ID of the chat to remove.
+        """
+        del self.__entries[chat_id]
+        self.__on_evict(chat_id)
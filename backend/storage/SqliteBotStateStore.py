@@ -0,0 +1,270 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from Bot import Bot
+from datastructures.ChatModels import ChatSession, Message, User
+from datastructures.StoredChat import StoredChat
+from storage.BotStateStore import BotStateStore
+from utils.Tracer import traced
+
+
+class SqliteBotStateStore(BotStateStore):
+    """
+    Stores the chats in a SQLite database in WAL mode, shared by all processes using the same file.
+
+    The chats table holds the user and the bot state of every chat, with the chat ID as integer
+    primary key, and the messages table holds the messages by chat ID and position. An allocated
+    chat ID is reserved by a row without user, which is filled in when the chat is created.
+    Chats are kept when a process drops them, so they survive restarts. The time of the last
+    change of a chat tells all processes which users are active.
+
+    While a bot responds, its chat is leased to the responding process by a token and an expiry
+    time in the chats row. The lease is the lock of a single chat across all processes: other
+    chats are never blocked, and no transaction is open while the bot responds.
+
+    Attributes:
+        __connection (sqlite3.Connection): Connection to the database, in autocommit mode.
+        __lock (threading.Lock): Lock serializing the use of the connection, held for single statements
+            and short transactions only.
+        __lease_seconds (float): Time a chat stays leased to a responding bot at most.
+        __store_id (str): Random ID of the database, created with it.
+    """
+    shared = True
+
+    __LEASE_POLL_SECONDS = 0.01
+
+    def __init__(self, path: str, lease_seconds: float = 30):
+        """
+        Initializes a SqliteBotStateStore, creating the database and its tables if necessary.
+
+        :param path: Path of the database file.
+        :param lease_seconds: Time a chat stays leased to a responding bot at most, responses taking
+            longer are discarded if another process has taken the chat over meanwhile.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.__connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.__lock = threading.Lock()
+        self.__lease_seconds = lease_seconds
+        with self.__lock:
+            self.__connection.execute('PRAGMA journal_mode=WAL')
+            self.__connection.execute('PRAGMA synchronous=NORMAL')
+            self.__connection.execute('PRAGMA busy_timeout=5000')
+            self.__connection.execute(
+                'CREATE TABLE IF NOT EXISTS chats ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, user TEXT, bot_state TEXT, '
+                'message_count INTEGER NOT NULL DEFAULT 0, last_active REAL NOT NULL DEFAULT 0, '
+                'lease TEXT, lease_until REAL NOT NULL DEFAULT 0)'
+            )
+            columns = [row[1] for row in self.__connection.execute('PRAGMA table_info(chats)')]
+            if 'last_active' not in columns:
+                self.__connection.execute('ALTER TABLE chats ADD COLUMN last_active REAL NOT NULL DEFAULT 0')
+            if 'lease' not in columns:
+                self.__connection.execute('ALTER TABLE chats ADD COLUMN lease TEXT')
+                self.__connection.execute('ALTER TABLE chats ADD COLUMN lease_until REAL NOT NULL DEFAULT 0')
+            self.__connection.execute('CREATE INDEX IF NOT EXISTS chats_last_active ON chats (last_active)')
+            self.__connection.execute(
+                'CREATE TABLE IF NOT EXISTS messages ('
+                'chat_id INTEGER NOT NULL, position INTEGER NOT NULL, data TEXT NOT NULL, '
+                'PRIMARY KEY (chat_id, position)) WITHOUT ROWID'
+            )
+            self.__connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            self.__connection.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('store_id', ?)", (uuid.uuid4().hex,)
+            )
+            self.__store_id = self.__connection.execute("SELECT value FROM meta WHERE key = 'store_id'").fetchone()[0]
+
+    @property
+    def store_id(self) -> str:
+        """
+        Random ID of the database, the same for every process using it.
+        """
+        return self.__store_id
+
+    def allocate_id(self) -> int:
+        """
+        Reserves a new chat ID by inserting a row without user.
+
+        :return: The allocated chat ID.
+        """
+        with self.__lock:
+            return self.__connection.execute('INSERT INTO chats (user) VALUES (NULL)').lastrowid
+
+    @traced(attributes=('chat_id',))
+    def create(self, chat_id: int, session: ChatSession, bot: Bot) -> None:
+        """
+        Stores a new chat with a snapshot of its bot in a single transaction.
+
+        :param chat_id: ID allocated with allocate_id.
+        :param session: The chat session with the user and the first messages.
+        :param bot: The bot answering in the chat.
+        """
+        rows = [(chat_id, position, message.model_dump_json()) for position, message in enumerate(session.messages)]
+        with self.__lock:
+            with self.__transaction(immediate=True):
+                self.__connection.execute(
+                    'INSERT INTO chats (id, user, bot_state, message_count, last_active) VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT (id) DO UPDATE SET user = excluded.user, bot_state = excluded.bot_state, '
+                    'message_count = excluded.message_count, last_active = excluded.last_active',
+                    (chat_id, session.user.model_dump_json(), json.dumps(bot.snapshot()), len(rows), time.time())
+                )
+                self.__connection.execute('DELETE FROM messages WHERE chat_id = ?', (chat_id,))
+                self.__connection.executemany('INSERT INTO messages (chat_id, position, data) VALUES (?, ?, ?)', rows)
+
+    @traced(attributes=('chat_id',))
+    def exchange(self, chat_id: int, expected_version: int, respond: Callable[[], Tuple[List[Message], Bot]]) -> bool:
+        """
+        Lets respond create the messages to append to a stored chat and the new state of its bot,
+        and stores them, if the chat has the expected version.
+
+        The chat is leased with a single statement that also compares the version, waiting while
+        another process holds the lease. Respond runs without any lock or transaction, and its
+        result is committed in a short transaction, compared against the version and the lease
+        again, so a response outliving its lease is discarded instead of overwriting the chat.
+
+        :param chat_id: ID of the chat.
+        :param expected_version: The version the bot in memory is based on.
+        :param respond: Creates the messages to append and returns them with the bot after them.
+        :return: True if the messages were appended, False if the chat has another version or does
+            not exist, in which case respond has not been called, or if the lease expired and another
+            process changed the chat meanwhile.
+        :raises Exception: Any exception raised by respond, nothing is stored and the lease is released then.
+        """
+        lease = uuid.uuid4().hex
+        if not self.__acquire_lease(chat_id, expected_version, lease):
+            return False
+        try:
+            messages, bot = respond()
+            bot_state = json.dumps(bot.snapshot())
+        except BaseException:
+            with self.__lock:
+                self.__connection.execute(
+                    'UPDATE chats SET lease = NULL, lease_until = 0 WHERE id = ? AND lease = ?', (chat_id, lease)
+                )
+            raise
+
+        rows = [
+            (chat_id, expected_version + offset, message.model_dump_json())
+            for offset, message in enumerate(messages)
+        ]
+        with self.__lock:
+            with self.__transaction(immediate=True):
+                updated = self.__connection.execute(
+                    'UPDATE chats SET bot_state = ?, message_count = ?, last_active = ?, lease = NULL, lease_until = 0 '
+                    'WHERE id = ? AND message_count = ? AND lease = ?',
+                    (bot_state, expected_version + len(messages), time.time(), chat_id, expected_version, lease)
+                ).rowcount
+                if not updated:
+                    return False
+                self.__connection.executemany('INSERT INTO messages (chat_id, position, data) VALUES (?, ?, ?)', rows)
+        return True
+
+    @traced(attributes=('chat_id',))
+    def version(self, chat_id: int) -> Optional[int]:
+        """
+        Retrieves the current version of a stored chat.
+
+        :param chat_id: ID of the chat.
+        :return: The number of stored messages, None if there is no chat with this ID.
+        """
+        with self.__lock:
+            row = self.__connection.execute(
+                'SELECT message_count FROM chats WHERE id = ? AND user IS NOT NULL', (chat_id,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    @traced(attributes=('chat_id',))
+    def load(self, chat_id: int) -> Optional[StoredChat]:
+        """
+        Loads a stored chat with all of its messages, restoring its bot from the snapshot.
+
+        :param chat_id: ID of the chat.
+        :return: The chat, None if there is no chat with this ID or it has only been allocated.
+        :raises NoMatchingStateException: If the snapshot of the bot contains an unknown state.
+        """
+        with self.__lock:
+            with self.__transaction():
+                row = self.__connection.execute(
+                    'SELECT user, bot_state, message_count FROM chats WHERE id = ? AND user IS NOT NULL', (chat_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                message_rows = self.__connection.execute(
+                    'SELECT data FROM messages WHERE chat_id = ? ORDER BY position', (chat_id,)
+                ).fetchall()
+        user, bot_state, message_count = row
+        session = ChatSession(
+            user=User.model_validate_json(user),
+            messages=[Message.model_validate_json(data) for data, in message_rows],
+        )
+        return StoredChat(session, Bot.restore(json.loads(bot_state)), message_count)
+
+    def active_users(self, idle_seconds: float) -> Dict[int, User]:
+        """
+        Retrieves the users of the chats created or continued within the idle time, by any process.
+
+        :param idle_seconds: Time in seconds after its last message a chat no longer counts as active.
+        :return: The users of the active chats by chat ID.
+        """
+        with self.__lock:
+            rows = self.__connection.execute(
+                'SELECT id, user FROM chats WHERE last_active > ? AND user IS NOT NULL', (time.time() - idle_seconds,)
+            ).fetchall()
+        return {chat_id: User.model_validate_json(user) for chat_id, user in rows}
+
+    def release(self, chat_id: int) -> None:
+        """
+        Keeps a chat dropped from memory, so any process can continue it.
+
+        :param chat_id: ID of the dropped chat.
+        """
+
+    def close(self) -> None:
+        """
+        Closes the connection to the database.
+        """
+        with self.__lock:
+            self.__connection.close()
+
+    def __acquire_lease(self, chat_id: int, expected_version: int, lease: str) -> bool:
+        """
+        Leases a chat for responding to a message, if it has the expected version. While another
+        process holds an unexpired lease, the lease is polled without holding the lock.
+
+        :param chat_id: ID of the chat.
+        :param expected_version: The version the response will be based on.
+        :param lease: Random token identifying the lease.
+        :return: True if the chat is leased, False if it has another version or does not exist.
+        """
+        while True:
+            now = time.time()
+            with self.__lock:
+                leased = self.__connection.execute(
+                    'UPDATE chats SET lease = ?, lease_until = ? '
+                    'WHERE id = ? AND user IS NOT NULL AND message_count = ? AND lease_until <= ?',
+                    (lease, now + self.__lease_seconds, chat_id, expected_version, now)
+                ).rowcount
+                if leased:
+                    return True
+                row = self.__connection.execute(
+                    'SELECT message_count FROM chats WHERE id = ? AND user IS NOT NULL', (chat_id,)
+                ).fetchone()
+            if row is None or row[0] != expected_version:
+                return False
+            time.sleep(self.__LEASE_POLL_SECONDS)
+
+    def __transaction(self, immediate: bool = False) -> sqlite3.Connection:
+        """
+        Starts a transaction that is committed when the returned context exits without an
+        exception and rolled back otherwise. Must be called while holding the lock.
+
+        :param immediate: Take the write lock of the database right away, needed by transactions
+            that read before they write, as other processes may write in between otherwise.
+        :return: Context manager around the transaction.
+        """
+        self.__connection.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        return self.__connection
@@ -0,0 +1,186 @@
+import functools
+import json
+import os
+import sqlite3
+import threading
+from typing import Callable, Dict, Hashable, Iterable, List, Set, Tuple, TypeVar
+
+from storage.SummaryBackend import SummaryBackend
+from utils.Exceptions import SummaryNotFoundException
+from utils.Tracer import traced
+
+F = TypeVar('F', bound=Callable)
+
+
+def raises_io_errors(function: F) -> F:
+    """
+    Decorator raising the errors of the database as IOError, like the file system raises them
+    for the file backend.
+
+    :param function: The function accessing the database.
+    :return: The decorated function.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        try:
+            return function(*args, **kwargs)
+        except sqlite3.Error as error:
+            raise IOError(f'summary database failed: {error}') from error
+
+    return wrapper
+
+
+class SqliteSummaryBackend(SummaryBackend):
+    """
+    Stores the summaries in a SQLite database in WAL mode, with the ID as integer primary key.
+
+    IDs are unbounded and never reused. An allocated ID is reserved by a row without data,
+    which is filled in when the summary is written. Every write increments the version of
+    the row.
+
+    Attributes:
+        __connection (sqlite3.Connection): Connection to the database, in autocommit mode.
+        __lock (threading.Lock): Lock serializing the use of the connection.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes a SqliteSummaryBackend, creating the database and its table if necessary.
+
+        :param path: Path of the database file.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.__connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.__lock = threading.Lock()
+        with self.__lock:
+            self.__connection.execute('PRAGMA journal_mode=WAL')
+            self.__connection.execute('PRAGMA synchronous=NORMAL')
+            self.__connection.execute(
+                'CREATE TABLE IF NOT EXISTS summaries ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT, version INTEGER NOT NULL DEFAULT 0)'
+            )
+            columns = [column[1] for column in self.__connection.execute('PRAGMA table_info(summaries)')]
+            if 'version' not in columns:
+                self.__connection.execute('ALTER TABLE summaries ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+
+    @traced()
+    @raises_io_errors
+    def ids(self) -> List[int]:
+        """
+        Reads the IDs of all written summaries from the database.
+
+        :return: List of the saved summary IDs.
+        :raises IOError: If the database fails.
+        """
+        with self.__lock:
+            rows = self.__connection.execute('SELECT id FROM summaries WHERE data IS NOT NULL').fetchall()
+        return [id for id, in rows]
+
+    @traced(attributes=('id',))
+    @raises_io_errors
+    def read(self, id: int) -> Dict:
+        """
+        Reads the summary with the given ID from the database.
+
+        :param id: The ID of the summary.
+        :return: The saved summary data.
+        :raises SummaryNotFoundException: If the summary does not exist or has not been written yet.
+        :raises IOError: If the database fails.
+        """
+        with self.__lock:
+            row = self.__connection.execute('SELECT data FROM summaries WHERE id = ?', (id,)).fetchone()
+        if row is None or row[0] is None:
+            raise SummaryNotFoundException(f'no summary with id: {id}')
+        return json.loads(row[0])
+
+    @traced(attributes=('id',))
+    @raises_io_errors
+    def version(self, id: int) -> Hashable:
+        """
+        Retrieves the number of times the summary with the given ID has been written.
+
+        :param id: The ID of the summary.
+        :return: The version of the summary.
+        :raises SummaryNotFoundException: If the summary does not exist or has not been written yet.
+        :raises IOError: If the database fails.
+        """
+        with self.__lock:
+            row = self.__connection.execute(
+                'SELECT version FROM summaries WHERE id = ? AND data IS NOT NULL', (id,)
+            ).fetchone()
+        if row is None:
+            raise SummaryNotFoundException(f'no summary with id: {id}')
+        return row[0]
+
+    @traced()
+    @raises_io_errors
+    def allocate_id(self, taken_ids: Set[int]) -> int:
+        """
+        Reserves a new ID by inserting a row without data.
+
+        :param taken_ids: Ignored, the database assigns IDs that were never used before.
+        :return: The allocated ID.
+        :raises IOError: If the database fails.
+        """
+        with self.__lock:
+            return self.__connection.execute('INSERT INTO summaries (data) VALUES (NULL)').lastrowid
+
+    @traced(attributes=('id',))
+    def write(self, id: int, data: Dict) -> None:
+        """
+        Writes the summary with the given ID.
+
+        :param id: The ID of the summary.
+        :param data: The summary data.
+        """
+        self.write_many([(id, data)])
+
+    @traced()
+    @raises_io_errors
+    def write_many(self, summaries: Iterable[Tuple[int, Dict]]) -> None:
+        """
+        Writes several summaries in a single transaction.
+
+        :param summaries: Pairs of summary ID and summary data.
+        :raises IOError: If the database fails.
+        """
+        rows = [(id, json.dumps(data)) for id, data in summaries]
+        with self.__lock:
+            with self.__transaction():
+                self.__connection.executemany(
+                    'INSERT INTO summaries (id, data) VALUES (?, ?) '
+                    'ON CONFLICT (id) DO UPDATE SET data = excluded.data, version = version + 1',
+                    rows
+                )
+
+    @traced(attributes=('id',))
+    @raises_io_errors
+    def delete(self, id: int) -> None:
+        """
+        Deletes the summary with the given ID from the database.
+
+        :param id: The ID of the summary.
+        :raises SummaryNotFoundException: If the summary does not exist.
+        :raises IOError: If the database fails.
+        """
+        with self.__lock:
+            deleted = self.__connection.execute('DELETE FROM summaries WHERE id = ?', (id,)).rowcount
+        if not deleted:
+            raise SummaryNotFoundException(f'no summary with id: {id}')
+
+    def close(self) -> None:
+        """
+        Closes the connection to the database.
+        """
+        with self.__lock:
+            self.__connection.close()
+
+    def __transaction(self) -> sqlite3.Connection:
+        """
+        Starts a transaction that is committed when the returned context exits without an
+        exception and rolled back otherwise. Must be called while holding the lock.
+
+        :return: Context manager around the transaction.
+        """
+        self.__connection.execute('BEGIN')
+        return self.__connection
@@ -0,0 +1,85 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+
+class SummaryBackend(ABC):
+    """
+    Storage for saved summaries, addressed by integer IDs.
+
+    Saving is split into allocating an ID and writing the data, so that IDs can be handed
+    out before the data is written. Implementations must be thread-safe, and raise failures
+    of the storage as IOError, which the bot reports to the user.
+
+    Attributes:
+        max_id (Optional[int]): Highest ID the backend can store, None if IDs are unbounded.
+    """
+    max_id: Optional[int] = None
+
+    @abstractmethod
+    def ids(self) -> List[int]:
+        """
+        Reads the IDs of all saved summaries from the storage.
+
+        :return: List of the saved summary IDs.
+        """
+
+    @abstractmethod
+    def read(self, id: int) -> Dict:
+        """
+        Reads the summary with the given ID.
+
+        :param id: The ID of the summary.
+        :return: The saved summary data.
+        :raises SummaryNotFoundException: If the summary does not exist.
+        """
+
+    @abstractmethod
+    def version(self, id: int) -> Hashable:
+        """
+        Retrieves a token that changes whenever the summary with the given ID is written.
+
+        :param id: The ID of the summary.
+        :return: The version of the summary.
+        :raises SummaryNotFoundException: If the summary does not exist.
+        """
+
+    @abstractmethod
+    def allocate_id(self, taken_ids: Set[int]) -> int:
+        """
+        Allocates the ID for a new summary.
+
+        :param taken_ids: IDs known to be in use.
+        :return: The allocated ID.
+        """
+
+    @abstractmethod
+    def write(self, id: int, data: Dict) -> None:
+        """
+        Writes the summary with the given ID, replacing an existing summary.
+
+        :param id: The ID of the summary.
+        :param data: The summary data.
+        """
+
+    def write_many(self, summaries: Iterable[Tuple[int, Dict]]) -> None:
+        """
+        Writes several summaries. Backends override this to write them in one batch.
+
+        :param summaries: Pairs of summary ID and summary data.
+        """
+        for id, data in summaries:
+            self.write(id, data)
+
+    @abstractmethod
+    def delete(self, id: int) -> None:
+        """
+        Deletes the summary with the given ID.
+
+        :param id: The ID of the summary.
+        :raises SummaryNotFoundException: If the summary does not exist.
+        """
+
+    def close(self) -> None:
+        """
+        Releases the resources held by the backend.
+        """
@@ -0,0 +1,346 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Set, Tuple
+
+from datastructures.SummaryRecord import SummaryRecord
+
+from storage.FileSummaryBackend import FileSummaryBackend
+from storage.SqliteSummaryBackend import SqliteSummaryBackend
+from storage.SummaryBackend import SummaryBackend
+from storage.SummaryWriteQueue import SummaryWriteQueue
+from utils.Exceptions import SummaryNotFoundException
+from utils.LruCache import LruCache
+from utils.MetricsRegistry import get_metrics_registry
+from utils.Tracer import traced
+from utils.config_utils import Config
+from utils.fs_utils import Paths
+
+_registry = get_metrics_registry()
+_saves = _registry.counter('leasebot_summary_saves_total', 'Saved summaries').labels()
+_loads = _registry.counter(
+    'leasebot_summary_loads_total', 'Loaded summaries, by whether the rendered text was cached', ('cache',)
+)
+_CACHED_LOADS = _loads.labels('hit')
+_UNCACHED_LOADS = _loads.labels('miss')
+
+
+class SummaryRepository:
+    """
+    Access to the saved summaries with an in-memory index of their IDs.
+
+    The summaries are kept by a pluggable SummaryBackend. The index is built once from the
+    backend and kept up to date on every save and delete, so looking up the saved summaries
+    never touches the storage. All methods are thread-safe.
+
+    If other processes save to the same backend, the index can be given a time to live. It is
+    then rebuilt when it is older, and IDs missing in the index are looked up in the backend.
+
+    With a write queue, a saved summary gets its ID right away and is written in the background.
+    Until then it is read from the queue.
+
+    Attributes:
+        __backend (SummaryBackend): Storage holding the summaries.
+        __ids (Set[int]): IDs of the saved summaries.
+        __lock (threading.Lock): Lock guarding the index and the allocation of new IDs. The data
+            itself is written without holding it, the backend keeps allocated IDs reserved.
+        __rendered (LruCache[Tuple[Hashable, str]]): Rendered summaries with the version they were
+            rendered from, by summary ID.
+        __index_ttl_seconds (float): Age after which the index is rebuilt, 0 if it never is.
+        __index_built_at (float): Monotonic time the index was last built.
+        __write_queue (Optional[SummaryWriteQueue]): Queue writing saved summaries to the backend,
+            None if they are written while saving.
+    """
+
+    def __init__(self, backend: SummaryBackend, rendered_cache_size: int = 0, index_ttl_seconds: float = 0,
+                 write_queue: Optional[SummaryWriteQueue] = None):
+        """
+        Initializes a SummaryRepository and builds the index from the backend.
+
+        :param backend: Storage holding the summaries.
+        :param rendered_cache_size: Maximum number of rendered summaries to cache.
+        :param index_ttl_seconds: Age in seconds after which the index is rebuilt, 0 if only this
+            repository saves to the backend.
+        :param write_queue: Queue writing to the backend, None to write while saving.
+        """
+        self.__backend = backend
+        self.__write_queue = write_queue
+        self.__ids: Set[int] = set()
+        self.__lock = threading.Lock()
+        self.__rendered: LruCache[Tuple[Hashable, str]] = LruCache(rendered_cache_size)
+        self.__index_ttl_seconds = index_ttl_seconds
+        self.__index_built_at = 0.0
+        self.rebuild_index()
+
+    @property
+    def max_id(self) -> Optional[int]:
+        """
+        Highest ID a summary can have, None if IDs are unbounded.
+        """
+        return self.__backend.max_id
+
+    def rebuild_index(self) -> None:
+        """
+        Rebuilds the index from the backend.
+        """
+        built_at = time.monotonic()
+        ids = set(self.__backend.ids())
+        if self.__write_queue is not None:
+            ids.update(self.__write_queue.ids())
+        with self.__lock:
+            self.__ids = ids
+            self.__index_built_at = built_at
+
+    def ids(self) -> List[int]:
+        """
+        Retrieves the IDs of all saved summaries.
+
+        :return: Sorted list of the saved summary IDs.
+        """
+        self.__rebuild_index_if_expired()
+        with self.__lock:
+            return sorted(self.__ids)
+
+    def has_summaries(self) -> bool:
+        """
+        Checks whether any summary is saved.
+
+        :return: True if at least one summary is saved, False otherwise.
+        """
+        self.__rebuild_index_if_expired()
+        return bool(self.__ids)
+
+    def contains(self, id: int) -> bool:
+        """
+        Checks whether a summary with the given ID is saved.
+
+        :param id: The ID of the summary.
+        :return: True if the summary is saved, False otherwise.
+        """
+        if id in self.__ids:
+            return True
+        if not self.__index_ttl_seconds:
+            return False
+        try:
+            self.__version(id)
+        except SummaryNotFoundException:
+            return False
+        with self.__lock:
+            self.__ids.add(id)
+        return True
+
+    def read(self, id: int) -> Dict:
+        """
+        Reads the summary with the given ID.
+
+        :param id: The ID of the summary.
+        :return: The saved summary data.
+        :raises SummaryNotFoundException: If the summary does not exist.
+        """
+        if self.__write_queue is not None:
+            data = self.__write_queue.get(id)
+            if data is not None:
+                return data
+        return self.__backend.read(id)
+
+    def read_record(self, id: int) -> SummaryRecord:
+        """
+        Reads the summary with the given ID as a numeric record.
+
+        :param id: The ID of the summary.
+        :return: The saved summary, legacy text summaries are parsed.
+        :raises SummaryNotFoundException: If the summary does not exist.
+        :raises ValueError: If the saved data is not a valid summary.
+        """
+        return SummaryRecord.from_json_data(self.read(id))
+
+    def records(self) -> Iterator[Tuple[int, SummaryRecord]]:
+        """
+        Reads all saved summaries as numeric records, for example to aggregate over them.
+
+        :return: Iterator over the IDs and records, in the order of the IDs.
+        """
+        for id in self.ids():
+            try:
+                yield id, self.read_record(id)
+            except SummaryNotFoundException:
+                continue
+
+    @traced(attributes=('id',))
+    def read_rendered(self, id: int, render: Callable[[Dict], str]) -> str:
+        """
+        Reads the summary with the given ID and renders it, reusing the cached text as long as
+        the summary has not been written since it was rendered.
+
+        :param id: The ID of the summary.
+        :param render: Renders summary data to text, must be the same for all calls.
+        :return: The rendered summary.
+        :raises SummaryNotFoundException: If the summary does not exist.
+        """
+        version = self.__version(id)
+        cached = self.__rendered.get(id)
+        if cached is not None and cached[0] == version:
+            _CACHED_LOADS.inc()
+            return cached[1]
+
+        _UNCACHED_LOADS.inc()
+        rendered = render(self.read(id))
+        self.__rendered.put(id, (version, rendered))
+        return rendered
+
+    @traced()
+    def save(self, data: Dict) -> int:
+        """
+        Saves the data as a new summary. With a write queue, the summary is only queued.
+
+        :param data: The summary data to save.
+        :return: The ID assigned to the saved summary.
+        """
+        with self.__lock:
+            id = self.__backend.allocate_id(self.__ids)
+        self.__rendered.discard(id)
+        if self.__write_queue is None:
+            self.__backend.write(id, data)
+        else:
+            self.__write_queue.put(id, data)
+        with self.__lock:
+            self.__ids.add(id)
+        _saves.inc()
+        return id
+
+    def delete(self, id: int) -> None:
+        """
+        Deletes the summary with the given ID. If the summary is being written by the write
+        queue, the write is committed first, so it cannot bring the summary back.
+
+        The lock is only held to update the index, saves do not wait for the deletion. The ID
+        stays in the index until the summary is deleted, so it is not allocated again meanwhile.
+
+        :param id: The ID of the summary.
+        :raises SummaryNotFoundException: If the summary does not exist.
+        """
+        try:
+            was_pending = self.__write_queue is not None and self.__write_queue.discard(id)
+            try:
+                self.__backend.delete(id)
+            except SummaryNotFoundException:
+                if not was_pending:
+                    raise
+        finally:
+            with self.__lock:
+                self.__ids.discard(id)
+                self.__rendered.discard(id)
+
+    def flush(self) -> None:
+        """
+        Writes the summaries waiting in the write queue.
+        """
+        if self.__write_queue is not None:
+            self.__write_queue.flush()
+
+    def close(self) -> None:
+        """
+        Writes the summaries waiting in the write queue and releases the resources held by the backend.
+        """
+        if self.__write_queue is not None:
+            self.__write_queue.close()
+        self.__backend.close()
+
+    def __version(self, id: int) -> Hashable:
+        """
+        Retrieves the version of a summary, taking the writes waiting in the write queue into account.
+
+        :param id: The ID of the summary.
+        :return: The version of the summary.
+        :raises SummaryNotFoundException: If the summary does not exist.
+        """
+        if self.__write_queue is not None:
+            version = self.__write_queue.version(id)
+            if version is not None:
+                return version
+        return self.__backend.version(id)
+
+    def __rebuild_index_if_expired(self) -> None:
+        """
+        Rebuilds the index if it has a time to live and is older.
+        """
+        if self.__index_ttl_seconds and time.monotonic() - self.__index_built_at > self.__index_ttl_seconds:
+            self.rebuild_index()
+
+
+_repository: Optional[SummaryRepository] = None
+_repository_lock = threading.Lock()
+
+
+def create_summary_backend() -> SummaryBackend:
+    """
+    Create the summary backend selected by the configuration.
+
+    When the SQLite database is created, the summary files saved before are copied into it, so
+    switching from the file backend keeps the saved summaries and their IDs.
+
+    :return: A FileSummaryBackend for 'file', a SqliteSummaryBackend for 'sqlite'.
+    :raises ValueError: If the configured backend is unknown.
+    """
+    match Config.SUMMARY_BACKEND:
+        case 'file':
+            return FileSummaryBackend()
+        case 'sqlite':
+            created = not os.path.exists(Config.SUMMARY_DATABASE)
+            backend = SqliteSummaryBackend(Config.SUMMARY_DATABASE)
+            if created and os.path.isdir(Paths.SUMMARY_DIR):
+                copy_summaries(FileSummaryBackend(), backend)
+            return backend
+        case _:
+            raise ValueError(f'unknown summary backend: {Config.SUMMARY_BACKEND}')
+
+
+def copy_summaries(source: SummaryBackend, target: SummaryBackend) -> int:
+    """
+    Copy all summaries of one backend into another, keeping their IDs. Legacy summaries of
+    formatted text are converted to records on the way.
+
+    :param source: Storage the summaries are read from.
+    :param target: Storage the summaries are written to.
+    :return: Number of copied summaries.
+    """
+    summaries = [(id, SummaryRecord.from_json_data(source.read(id)).to_json_data()) for id in sorted(source.ids())]
+    target.write_many(summaries)
+    return len(summaries)
+
+
+def create_summary_write_queue(backend: SummaryBackend) -> Optional[SummaryWriteQueue]:
+    """
+    Create the write queue selected by the configuration.
+
+    :param backend: Storage the queue writes to.
+    :return: None for 'direct', a queue returning after the commit of the batch for 'group' and
+        a queue returning right away for 'behind'.
+    :raises ValueError: If the configured write mode is unknown.
+    """
+    match Config.SUMMARY_WRITE_MODE:
+        case 'direct':
+            return None
+        case 'group' | 'behind':
+            return SummaryWriteQueue(backend, Config.SUMMARY_FLUSH_INTERVAL_SECONDS, Config.SUMMARY_FLUSH_BATCH_SIZE,
+                                     wait_for_commit=Config.SUMMARY_WRITE_MODE == 'group')
+        case _:
+            raise ValueError(f'unknown summary write mode: {Config.SUMMARY_WRITE_MODE}')
+
+
+def get_summary_repository() -> SummaryRepository:
+    """
+    Return the process-wide summary repository, building its index on first use.
+
+    :return: The shared summary repository.
+    """
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                backend = create_summary_backend()
+                _repository = SummaryRepository(
+                    backend, Config.RENDERED_SUMMARY_CACHE_SIZE, Config.SUMMARY_INDEX_TTL_SECONDS,
+                    create_summary_write_queue(backend)
+                )
+    return _repository
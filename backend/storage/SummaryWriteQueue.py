@@ -0,0 +1,255 @@
+import atexit
+import itertools
+import logging
+import threading
+from typing import Dict, Hashable, List, Optional
+
+from storage.SummaryBackend import SummaryBackend
+from utils.MetricsRegistry import get_metrics_registry
+
+_registry = get_metrics_registry()
+_pending_writes = _registry.gauge('leasebot_summary_pending_writes', 'Summaries not written to the backend yet')
+_batch_sizes = _registry.histogram(
+    'leasebot_summary_write_batch_size', 'Number of summaries written in one batch',
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+).labels()
+_failed_batches = _registry.counter(
+    'leasebot_summary_write_failures_total', 'Batches of summaries that could not be written'
+).labels()
+
+
+class PendingWrite:
+    """
+    A summary waiting to be written by a SummaryWriteQueue.
+
+    Attributes:
+        data (Dict): The summary data.
+        sequence (int): Number of the write, increasing with every queued summary.
+        committed (threading.Event): Set once the write has been committed or has failed for good.
+        error (Optional[Exception]): The error the write failed with, None if it has not failed.
+    """
+    __slots__ = ('data', 'sequence', 'committed', 'error')
+
+    def __init__(self, data: Dict, sequence: int):
+        """
+        Initializes a PendingWrite.
+
+        :param data: The summary data.
+        :param sequence: Number of the write.
+        """
+        self.data = data
+        self.sequence = sequence
+        self.committed = threading.Event()
+        self.error: Optional[Exception] = None
+
+
+class SummaryWriteQueue:
+    """
+    Write-behind stage in front of a SummaryBackend.
+
+    Summaries are queued and written by a background thread, which collects the summaries
+    queued within the flush interval and writes them with a single write_many, so a backend
+    like SQLite commits them in one transaction. Summaries stay readable from the queue until
+    they are committed.
+
+    If the callers wait for the commit, a failed write is raised to them. Otherwise it is
+    logged and retried after the flush interval, and the summary stays readable meanwhile.
+    All methods are thread-safe.
+
+    Attributes:
+        __backend (SummaryBackend): Storage the summaries are written to.
+        __flush_interval_seconds (float): Time to collect summaries before writing them.
+        __max_batch_size (int): Number of queued summaries that are written without waiting.
+        __wait_for_commit (bool): Whether put returns only after the summary has been committed.
+        __logger (Logger): Logs failed writes.
+        __condition (threading.Condition): Guards the queue and wakes up the writer.
+        __flush_lock (threading.Lock): Serializes the batches, so writes of an ID keep their order.
+        __queued (Dict[int, PendingWrite]): Summaries not taken by a batch yet, by ID.
+        __pending (Dict[int, PendingWrite]): Summaries not committed yet, including the current batch, by ID.
+        __sequence (Iterator[int]): Numbers of the writes.
+        __closed (bool): Whether the queue has been closed.
+        __writer (threading.Thread): The background thread writing the batches.
+    """
+
+    def __init__(self, backend: SummaryBackend, flush_interval_seconds: float, max_batch_size: int,
+                 wait_for_commit: bool = False):
+        """
+        Initializes a SummaryWriteQueue and starts its writer thread.
+
+        :param backend: Storage the summaries are written to.
+        :param flush_interval_seconds: Time to collect summaries before writing them.
+        :param max_batch_size: Number of queued summaries that are written without waiting any longer.
+        :param wait_for_commit: Whether put returns only after the summary has been committed.
+        """
+        self.__backend = backend
+        self.__flush_interval_seconds = flush_interval_seconds
+        self.__max_batch_size = max_batch_size
+        self.__wait_for_commit = wait_for_commit
+        self.__logger = logging.getLogger(__name__)
+        self.__condition = threading.Condition()
+        self.__flush_lock = threading.Lock()
+        self.__queued: Dict[int, PendingWrite] = {}
+        self.__pending: Dict[int, PendingWrite] = {}
+        self.__sequence = itertools.count()
+        self.__closed = False
+        self.__writer = threading.Thread(target=self.__run, name='summary-writer', daemon=True)
+        self.__writer.start()
+        atexit.register(self.close)
+        _pending_writes.labels().set_function(lambda: len(self.__pending))
+
+    def put(self, id: int, data: Dict) -> None:
+        """
+        Queues a summary, replacing a queued summary with the same ID.
+
+        :param id: The allocated ID of the summary.
+        :param data: The summary data.
+        :raises Exception: Any error of the backend, if the queue waits for the commit.
+        :raises RuntimeError: If the queue has been closed.
+        """
+        with self.__condition:
+            if self.__closed:
+                raise RuntimeError('summary write queue is closed')
+            pending = PendingWrite(data, next(self.__sequence))
+            self.__queued[id] = pending
+            self.__pending[id] = pending
+            self.__condition.notify()
+        if self.__wait_for_commit:
+            pending.committed.wait()
+            if pending.error is not None:
+                raise pending.error
+
+    def get(self, id: int) -> Optional[Dict]:
+        """
+        Retrieves a summary that has not been committed yet.
+
+        :param id: The ID of the summary.
+        :return: The summary data, None if no write of the ID is pending.
+        """
+        with self.__condition:
+            pending = self.__pending.get(id)
+        return None if pending is None else pending.data
+
+    def version(self, id: int) -> Optional[Hashable]:
+        """
+        Retrieves a token identifying the pending write of a summary.
+
+        :param id: The ID of the summary.
+        :return: The version of the pending summary, None if no write of the ID is pending.
+        """
+        with self.__condition:
+            pending = self.__pending.get(id)
+        return None if pending is None else ('pending', pending.sequence)
+
+    def ids(self) -> List[int]:
+        """
+        Retrieves the IDs of all summaries that have not been committed yet.
+
+        :return: List of the pending summary IDs.
+        """
+        with self.__condition:
+            return list(self.__pending)
+
+    def discard(self, id: int) -> bool:
+        """
+        Drops the queued summary with the given ID. A summary already taken by a batch is still
+        written, so this waits until that batch has been committed. Afterwards the summary can be
+        deleted from the backend without being written again.
+
+        :param id: The ID of the summary.
+        :return: True if a write of the ID was pending, False otherwise.
+        """
+        with self.__condition:
+            pending = self.__pending.pop(id, None)
+            in_batch = self.__queued.pop(id, None) is None
+        if pending is None:
+            return False
+        if in_batch:
+            # the writer holds the flush lock until the batch is committed
+            self.flush()
+        pending.committed.set()
+        return True
+
+    def flush(self) -> None:
+        """
+        Writes all queued summaries in the calling thread, after the batch the writer is busy with.
+        """
+        self.__write_batch()
+
+    def close(self) -> None:
+        """
+        Writes all queued summaries and stops the writer thread. Further summaries cannot be queued.
+        """
+        with self.__condition:
+            if self.__closed:
+                return
+            self.__closed = True
+            self.__condition.notify()
+        self.__writer.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    def __run(self) -> None:
+        """
+        Writes the queued summaries in batches until the queue is closed. After a failed batch
+        it waits for the flush interval before trying again.
+        """
+        while True:
+            with self.__condition:
+                self.__condition.wait_for(lambda: self.__queued or self.__closed)
+                if self.__closed:
+                    return
+                self.__condition.wait_for(
+                    lambda: len(self.__queued) >= self.__max_batch_size or self.__closed,
+                    timeout=self.__flush_interval_seconds
+                )
+            if not self.__write_batch():
+                with self.__condition:
+                    self.__condition.wait_for(lambda: self.__closed, timeout=self.__flush_interval_seconds)
+
+    def __write_batch(self) -> bool:
+        """
+        Writes all queued summaries with a single write_many. Summaries of a failed batch are
+        queued again unless the callers wait for the commit, those receive the error instead.
+
+        :return: False if the batch failed, True otherwise.
+        """
+        with self.__flush_lock:
+            with self.__condition:
+                batch, self.__queued = self.__queued, {}
+            if not batch:
+                return True
+            _batch_sizes.observe(len(batch))
+            try:
+                self.__backend.write_many([(id, pending.data) for id, pending in batch.items()])
+            except Exception as error:
+                self.__logger.exception(f'writing {len(batch)} summaries failed')
+                _failed_batches.inc()
+                self.__fail_batch(batch, error)
+                return False
+            with self.__condition:
+                for id, pending in batch.items():
+                    if self.__pending.get(id) is pending:
+                        del self.__pending[id]
+            for pending in batch.values():
+                pending.committed.set()
+            return True
+
+    def __fail_batch(self, batch: Dict[int, PendingWrite], error: Exception) -> None:
+        """
+        Handles a batch that could not be written.
+
+        :param batch: The summaries of the batch, by ID.
+        :param error: The error the batch failed with.
+        """
+        with self.__condition:
+            for id, pending in batch.items():
+                if self.__pending.get(id) is not pending:
+                    continue
+                if self.__wait_for_commit:
+                    del self.__pending[id]
+                else:
+                    self.__queued.setdefault(id, pending)
+        if self.__wait_for_commit:
+            for pending in batch.values():
+                pending.error = error
+                pending.committed.set()
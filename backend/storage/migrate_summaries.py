@@ -0,0 +1,59 @@
+import argparse
+
+from datastructures.SummaryRecord import SummaryRecord, is_legacy_summary_data
+from storage.FileSummaryBackend import FileSummaryBackend
+from storage.SqliteSummaryBackend import SqliteSummaryBackend
+from storage.SummaryBackend import SummaryBackend
+from storage.SummaryRepository import copy_summaries, create_summary_backend
+from utils.config_utils import Config
+
+
+def copy_file_summaries_to_sqlite(database_path: str) -> int:
+    """
+    Copy all summaries of the summary directory into a SQLite database, keeping their IDs.
+    Legacy summaries of formatted text are converted to records on the way.
+
+    :param database_path: Path of the SQLite database.
+    :return: Number of copied summaries.
+    """
+    target = SqliteSummaryBackend(database_path)
+    try:
+        return copy_summaries(FileSummaryBackend(), target)
+    finally:
+        target.close()
+
+
+def upgrade_legacy_summaries(backend: SummaryBackend) -> int:
+    """
+    Rewrite the summaries saved as formatted text as numeric records, keeping their IDs.
+
+    :param backend: Storage holding the summaries.
+    :return: Number of upgraded summaries.
+    """
+    summaries = []
+    for id in sorted(backend.ids()):
+        data = backend.read(id)
+        if is_legacy_summary_data(data):
+            summaries.append((id, SummaryRecord.from_json_data(data).to_json_data()))
+    backend.write_many(summaries)
+    return len(summaries)
+
+
+# run from the backend directory: python -m storage.migrate_summaries
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Copy the saved summary files into the SQLite summary database.')
+    parser.add_argument('--database', default=Config.SUMMARY_DATABASE, help='path of the SQLite database')
+    parser.add_argument('--upgrade', action='store_true',
+                        help='rewrite legacy text summaries of the configured backend as records instead of copying')
+    arguments = parser.parse_args()
+
+    if arguments.upgrade:
+        summary_backend = create_summary_backend()
+        try:
+            upgraded = upgrade_legacy_summaries(summary_backend)
+        finally:
+            summary_backend.close()
+        print(f'upgraded {upgraded} summaries of the {Config.SUMMARY_BACKEND} backend')
+    else:
+        copied = copy_file_summaries_to_sqlite(arguments.database)
+        print(f'copied {copied} summaries to {arguments.database}')
@@ -0,0 +1,69 @@
+import random
+from typing import List, Mapping, Optional
+
+import pytest
+
+from utils.KeywordMatcher import KeywordMatcher
+from utils.content_utils import get_bot_content
+
+
+def loop_find(keywords: Mapping[str, str], content: str) -> Optional[str]:
+    """
+    The keyword loop the bot used before the KeywordMatcher.
+    """
+    for keyword in keywords.keys():
+        if keyword in content:
+            return keywords[keyword]
+    return None
+
+
+def random_keywords(size: int, seed: int) -> Mapping[str, str]:
+    """
+    Short keywords over a small alphabet, so they overlap and share prefixes and suffixes.
+    """
+    generator = random.Random(seed)
+    keywords = {}
+    while len(keywords) < size:
+        keywords[''.join(generator.choices('abc', k=generator.randint(1, 6)))] = f'value_{len(keywords)}'
+    return keywords
+
+
+def random_texts(count: int, seed: int) -> List[str]:
+    """
+    Texts over the alphabet of the random keywords, with a letter and a space no keyword contains.
+    """
+    generator = random.Random(seed)
+    return [''.join(generator.choices('abcd ', k=generator.randint(0, 40))) for _ in range(count)]
+
+
+@pytest.mark.parametrize('state', sorted(get_bot_content().transitions))
+def test_bot_transitions_match_the_keyword_loop(state):
+    keywords = get_bot_content().transitions[state]
+    matcher = KeywordMatcher(keywords)
+    texts = ['', 'hello', 'no, not really', 'yes i want to exit', 'please show me summary 1',
+             'i want to change the driven kilometers', *keywords.keys(), ' '.join(reversed(list(keywords.keys())))]
+
+    for text in texts:
+        assert matcher.find(text) == loop_find(keywords, text), text
+
+
+@pytest.mark.parametrize('size', [5, KeywordMatcher.AUTOMATON_MIN_KEYWORDS - 1, KeywordMatcher.AUTOMATON_MIN_KEYWORDS,
+                                  300])
+def test_overlapping_keywords_match_the_keyword_loop(size):
+    keywords = random_keywords(size, seed=size)
+    matcher = KeywordMatcher(keywords)
+
+    for text in random_texts(500, seed=size):
+        assert matcher.find(text) == loop_find(keywords, text), text
+
+
+def test_first_inserted_keyword_wins_wherever_it_occurs():
+    keywords = {'later': 'first', 'early': 'second', 'ear': 'third'}
+    fillers = {f'filler{index}': 'filler' for index in range(KeywordMatcher.AUTOMATON_MIN_KEYWORDS)}
+    large_keywords = {**keywords, **fillers}
+
+    for matcher in (KeywordMatcher(keywords), KeywordMatcher(large_keywords)):
+        assert matcher.find('early or later') == 'first'
+        assert matcher.find('early') == 'second'
+        assert matcher.find('year') == 'third'
+        assert matcher.find('nothing') is None
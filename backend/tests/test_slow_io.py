@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+import storage.SummaryRepository as summary_repository_module
+from benchmarks.slow_io_benchmark import SlowSummaryBackend, run
+from storage.SqliteSummaryBackend import SqliteSummaryBackend
+from storage.SummaryRepository import SummaryRepository
+
+SUMMARY_DELAY_SECONDS = 0.5
+
+
+@pytest.fixture
+def slow_backend(tmp_path):
+    """
+    Installs a summary repository on a slowed down temporary database as the process-wide
+    repository, and restores the previous repository afterwards.
+    """
+    backend = SlowSummaryBackend(SqliteSummaryBackend(str(tmp_path / 'summaries.db')))
+    previous_repository = summary_repository_module._repository
+    summary_repository_module._repository = SummaryRepository(backend)
+    try:
+        yield backend
+    finally:
+        summary_repository_module._repository = previous_repository
+        backend.close()
+
+
+def test_slow_summary_storage_does_not_delay_other_chats(slow_backend):
+    """
+    Chats not touching the summaries keep answering quickly while other chats save and load
+    summaries on a storage blocking every access. If the summary I/O ran on the event loop, most
+    requests would wait for at least one delay.
+    """
+    measurement, = asyncio.run(
+        run(slow_backend, [SUMMARY_DELAY_SECONDS], summary_users=2, chat_users=2, duration_seconds=3)
+    )
+
+    assert measurement['requests'] > 0
+    assert measurement['p95_ms'] < measurement['delay_ms'] / 2
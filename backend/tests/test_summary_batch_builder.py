@@ -0,0 +1,77 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import pytest
+
+from SummaryBatchBuilder import SummaryBatchBuilder
+from SummaryBuilder import SummaryBuilder
+
+AS_OF = datetime(2024, 7, 2, 15, 30)
+
+
+def random_contracts(count: int, seed: int) -> List[Tuple[datetime, int, int, float]]:
+    """
+    Contracts starting at any time of day up to four years before AS_OF, with km values on a
+    grid of 0.05, so the metrics often land on rounding ties.
+    """
+    generator = random.Random(seed)
+    return [
+        (AS_OF - timedelta(minutes=generator.randint(0, 4 * 366 * 24 * 60)),
+         generator.choice([1, 6, 12, 24, 36, 48]),
+         generator.randrange(5000, 60001, 5),
+         generator.randrange(0, 1200001) / 20)
+        for _ in range(count)
+    ]
+
+
+def build_batch(contracts: List[Tuple[datetime, int, int, float]]) -> SummaryBatchBuilder:
+    """
+    Builds the summaries of all contracts as of AS_OF at once.
+    """
+    start_dates, runtime_months, km_limits, km_driven = zip(*contracts)
+    return SummaryBatchBuilder(start_dates, runtime_months, km_limits, km_driven, reference_date=AS_OF)
+
+
+def single_summary_data(contract: Tuple[datetime, int, int, float]) -> Dict:
+    """
+    Builds the summary data of a single contract as of AS_OF.
+    """
+    return SummaryBuilder(*contract, as_of=AS_OF).get_summary_data()
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_batch_matches_the_single_contract_builder(seed):
+    contracts = random_contracts(2000, seed)
+    batch = build_batch(contracts)
+
+    assert len(batch) == len(contracts)
+    for index, contract in enumerate(contracts):
+        try:
+            expected = single_summary_data(contract)
+        except ZeroDivisionError:
+            with pytest.raises(ZeroDivisionError):
+                batch.get_summary_data(index)
+            continue
+        assert batch.get_summary_data(index) == expected, contract
+
+
+@pytest.mark.parametrize('start_date', [
+    datetime(2024, 1, 31), datetime(2023, 8, 31, 23, 59), datetime(2020, 2, 29), datetime(2023, 12, 31, 0, 1),
+])
+def test_end_of_month_start_dates_match_the_single_contract_builder(start_date):
+    contracts = [(start_date, months, 30000, 9000.25) for months in (1, 2, 6, 12, 13, 36, 48)]
+
+    assert build_batch(contracts).get_all_summary_data() == [single_summary_data(contract) for contract in contracts]
+
+
+def test_contracts_dividing_by_zero_raise_like_the_single_contract_builder():
+    started_today = (AS_OF - timedelta(hours=1), 12, 20000, 0.0)
+    ends_today = (datetime(2024, 6, 3, 15, 30), 1, 1000, 500.0)
+    batch = build_batch([started_today, ends_today])
+
+    for index, contract in enumerate([started_today, ends_today]):
+        with pytest.raises(ZeroDivisionError):
+            single_summary_data(contract)
+        with pytest.raises(ZeroDivisionError):
+            batch.get_summary_data(index)
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+from SummaryBuilder import SummaryBuilder
+from utils.format_utils import round_to
+
+START_DATE = datetime(2023, 7, 2, 9)
+
+
+def test_summary_is_calculated_at_the_given_point_in_time():
+    as_of = datetime(2024, 7, 2, 8, 59)
+    record = SummaryBuilder(START_DATE, 36, 30000, 9000, as_of=as_of).get_summary_record()
+
+    assert record.as_of == as_of
+    assert record.day_number == (as_of - START_DATE).days == 365
+
+
+def test_every_metric_uses_the_same_day_when_the_contract_day_changes():
+    day_change = START_DATE + timedelta(days=366)
+    before_change = SummaryBuilder(START_DATE, 36, 30000, 9000, as_of=day_change - timedelta(microseconds=1))
+    after_change = SummaryBuilder(START_DATE, 36, 30000, 9000, as_of=day_change)
+
+    for record in (before_change.get_summary_record(), after_change.get_summary_record()):
+        day_number = record.day_number
+        assert record.allowed_kms == round_to(day_number * record.daily_average)
+        assert record.daily_average_so_far == round_to(record.km_driven / day_number)
+        assert record.daily_average_from_now == round_to(
+            (record.km_limit - record.km_driven) / (record.runtime_days - day_number)
+        )
+    assert before_change.get_summary_record().day_number == 365
+    assert after_change.get_summary_record().day_number == 366
+
+
+def test_summaries_at_the_same_point_in_time_are_identical():
+    as_of = datetime(2025, 1, 15, 12)
+
+    first = SummaryBuilder(START_DATE, 36, 30000, 9000, as_of=as_of)
+    second = SummaryBuilder(START_DATE, 36, 30000, 9000, as_of=as_of)
+
+    assert first.get_summary_data() == second.get_summary_data()
+    assert first.get_summary() == second.get_summary()
+
+
+def test_summary_without_a_point_in_time_is_calculated_now():
+    before = datetime.now()
+    record = SummaryBuilder(START_DATE, 36, 30000, 9000).get_summary_record()
+    after = datetime.now()
+
+    assert before <= record.as_of <= after
+    assert record.day_number in {(before - START_DATE).days, (after - START_DATE).days}
+
+
+def test_summary_can_be_calculated_for_past_and_future_days():
+    records = [SummaryBuilder(START_DATE, 36, 30000, 9000, as_of=START_DATE + timedelta(days=day)).get_summary_record()
+               for day in (1, 400, 1000)]
+
+    assert [record.day_number for record in records] == [1, 400, 1000]
+    assert [record.allowed_kms for record in records] == [round_to(day * records[0].daily_average)
+                                                        for day in (1, 400, 1000)]
@@ -0,0 +1,95 @@
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import pytest
+
+from SummaryBuilder import SummaryBuilder
+from datastructures.SummaryRecord import SUMMARY_RECORD_VERSION, SummaryRecord, is_legacy_summary_data
+from storage.SqliteSummaryBackend import SqliteSummaryBackend
+from storage.migrate_summaries import upgrade_legacy_summaries
+
+# a summary file as SummaryBuilder saved it before summaries were saved as records
+LEGACY_SUMMARY = {
+    'contract': '30000 km over 36 months',
+    'start date': '02.07.2023',
+    'end date': '01.07.2026',
+    'daily average': '27.4 km/day',
+    'monthly average': '822.0 km/month',
+    'day': '365 of 1095 days',
+    'allowed kms so far': '10001.0 km',
+    'driven': '12000.5 km',
+    'difference': '-1999.5 km',
+    'daily average so far': '32.9 km/day',
+    'daily average from now': '24.6 km/day',
+}
+
+
+def test_legacy_summary_is_parsed_into_a_record():
+    record = SummaryRecord.from_json_data(LEGACY_SUMMARY)
+
+    assert record == SummaryRecord(
+        start_date=datetime(2023, 7, 2),
+        end_date=datetime(2026, 7, 1),
+        runtime_months=36,
+        runtime_days=1095,
+        km_limit=30000,
+        km_driven=12000.5,
+        as_of=datetime(2024, 7, 1),
+        day_number=365,
+        daily_average=27.4,
+        monthly_average=822.0,
+        allowed_kms=10001.0,
+        difference=-1999.5,
+        daily_average_so_far=32.9,
+        daily_average_from_now=24.6,
+    )
+    assert isinstance(record.km_limit, int) and isinstance(record.day_number, int)
+
+
+def test_legacy_summary_renders_like_before():
+    assert is_legacy_summary_data(LEGACY_SUMMARY)
+    assert SummaryRecord.from_json_data(LEGACY_SUMMARY).to_display_data() == LEGACY_SUMMARY
+
+
+@pytest.mark.parametrize('km_driven', [0, 9000, 12000.5, 45000.25])
+def test_legacy_summaries_of_the_builder_are_migrated_losslessly(km_driven):
+    builder = SummaryBuilder(datetime(2023, 7, 2), 36, 30000, km_driven, as_of=datetime(2024, 7, 1, 18))
+    record = builder.get_summary_record()
+
+    migrated = SummaryRecord.from_json_data(record.to_display_data())
+
+    # the time of the calculation was not saved, only its day in the contract
+    assert migrated == replace(record, as_of=record.start_date + timedelta(days=record.day_number))
+
+
+def test_record_data_is_not_legacy():
+    data = SummaryRecord.from_json_data(LEGACY_SUMMARY).to_json_data()
+
+    assert data['version'] == SUMMARY_RECORD_VERSION
+    assert not is_legacy_summary_data(data)
+    assert SummaryRecord.from_json_data(data) == SummaryRecord.from_json_data(LEGACY_SUMMARY)
+
+
+@pytest.mark.parametrize('data', [
+    {key: value for key, value in LEGACY_SUMMARY.items() if key != 'driven'},
+    {**LEGACY_SUMMARY, 'day': 'day 365'},
+    {**LEGACY_SUMMARY, 'start date': '2023-07-02'},
+    {'version': SUMMARY_RECORD_VERSION, 'start_date': '2023-07-02T00:00:00'},
+])
+def test_invalid_summary_data_raises_value_error(data):
+    with pytest.raises(ValueError):
+        SummaryRecord.from_json_data(data)
+
+
+def test_upgrade_rewrites_only_legacy_summaries(tmp_path):
+    backend = SqliteSummaryBackend(str(tmp_path / 'summaries.db'))
+    record_data = SummaryBuilder(datetime(2023, 7, 2), 36, 30000, 9000, as_of=datetime(2024, 7, 1)).get_summary_data()
+    backend.write_many([(1, LEGACY_SUMMARY), (2, record_data)])
+    record_version = backend.version(2)
+
+    assert upgrade_legacy_summaries(backend) == 1
+
+    assert backend.read(1) == SummaryRecord.from_json_data(LEGACY_SUMMARY).to_json_data()
+    assert backend.read(2) == record_data
+    assert backend.version(2) == record_version
+    backend.close()
@@ -0,0 +1,113 @@
+from datetime import datetime
+from typing import Dict, List
+
+import pytest
+
+from SummaryBuilder import SummaryBuilder
+from storage.FileSummaryBackend import FileSummaryBackend
+from storage.SqliteSummaryBackend import SqliteSummaryBackend
+from storage.SummaryRepository import SummaryRepository
+from utils.Exceptions import SummaryNotFoundException
+from utils.fs_utils import Paths
+
+AS_OF = datetime(2024, 7, 2, 12)
+
+
+def summary_data(km_driven: float) -> Dict:
+    """
+    Summary data of a contract started a year before AS_OF.
+    """
+    return SummaryBuilder(datetime(2023, 7, 2), 36, 30000, km_driven, as_of=AS_OF).get_summary_data()
+
+
+class CountingRenderer:
+    """
+    Renders summaries to the text of their record and records the rendered data.
+    """
+
+    def __init__(self):
+        self.rendered: List[Dict] = []
+
+    def __call__(self, data: Dict) -> str:
+        self.rendered.append(data)
+        return SummaryBuilder.get_summary_from_data(data)
+
+
+@pytest.fixture(params=['file', 'sqlite'])
+def backend(request, tmp_path, monkeypatch):
+    if request.param == 'file':
+        monkeypatch.setattr(Paths, 'SUMMARY_DIR', str(tmp_path / 'summaries'))
+        backend = FileSummaryBackend()
+    else:
+        backend = SqliteSummaryBackend(str(tmp_path / 'summaries.db'))
+    yield backend
+    backend.close()
+
+
+@pytest.fixture
+def repository(backend):
+    return SummaryRepository(backend, rendered_cache_size=4)
+
+
+def test_rendered_summary_is_cached(repository):
+    render = CountingRenderer()
+    id = repository.save(summary_data(9000))
+
+    first = repository.read_rendered(id, render)
+    second = repository.read_rendered(id, render)
+
+    assert first == second == SummaryBuilder.get_summary_from_data(summary_data(9000))
+    assert len(render.rendered) == 1
+
+
+def test_overwritten_summary_is_rendered_again(repository, backend):
+    render = CountingRenderer()
+    id = repository.save(summary_data(9000))
+    repository.read_rendered(id, render)
+
+    # written by another process sharing the backend
+    backend.write(id, summary_data(12000))
+
+    assert repository.read_rendered(id, render) == SummaryBuilder.get_summary_from_data(summary_data(12000))
+    assert render.rendered == [summary_data(9000), summary_data(12000)]
+
+
+def test_deleted_summary_is_not_served_from_the_cache(repository):
+    render = CountingRenderer()
+    id = repository.save(summary_data(9000))
+    repository.read_rendered(id, render)
+
+    repository.delete(id)
+
+    with pytest.raises(SummaryNotFoundException):
+        repository.read_rendered(id, render)
+
+
+def test_summary_saved_after_a_delete_is_not_served_from_the_cache(repository):
+    render = CountingRenderer()
+    deleted_id = repository.save(summary_data(9000))
+    repository.read_rendered(deleted_id, render)
+    repository.delete(deleted_id)
+
+    # the file backend hands out the ID of the deleted summary again
+    id = repository.save(summary_data(12000))
+
+    assert repository.read_rendered(id, render) == SummaryBuilder.get_summary_from_data(summary_data(12000))
+    assert render.rendered[-1] == summary_data(12000)
+
+
+def test_least_recently_used_summary_is_evicted(backend):
+    repository = SummaryRepository(backend, rendered_cache_size=2)
+    render = CountingRenderer()
+    first, second, third = (repository.save(summary_data(km_driven)) for km_driven in (1000, 2000, 3000))
+
+    repository.read_rendered(first, render)
+    repository.read_rendered(second, render)
+    repository.read_rendered(first, render)
+    repository.read_rendered(third, render)
+    render.rendered.clear()
+
+    repository.read_rendered(first, render)
+    repository.read_rendered(second, render)
+
+    assert render.rendered == [summary_data(2000)]
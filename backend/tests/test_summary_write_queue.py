@@ -0,0 +1,141 @@
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+
+import pytest
+
+from storage.SqliteSummaryBackend import SqliteSummaryBackend
+from storage.SummaryRepository import SummaryRepository
+from storage.SummaryWriteQueue import SummaryWriteQueue
+from utils.Exceptions import SummaryNotFoundException
+
+# long enough that the writer does not write a batch on its own during a test
+NEVER_SECONDS = 60
+RETRY_SECONDS = 0.05
+
+
+class FailingSummaryBackend(SqliteSummaryBackend):
+    """
+    SQLite backend whose batch writes fail a given number of times.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.failures_left = 0
+        self.batches = 0
+
+    def write_many(self, summaries: Iterable[Tuple[int, Dict]]) -> None:
+        if self.failures_left:
+            self.failures_left -= 1
+            raise IOError('disk full')
+        self.batches += 1
+        super().write_many(summaries)
+
+
+def wait_until(condition, timeout_seconds: float = 5) -> None:
+    """
+    Waits until the condition holds, failing the test after the timeout.
+    """
+    deadline = time.monotonic() + timeout_seconds
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = FailingSummaryBackend(str(tmp_path / 'summaries.db'))
+    yield backend
+    backend.close()
+
+
+def test_queued_summaries_are_read_before_they_are_written(backend):
+    queue = SummaryWriteQueue(backend, NEVER_SECONDS, max_batch_size=100)
+    repository = SummaryRepository(backend, write_queue=queue)
+
+    id = repository.save({'km_driven': 9000})
+
+    assert backend.ids() == []
+    assert repository.read(id) == {'km_driven': 9000}
+    assert repository.ids() == [id]
+    assert repository.contains(id)
+    queue.close()
+
+
+def test_queued_summaries_are_written_on_close(backend):
+    queue = SummaryWriteQueue(backend, NEVER_SECONDS, max_batch_size=100)
+    repository = SummaryRepository(backend, write_queue=queue)
+    ids = [repository.save({'km_driven': km_driven}) for km_driven in (1000, 2000, 3000)]
+
+    queue.close()
+
+    assert sorted(backend.ids()) == ids
+    assert [backend.read(id) for id in ids] == [{'km_driven': 1000}, {'km_driven': 2000}, {'km_driven': 3000}]
+    assert backend.batches == 1
+    with pytest.raises(RuntimeError):
+        queue.put(99, {'km_driven': 4000})
+
+
+def test_failed_writes_are_retried_when_not_waiting_for_the_commit(backend):
+    backend.failures_left = 2
+    queue = SummaryWriteQueue(backend, RETRY_SECONDS, max_batch_size=1)
+    repository = SummaryRepository(backend, write_queue=queue)
+
+    id = repository.save({'km_driven': 9000})
+
+    assert repository.read(id) == {'km_driven': 9000}
+    wait_until(lambda: backend.failures_left == 0 and queue.get(id) is None)
+    assert backend.read(id) == {'km_driven': 9000}
+    assert repository.read(id) == {'km_driven': 9000}
+    queue.close()
+
+
+def test_failed_writes_are_raised_when_waiting_for_the_commit(backend):
+    backend.failures_left = 1
+    queue = SummaryWriteQueue(backend, RETRY_SECONDS, max_batch_size=1, wait_for_commit=True)
+
+    with pytest.raises(IOError):
+        queue.put(1, {'km_driven': 9000})
+
+    assert queue.get(1) is None
+    queue.put(1, {'km_driven': 9000})
+    assert backend.read(1) == {'km_driven': 9000}
+    queue.close()
+
+
+def test_deleted_queued_summary_is_not_written(backend):
+    queue = SummaryWriteQueue(backend, NEVER_SECONDS, max_batch_size=100)
+    repository = SummaryRepository(backend, write_queue=queue)
+    id = repository.save({'km_driven': 9000})
+
+    repository.delete(id)
+    queue.close()
+
+    assert id not in repository.ids()
+    with pytest.raises(SummaryNotFoundException):
+        backend.read(id)
+
+
+def test_close_waits_for_the_batch_being_written(backend, monkeypatch):
+    writing = threading.Event()
+    release = threading.Event()
+    write_many = backend.write_many
+
+    def slow_write_many(summaries):
+        writing.set()
+        release.wait()
+        write_many(summaries)
+
+    monkeypatch.setattr(backend, 'write_many', slow_write_many)
+    queue = SummaryWriteQueue(backend, 0, max_batch_size=1)
+    queue.put(1, {'km_driven': 9000})
+    assert writing.wait(5)
+
+    closing = threading.Thread(target=queue.close)
+    closing.start()
+    closing.join(0.1)
+    assert closing.is_alive()
+
+    release.set()
+    closing.join(5)
+    assert backend.read(1) == {'km_driven': 9000}
@@ -28,3 +28,35 @@ class NoMatchingStateException(Exception):
     def __init__(self, message="No matching state found"):
         self.message = message
         super().__init__(self.message)
+
+
+class SummaryNotFoundException(Exception):
+    """
+    Exception raised when a saved summary does not exist.
+
+    This exception is typically raised when reading or deleting a summary with an ID
+    that is not in use by the summary storage.
+
+    Attributes:
+        message (str): Optional error message describing the exception.
+    """
+
+    def __init__(self, message="Summary not found"):
+        self.message = message
+        super().__init__(self.message)
+
+
+class InvalidStateMachineException(Exception):
+    """
+    Exception raised when the bot content does not fit the states of the chatbot.
+
+    This exception is typically raised when loading the bot content, if a state has no
+    questions or transitions, or a transition leads to a state that does not exist.
+
+    Attributes:
+        message (str): Optional error message describing the exception.
+    """
+
+    def __init__(self, message="Invalid state machine"):
+        self.message = message
+        super().__init__(self.message)
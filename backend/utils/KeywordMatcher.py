@@ -0,0 +1,119 @@
+from collections import deque
+from typing import Dict, List, Mapping, Optional, Tuple
+
+
+class KeywordMatcher:
+    """
+    Finds keywords in a text, with a single pass using an Aho-Corasick automaton for large
+    keyword sets.
+
+    The keywords keep the priority of their insertion order: if several keywords occur
+    in a text, the value of the keyword that was inserted first is returned, no matter
+    where in the text it occurs. This matches a loop over all keywords with a substring
+    test for each of them, which is what small keyword sets use: below AUTOMATON_MIN_KEYWORDS
+    keywords the substring tests in C beat the automaton stepping through the text in Python.
+
+    Attributes:
+        __keywords (Tuple[Tuple[str, str], ...]): Keywords and their values, ordered by priority.
+        __goto (List[Dict[str, int]]): Trie edges of each node, completed by the failure links.
+            Empty if the keyword set is small.
+        __best (List[int]): Lowest keyword index recognized when reaching a node, -1 if none.
+        __values (List[str]): Values of the keywords, ordered by keyword index.
+    """
+
+    AUTOMATON_MIN_KEYWORDS = 200
+
+    __NO_MATCH = -1
+
+    def __init__(self, keywords: Mapping[str, str]):
+        """
+        Builds the matcher for the given keywords, with an automaton if there are many of them.
+
+        :param keywords: Mapping of keywords to their values, ordered by priority.
+        """
+        self.__keywords: Tuple[Tuple[str, str], ...] = tuple(keywords.items())
+        self.__goto: List[Dict[str, int]] = []
+        self.__best: List[int] = []
+        self.__values: List[str] = list(keywords.values())
+
+        if len(self.__keywords) >= self.AUTOMATON_MIN_KEYWORDS:
+            self.__goto.append({})
+            self.__best.append(self.__NO_MATCH)
+            for index, keyword in enumerate(keywords.keys()):
+                self.__insert(keyword, index)
+            self.__link_failures()
+
+    def find(self, content: str) -> Optional[str]:
+        """
+        Finds the value of the keyword with the highest priority that occurs in the content.
+
+        :param content: The text to search.
+        :return: Value of the found keyword, None if no keyword occurs in the content.
+        """
+        if not self.__goto:
+            for keyword, value in self.__keywords:
+                if keyword in content:
+                    return value
+            return None
+
+        goto = self.__goto
+        best = self.__best
+        found = best[0]
+        node = 0
+
+        for char in content:
+            if found == 0:
+                break
+            node = goto[node].get(char, 0)
+            candidate = best[node]
+            if candidate != self.__NO_MATCH and (found == self.__NO_MATCH or candidate < found):
+                found = candidate
+
+        if found == self.__NO_MATCH:
+            return None
+        return self.__values[found]
+
+    def __insert(self, keyword: str, index: int) -> None:
+        """
+        Adds a keyword to the trie.
+
+        :param keyword: The keyword to add.
+        :param index: Priority of the keyword, lower values win.
+        """
+        node = 0
+        for char in keyword:
+            next_node = self.__goto[node].get(char)
+            if next_node is None:
+                next_node = len(self.__goto)
+                self.__goto.append({})
+                self.__best.append(self.__NO_MATCH)
+                self.__goto[node][char] = next_node
+            node = next_node
+        if self.__best[node] == self.__NO_MATCH:
+            self.__best[node] = index
+
+    def __link_failures(self) -> None:
+        """
+        Computes the failure links breadth first and folds them into the trie edges, so that
+        matching needs a single dictionary lookup per character. Each node also inherits the
+        best keyword index of its failure node, as those keywords end at the same position.
+        """
+        failure = [0] * len(self.__goto)
+        queue = deque()
+
+        for node in self.__goto[0].values():
+            queue.append(node)
+
+        while queue:
+            node = queue.popleft()
+            fallback_best = self.__best[failure[node]]
+            if fallback_best != self.__NO_MATCH and \
+                    (self.__best[node] == self.__NO_MATCH or fallback_best < self.__best[node]):
+                self.__best[node] = fallback_best
+
+            for char, child in self.__goto[node].items():
+                failure[child] = self.__goto[failure[node]].get(char, 0)
+                queue.append(child)
+
+            for char, target in self.__goto[failure[node]].items():
+                self.__goto[node].setdefault(char, target)
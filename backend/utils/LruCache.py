@@ -0,0 +1,63 @@
+import threading
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+V = TypeVar('V')
+
+
+class LruCache(Generic[V]):
+    """
+    Thread-safe cache holding a bounded number of values, evicting the least recently used one.
+
+    Attributes:
+        __values (OrderedDict[Hashable, V]): Cached values, least recently used first.
+        __max_size (int): Maximum number of cached values.
+        __lock (threading.Lock): Lock guarding the cached values.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Initializes an empty LruCache.
+
+        :param max_size: Maximum number of cached values, 0 disables the cache.
+        """
+        self.__values: OrderedDict[Hashable, V] = OrderedDict()
+        self.__max_size = max_size
+        self.__lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """
+        Retrieves a cached value and marks it as recently used.
+
+        :param key: The key of the value.
+        :return: The cached value, None if the key is not cached.
+        """
+        with self.__lock:
+            value = self.__values.get(key)
+            if value is not None:
+                self.__values.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        """
+        Caches a value, evicting the least recently used value if the cache is full.
+
+        :param key: The key of the value.
+        :param value: The value to cache.
+        """
+        if self.__max_size <= 0:
+            return
+        with self.__lock:
+            self.__values[key] = value
+            self.__values.move_to_end(key)
+            if len(self.__values) > self.__max_size:
+                self.__values.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        """
+        Removes a value from the cache if it is cached.
+
+        :param key: The key of the value.
+        """
+        with self.__lock:
+            self.__values.pop(key, None)
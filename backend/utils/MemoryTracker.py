@@ -0,0 +1,118 @@
+import threading
+import tracemalloc
+from typing import Optional
+
+from utils.config_utils import Config
+
+# ways of grouping allocations offered by tracemalloc
+GROUP_KEYS = ('lineno', 'filename', 'traceback')
+
+
+class MemoryTracker:
+    """
+    Traces the memory allocations of the process with tracemalloc and reports where the memory
+    grew since a baseline snapshot, to find what keeps growing the chat sessions over time.
+
+    Tracing slows down every allocation, so it only runs when the number of traced frames is
+    configured.
+
+    Attributes:
+        frames (int): Number of frames stored per allocation, 0 if tracing is disabled.
+        __baseline (Optional[tracemalloc.Snapshot]): Snapshot the growth is measured against.
+        __lock (threading.Lock): Guards the baseline.
+    """
+
+    def __init__(self, frames: int):
+        """
+        Initializes a MemoryTracker.
+
+        :param frames: Number of frames stored per allocation, 0 to disable tracing.
+        """
+        self.frames = frames
+        self.__baseline: Optional[tracemalloc.Snapshot] = None
+        self.__lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether allocations are traced.
+
+        :return: True if a number of frames is configured, False otherwise.
+        """
+        return self.frames > 0
+
+    def start(self) -> None:
+        """
+        Starts tracing and takes the baseline snapshot, if tracing is enabled.
+        """
+        if not self.enabled:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        with self.__lock:
+            self.__baseline = self.__snapshot()
+
+    def stop(self) -> None:
+        """
+        Stops tracing and drops the baseline snapshot.
+        """
+        with self.__lock:
+            self.__baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def report(self, group_by: str = 'lineno', limit: int = 25, reset: bool = False) -> str:
+        """
+        Compares a new snapshot with the baseline and formats the largest differences.
+
+        :param group_by: How allocations are grouped, one of GROUP_KEYS.
+        :param limit: Number of groups in the report.
+        :param reset: Whether the new snapshot becomes the baseline of the next report.
+        :return: The report as text.
+        :raises RuntimeError: If tracing has not been started.
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError('memory tracing is not running')
+        snapshot = self.__snapshot()
+        with self.__lock:
+            baseline = self.__baseline or snapshot
+            if reset:
+                self.__baseline = snapshot
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f'traced memory: {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB']
+        for difference in snapshot.compare_to(baseline, group_by)[:limit]:
+            lines.append(str(difference))
+            if group_by == 'traceback':
+                lines.extend(f'    {line}' for line in difference.traceback.format())
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def __snapshot() -> tracemalloc.Snapshot:
+        """
+        Takes a snapshot without the allocations of tracemalloc itself.
+
+        :return: The filtered snapshot.
+        """
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+
+
+_tracker: Optional[MemoryTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_memory_tracker() -> MemoryTracker:
+    """
+    Return the process-wide memory tracker, configured on first use.
+
+    :return: The shared memory tracker.
+    """
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = MemoryTracker(Config.TRACEMALLOC_FRAMES)
+    return _tracker
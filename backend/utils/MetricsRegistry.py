@@ -0,0 +1,473 @@
+import bisect
+import functools
+import math
+import threading
+import time
+from typing import Callable, Dict, Generic, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+# latency buckets in seconds, from fast in-memory turns to slow disk I/O
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+F = TypeVar('F', bound=Callable)
+S = TypeVar('S')
+
+
+class CounterValue:
+    """
+    Value of a counter for one combination of label values.
+
+    Attributes:
+        __value (float): The counted amount.
+        __lock (threading.Lock): Lock guarding the value.
+    """
+    __slots__ = ('__value', '__lock')
+
+    def __init__(self):
+        """
+        Initializes a CounterValue at zero.
+        """
+        self.__value = 0.0
+        self.__lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        """
+        Increases the counter.
+
+        :param amount: The non-negative amount to add.
+        """
+        with self.__lock:
+            self.__value += amount
+
+    def get(self) -> float:
+        """
+        Retrieves the counted amount.
+
+        :return: The value of the counter.
+        """
+        return self.__value
+
+
+class GaugeValue:
+    """
+    Value of a gauge for one combination of label values, either set directly or read from a
+    function when the metrics are collected.
+
+    Attributes:
+        __value (float): The current value.
+        __function (Optional[Callable[[], float]]): Function returning the current value, if set.
+        __lock (threading.Lock): Lock guarding the value.
+    """
+    __slots__ = ('__value', '__function', '__lock')
+
+    def __init__(self):
+        """
+        Initializes a GaugeValue at zero.
+        """
+        self.__value = 0.0
+        self.__function: Optional[Callable[[], float]] = None
+        self.__lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        """
+        Sets the gauge to a value.
+
+        :param value: The new value.
+        """
+        self.__value = value
+
+    def inc(self, amount: float = 1) -> None:
+        """
+        Increases the gauge.
+
+        :param amount: The amount to add, negative to decrease the gauge.
+        """
+        with self.__lock:
+            self.__value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        """
+        Decreases the gauge.
+
+        :param amount: The amount to subtract.
+        """
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Reads the value from a function whenever the metrics are collected, replacing a set value.
+
+        :param function: Cheap function returning the current value.
+        """
+        self.__function = function
+
+    def get(self) -> float:
+        """
+        Retrieves the current value.
+
+        :return: The value of the gauge.
+        """
+        return self.__value if self.__function is None else self.__function()
+
+
+class HistogramValue:
+    """
+    Observations of a histogram for one combination of label values.
+
+    Attributes:
+        __upper_bounds (Sequence[float]): Upper bounds of the buckets, ascending.
+        __counts (List[int]): Number of observations per bucket, the last one for larger values.
+        __sum (float): Sum of all observations.
+        __lock (threading.Lock): Lock guarding the counts and the sum.
+    """
+    __slots__ = ('__upper_bounds', '__counts', '__sum', '__lock')
+
+    def __init__(self, upper_bounds: Sequence[float]):
+        """
+        Initializes a HistogramValue without observations.
+
+        :param upper_bounds: Upper bounds of the buckets, ascending.
+        """
+        self.__upper_bounds = upper_bounds
+        self.__counts = [0] * (len(upper_bounds) + 1)
+        self.__sum = 0.0
+        self.__lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """
+        Records an observation.
+
+        :param value: The observed value, for example a duration in seconds.
+        """
+        index = bisect.bisect_left(self.__upper_bounds, value)
+        with self.__lock:
+            self.__counts[index] += 1
+            self.__sum += value
+
+    def time(self) -> 'HistogramTimer':
+        """
+        Measures the duration of a with block.
+
+        :return: Context manager observing the duration of the block in seconds.
+        """
+        return HistogramTimer(self)
+
+    def get(self) -> Tuple[List[int], float]:
+        """
+        Retrieves the cumulative bucket counts and the sum, like they are exposed.
+
+        :return: Number of observations less or equal to each upper bound and in total, and their sum.
+        """
+        with self.__lock:
+            counts = list(self.__counts)
+            total = self.__sum
+        cumulative = []
+        running = 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total
+
+
+class HistogramTimer:
+    """
+    Context manager observing the duration of a with block in a histogram.
+
+    Attributes:
+        __histogram (HistogramValue): The histogram to observe the duration in.
+        __started (float): Performance counter at the start of the block.
+    """
+    __slots__ = ('__histogram', '__started')
+
+    def __init__(self, histogram: HistogramValue):
+        """
+        Initializes a HistogramTimer.
+
+        :param histogram: The histogram to observe the duration in.
+        """
+        self.__histogram = histogram
+        self.__started = 0.0
+
+    def __enter__(self) -> 'HistogramTimer':
+        """
+        Starts measuring.
+
+        :return: This timer.
+        """
+        self.__started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Observes the duration of the block, also if it raised an exception.
+        """
+        self.__histogram.observe(time.perf_counter() - self.__started)
+
+
+class Metric(Generic[S]):
+    """
+    A named metric with a value per combination of label values.
+
+    Attributes:
+        name (str): Name of the metric.
+        documentation (str): Help text of the metric.
+        kind (str): Prometheus type of the metric: counter, gauge or histogram.
+        label_names (Tuple[str, ...]): Names of the labels.
+        buckets (Optional[Tuple[float, ...]]): Upper bounds of the buckets of a histogram, None otherwise.
+        __create_value (Callable[[], S]): Creates the value for new label values.
+        __values (Dict[Tuple[str, ...], S]): Values by label values.
+        __lock (threading.Lock): Lock guarding the creation of values.
+    """
+
+    def __init__(self, name: str, documentation: str, kind: str, label_names: Sequence[str],
+                 create_value: Callable[[], S], buckets: Optional[Tuple[float, ...]] = None):
+        """
+        Initializes a Metric. Without labels, its single value exists from the start.
+
+        :param name: Name of the metric.
+        :param documentation: Help text of the metric.
+        :param kind: Prometheus type of the metric.
+        :param label_names: Names of the labels.
+        :param create_value: Creates the value for new label values.
+        :param buckets: Upper bounds of the buckets of a histogram.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.label_names = tuple(label_names)
+        self.buckets = buckets
+        self.__create_value = create_value
+        self.__values: Dict[Tuple[str, ...], S] = {}
+        self.__lock = threading.Lock()
+        if not self.label_names:
+            self.__values[()] = create_value()
+
+    def labels(self, *label_values: str) -> S:
+        """
+        Retrieves the value for the given label values, creating it on first use. Metrics without
+        labels have a single value, retrieved without label values. Callers on hot paths keep the
+        returned value instead of looking it up every time.
+
+        :param label_values: Values of the labels, in the order of the label names.
+        :return: The value of the metric for these labels.
+        :raises ValueError: If the number of label values does not match the label names.
+        """
+        value = self.__values.get(label_values)
+        if value is None:
+            if len(label_values) != len(self.label_names):
+                raise ValueError(f'{self.name} expects labels {self.label_names}, got {label_values}')
+            with self.__lock:
+                value = self.__values.setdefault(label_values, self.__create_value())
+        return value
+
+    def values(self) -> List[Tuple[Tuple[str, ...], S]]:
+        """
+        Retrieves the values of all label combinations used so far.
+
+        :return: Pairs of label values and value.
+        """
+        with self.__lock:
+            return list(self.__values.items())
+
+
+class MetricsRegistry:
+    """
+    In-process registry of counters, gauges and histograms, exposed in the Prometheus text format.
+
+    Updating a metric takes a lock of its own, so the registry can stay enabled in production.
+    Metrics are registered once by name, registering the same name again returns the existing
+    metric. All methods are thread-safe.
+
+    Attributes:
+        __metrics (Dict[str, Metric]): The registered metrics by name.
+        __lock (threading.Lock): Lock guarding the registration.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty MetricsRegistry.
+        """
+        self.__metrics: Dict[str, Metric] = {}
+        self.__lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Metric[CounterValue]:
+        """
+        Registers a counter, a value that only increases.
+
+        :param name: Name of the metric, ending in _total by convention.
+        :param documentation: Help text of the metric.
+        :param label_names: Names of the labels.
+        :return: The registered counter.
+        """
+        return self.__register(name, documentation, 'counter', label_names, CounterValue)
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Metric[GaugeValue]:
+        """
+        Registers a gauge, a value that goes up and down.
+
+        :param name: Name of the metric.
+        :param documentation: Help text of the metric.
+        :param label_names: Names of the labels.
+        :return: The registered gauge.
+        """
+        return self.__register(name, documentation, 'gauge', label_names, GaugeValue)
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Metric[HistogramValue]:
+        """
+        Registers a histogram, counting observations in buckets.
+
+        :param name: Name of the metric, with the unit as suffix by convention.
+        :param documentation: Help text of the metric.
+        :param label_names: Names of the labels.
+        :param buckets: Upper bounds of the buckets, ascending.
+        :return: The registered histogram.
+        """
+        upper_bounds = tuple(sorted(buckets))
+        return self.__register(name, documentation, 'histogram', label_names,
+                               lambda: HistogramValue(upper_bounds), upper_bounds)
+
+    def render(self) -> str:
+        """
+        Renders all metrics in the Prometheus text exposition format 0.0.4.
+
+        :return: The metrics as text.
+        """
+        with self.__lock:
+            metrics = sorted(self.__metrics.items())
+        lines = []
+        for name, metric in metrics:
+            lines.append(f'# HELP {name} {_escape_help(metric.documentation)}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(self.__render_values(metric))
+        lines.append('')
+        return '\n'.join(lines)
+
+    def __register(self, name: str, documentation: str, kind: str, label_names: Sequence[str],
+                   create_value: Callable, buckets: Optional[Tuple[float, ...]] = None) -> Metric:
+        """
+        Registers a metric or returns the one registered with the same name.
+
+        :param name: Name of the metric.
+        :param documentation: Help text of the metric.
+        :param kind: Prometheus type of the metric.
+        :param label_names: Names of the labels.
+        :param create_value: Creates the value for new label values.
+        :param buckets: Upper bounds of the buckets of a histogram.
+        :return: The registered metric.
+        :raises ValueError: If a metric of another type or with other labels has the same name.
+        """
+        with self.__lock:
+            metric = self.__metrics.get(name)
+            if metric is None:
+                metric = Metric(name, documentation, kind, label_names, create_value, buckets)
+                self.__metrics[name] = metric
+            elif metric.kind != kind or metric.label_names != tuple(label_names):
+                raise ValueError(f'metric {name} is already registered as another {metric.kind}')
+            return metric
+
+    @staticmethod
+    def __render_values(metric: Metric) -> Iterator[str]:
+        """
+        Renders the samples of a metric.
+
+        :param metric: The metric to render.
+        :return: Iterator over the sample lines.
+        """
+        for label_values, value in sorted(metric.values(), key=lambda item: item[0]):
+            labels = list(zip(metric.label_names, label_values))
+            if metric.kind != 'histogram':
+                yield f'{metric.name}{_format_labels(labels)} {_format_number(value.get())}'
+                continue
+            cumulative, total = value.get()
+            for upper_bound, count in zip((*metric.buckets, math.inf), cumulative):
+                yield f'{metric.name}_bucket{_format_labels(labels + [("le", _format_number(upper_bound))])} {count}'
+            yield f'{metric.name}_sum{_format_labels(labels)} {_format_number(total)}'
+            yield f'{metric.name}_count{_format_labels(labels)} {cumulative[-1]}'
+
+
+def _format_labels(labels: List[Tuple[str, str]]) -> str:
+    """
+    Formats labels as a Prometheus label set.
+
+    :param labels: Pairs of label name and value.
+    :return: The label set in braces, empty if there are no labels.
+    """
+    if not labels:
+        return ''
+    escaped = (f'{name}="{_escape_label_value(str(value))}"' for name, value in labels)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _escape_label_value(value: str) -> str:
+    """
+    Escapes backslashes, double quotes and line feeds in a label value.
+
+    :param value: The label value.
+    :return: The escaped label value.
+    """
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _escape_help(text: str) -> str:
+    """
+    Escapes backslashes and line feeds in a help text.
+
+    :param text: The help text.
+    :return: The escaped help text.
+    """
+    return text.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _format_number(value: float) -> str:
+    """
+    Formats a sample value, integers without decimal places.
+
+    :param value: The value.
+    :return: The formatted value.
+    """
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def timed(histogram: HistogramValue) -> Callable[[F], F]:
+    """
+    Decorator observing the duration of every call of a function in a histogram.
+
+    :param histogram: The histogram to observe the durations in.
+    :return: The decorator.
+    """
+    def decorator(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """
+    Return the process-wide metrics registry, creating it on first use.
+
+    :return: The shared metrics registry.
+    """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+    return _registry
@@ -0,0 +1,264 @@
+import cProfile
+import contextvars
+import io
+import itertools
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Iterable, List, Optional, TypeVar
+
+from utils.config_utils import Config
+
+T = TypeVar('T')
+
+# sort orders of pstats offered for rendering a profile
+SORT_KEYS = ('cumulative', 'tottime', 'ncalls', 'filename')
+
+_current_profile: contextvars.ContextVar[Optional['RequestProfile']] = contextvars.ContextVar(
+    'leasebot_current_profile', default=None
+)
+
+
+class RequestProfile:
+    """
+    The cProfile measurements of a single request.
+
+    The event loop thread is profiled from the start of the request until its response headers
+    are sent. Work the request runs in the blocking thread pool is profiled in its own thread and
+    added to the same profile.
+
+    Attributes:
+        id (int): Number of the profile, increasing with every profiled request.
+        method (str): HTTP method of the request.
+        path (str): Path of the request.
+        started_at (datetime): Time the request was received.
+        status (Optional[int]): Status code of the response, None until the response has started.
+        duration_seconds (float): Time until the response headers were sent.
+        profiler (cProfile.Profile): Profiler of the event loop thread.
+        __profiles (List[cProfile.Profile]): Profilers of the work run in the thread pool.
+        __lock (threading.Lock): Guards the profilers, which the thread pool adds concurrently.
+        __started (float): perf_counter value at the start of the request.
+    """
+
+    def __init__(self, id: int, method: str, path: str):
+        """
+        Initializes a RequestProfile.
+
+        :param id: Number of the profile.
+        :param method: HTTP method of the request.
+        :param path: Path of the request.
+        """
+        self.id = id
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now()
+        self.status: Optional[int] = None
+        self.duration_seconds = 0.0
+        self.profiler = cProfile.Profile()
+        self.__profiles: List[cProfile.Profile] = []
+        self.__lock = threading.Lock()
+        self.__started = time.perf_counter()
+
+    def add(self, profile: cProfile.Profile) -> None:
+        """
+        Adds the measurements of a profiler of the thread pool to the request.
+
+        :param profile: A disabled profiler.
+        """
+        with self.__lock:
+            self.__profiles.append(profile)
+
+    def finish(self, status: Optional[int]) -> None:
+        """
+        Records the end of the request.
+
+        :param status: Status code of the response, None if no response was sent.
+        """
+        self.status = status
+        self.duration_seconds = time.perf_counter() - self.__started
+
+    def render(self, sort: str = 'cumulative', limit: int = 40) -> str:
+        """
+        Formats the measurements as the pstats report of the most expensive functions.
+
+        :param sort: Sort order of the functions, one of SORT_KEYS.
+        :param limit: Number of functions in the report.
+        :return: The report as text.
+        """
+        with self.__lock:
+            profiles = list(self.__profiles)
+        output = io.StringIO()
+        output.write(f'{self.method} {self.path} -> {self.status} in {self.duration_seconds * 1000:.3f} ms\n')
+        stats = pstats.Stats(self.profiler, stream=output)
+        for profile in profiles:
+            stats.add(profile)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+
+class RequestProfiler:
+    """
+    Decides which requests are profiled and keeps the profiles of the most recent ones.
+
+    cProfile records everything running on the profiled thread, so only one request is profiled
+    at a time. Requests arriving meanwhile are not profiled, and other requests interleaving on
+    the event loop show up in the profile.
+
+    Attributes:
+        mode (str): 'off', 'all' for every request, 'sample' for a fraction of the requests or
+            'header' for the requests sending the profile header.
+        sample_rate (float): Fraction of the requests profiled in 'sample' mode.
+        header (bytes): Lower-case name of the header requesting a profile in 'header' mode.
+        __profiles (Deque[RequestProfile]): The most recent profiles, oldest first.
+        __lock (threading.Lock): Guards the profiles.
+        __busy (threading.Lock): Held while a request is being profiled.
+        __ids (Iterator[int]): Numbers of the profiles.
+    """
+
+    def __init__(self, mode: str, sample_rate: float, header: str, max_profiles: int):
+        """
+        Initializes a RequestProfiler.
+
+        :param mode: 'off', 'all', 'sample' or 'header'.
+        :param sample_rate: Fraction of the requests profiled in 'sample' mode.
+        :param header: Name of the header requesting a profile in 'header' mode.
+        :param max_profiles: Number of recent profiles that are kept.
+        :raises ValueError: If the mode is unknown.
+        """
+        if mode not in ('off', 'all', 'sample', 'header'):
+            raise ValueError(f'unknown profile mode: {mode}')
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.header = header.lower().encode('latin-1')
+        self.__profiles: Deque[RequestProfile] = deque(maxlen=max_profiles)
+        self.__lock = threading.Lock()
+        self.__busy = threading.Lock()
+        self.__ids = itertools.count(1)
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether any request can be profiled.
+
+        :return: False in 'off' mode, True otherwise.
+        """
+        return self.mode != 'off'
+
+    def wants(self, headers: Iterable[tuple]) -> bool:
+        """
+        Decides whether a request should be profiled.
+
+        :param headers: Raw headers of the request as pairs of lower-case name and value.
+        :return: True if the mode selects the request, False otherwise.
+        """
+        match self.mode:
+            case 'all':
+                return True
+            case 'sample':
+                return random.random() < self.sample_rate
+            case 'header':
+                return any(name == self.header for name, _ in headers)
+            case _:
+                return False
+
+    def start(self, method: str, path: str) -> Optional[RequestProfile]:
+        """
+        Starts profiling a request on the calling thread, unless another request is being profiled.
+        The profile is bound to the current context, so the work the request runs in the thread
+        pool is added to it.
+
+        :param method: HTTP method of the request.
+        :param path: Path of the request.
+        :return: The started profile, None if the request is not profiled.
+        """
+        if not self.__busy.acquire(blocking=False):
+            return None
+        profile = RequestProfile(next(self.__ids), method, path)
+        try:
+            profile.profiler.enable()
+        except ValueError:
+            # another profiling tool is active on this interpreter
+            self.__busy.release()
+            return None
+        _current_profile.set(profile)
+        return profile
+
+    def stop(self, profile: RequestProfile, status: Optional[int]) -> None:
+        """
+        Stops profiling a request and keeps its profile.
+
+        :param profile: The profile returned by start.
+        :param status: Status code of the response, None if no response was sent.
+        """
+        profile.profiler.disable()
+        _current_profile.set(None)
+        self.__busy.release()
+        profile.finish(status)
+        with self.__lock:
+            self.__profiles.append(profile)
+
+    def profiles(self) -> List[RequestProfile]:
+        """
+        Retrieves the kept profiles.
+
+        :return: The most recent profiles, newest first.
+        """
+        with self.__lock:
+            return list(reversed(self.__profiles))
+
+    def get(self, id: int) -> Optional[RequestProfile]:
+        """
+        Retrieves a kept profile.
+
+        :param id: The number of the profile.
+        :return: The profile, None if it does not exist or has been dropped.
+        """
+        with self.__lock:
+            return next((profile for profile in self.__profiles if profile.id == id), None)
+
+
+def profile_blocking(function: Callable[..., T], *args: Any) -> T:
+    """
+    Run a function, profiling it as part of the request of the current context if that request
+    is being profiled. Used by the thread pool, whose threads the request profiler does not see.
+
+    :param function: The function to run.
+    :param args: Arguments of the function.
+    :return: The result of the function.
+    :raises Exception: Any exception raised by the function.
+    """
+    profile = _current_profile.get()
+    if profile is None:
+        return function(*args)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return function(*args)
+    try:
+        return function(*args)
+    finally:
+        profiler.disable()
+        profile.add(profiler)
+
+
+_profiler: Optional[RequestProfiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_request_profiler() -> RequestProfiler:
+    """
+    Return the process-wide request profiler, configured on first use.
+
+    :return: The shared request profiler.
+    """
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = RequestProfiler(Config.PROFILE_MODE, Config.PROFILE_SAMPLE_RATE, Config.PROFILE_HEADER,
+                                            Config.PROFILE_BUFFER_SIZE)
+    return _profiler
@@ -0,0 +1,488 @@
+import atexit
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, TypeVar
+
+from utils.config_utils import Config
+
+F = TypeVar('F', bound=Callable)
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar(
+    'leasebot_current_span', default=None
+)
+
+
+class Trace:
+    """
+    The spans recorded for one request, or for one unit of work started outside a request.
+
+    Attributes:
+        trace_id (str): Random ID of the trace.
+        started_at (datetime): Time the root span started.
+        spans (List[Span]): The finished spans, children before their parents.
+        __span_ids (Iterator[int]): Numbers of the spans within the trace.
+        __lock (threading.Lock): Guards the spans, which threads of the pool add concurrently.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty Trace.
+        """
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.started_at = datetime.now()
+        self.spans: List[Span] = []
+        self.__span_ids = itertools.count(1)
+        self.__lock = threading.Lock()
+
+    def next_span_id(self) -> int:
+        """
+        Allocates the number of a new span.
+
+        :return: The number of the span, 1 for the root span.
+        """
+        with self.__lock:
+            return next(self.__span_ids)
+
+    def add(self, span: 'Span') -> None:
+        """
+        Adds a finished span.
+
+        :param span: The finished span.
+        """
+        with self.__lock:
+            self.spans.append(span)
+
+    def to_json_data(self) -> Dict[str, Any]:
+        """
+        Serializes the trace with its spans ordered by their start.
+
+        :return: The trace as JSON compatible data.
+        """
+        with self.__lock:
+            spans = sorted(self.spans, key=lambda span: span.started)
+        root = next((span for span in spans if span.parent is None), None)
+        origin = root.started if root is not None else spans[0].started
+        return {
+            'trace_id': self.trace_id,
+            'name': root.name if root is not None else '',
+            'started_at': self.started_at.isoformat(),
+            'duration_ms': root.duration_seconds * 1000 if root is not None else 0.0,
+            'spans': [span.to_json_data(origin) for span in spans],
+        }
+
+
+class Span:
+    """
+    A timed stage of a trace, nested in the span that was current when it started.
+
+    Attributes:
+        name (str): Name of the stage, like Bot.respond_to.
+        trace (Trace): The trace the span belongs to.
+        span_id (int): Number of the span within the trace.
+        parent (Optional[Span]): The enclosing span, None for the root span.
+        attributes (Dict[str, Any]): Details of the stage, like the chat ID or the state.
+        thread (str): Name of the thread the span ran on.
+        started (float): perf_counter value at the start of the span.
+        duration_seconds (float): Duration of the span, 0 until it has ended.
+        error (Optional[str]): Type of the exception the stage ended with, None if it succeeded.
+    """
+    __slots__ = ('name', 'trace', 'span_id', 'parent', 'attributes', 'thread', 'started', 'duration_seconds',
+                 'error')
+
+    def __init__(self, name: str, trace: Trace, parent: Optional['Span'], attributes: Dict[str, Any]):
+        """
+        Initializes a Span starting now.
+
+        :param name: Name of the stage.
+        :param trace: The trace the span belongs to.
+        :param parent: The enclosing span, None for the root span.
+        :param attributes: Details of the stage.
+        """
+        self.name = name
+        self.trace = trace
+        self.span_id = trace.next_span_id()
+        self.parent = parent
+        self.attributes = attributes
+        self.thread = threading.current_thread().name
+        self.duration_seconds = 0.0
+        self.error: Optional[str] = None
+        self.started = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Adds a detail to the span.
+
+        :param key: Name of the detail.
+        :param value: JSON compatible value of the detail.
+        """
+        self.attributes[key] = value
+
+    def to_json_data(self, origin: float) -> Dict[str, Any]:
+        """
+        Serializes the span.
+
+        :param origin: perf_counter value the start of the span is given relative to.
+        :return: The span as JSON compatible data.
+        """
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent.span_id if self.parent is not None else None,
+            'name': self.name,
+            'thread': self.thread,
+            'start_ms': (self.started - origin) * 1000,
+            'duration_ms': self.duration_seconds * 1000,
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+class SpanScope:
+    """
+    Context manager starting a span on entering and ending it on exit.
+
+    Attributes:
+        __tracer (Tracer): The tracer recording the span.
+        __name (str): Name of the span.
+        __attributes (Dict[str, Any]): Details of the span.
+        __span (Optional[Span]): The started span, None before entering.
+    """
+    __slots__ = ('__tracer', '__name', '__attributes', '__span')
+
+    def __init__(self, tracer: 'Tracer', name: str, attributes: Dict[str, Any]):
+        """
+        Initializes a SpanScope.
+
+        :param tracer: The tracer recording the span.
+        :param name: Name of the span.
+        :param attributes: Details of the span.
+        """
+        self.__tracer = tracer
+        self.__name = name
+        self.__attributes = attributes
+        self.__span: Optional[Span] = None
+
+    def __enter__(self) -> Span:
+        """
+        Starts the span as child of the current span.
+
+        :return: The started span.
+        """
+        self.__span = self.__tracer.start(self.__name, **self.__attributes)
+        return self.__span
+
+    def __exit__(self, exception_type, exception, traceback) -> None:
+        """
+        Ends the span, recording the type of the exception if the stage failed.
+        """
+        self.__tracer.end(self.__span, exception)
+
+
+class NoSpanScope:
+    """
+    Context manager used instead of a SpanScope while tracing is disabled.
+    """
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        """
+        Does nothing.
+        """
+        return None
+
+    def __exit__(self, exception_type, exception, traceback) -> None:
+        """
+        Does nothing.
+        """
+
+
+class JsonLinesExporter:
+    """
+    Appends finished traces to a JSON lines file from a background thread, so the event loop
+    never waits for the file.
+
+    Attributes:
+        path (str): The file the traces are appended to.
+        __queue (queue.SimpleQueue): Finished traces waiting to be written, None stops the writer.
+        __logger (Logger): Logs failed writes.
+        __writer (threading.Thread): The background thread writing the traces.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initializes a JsonLinesExporter and starts its writer thread.
+
+        :param path: The file the traces are appended to.
+        """
+        self.path = path
+        self.__queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.__logger = logging.getLogger(__name__)
+        self.__writer = threading.Thread(target=self.__run, name='trace-writer', daemon=True)
+        self.__writer.start()
+        atexit.register(self.close)
+
+    def export(self, trace: Trace) -> None:
+        """
+        Queues a finished trace for writing.
+
+        :param trace: The finished trace.
+        """
+        self.__queue.put(trace)
+
+    def close(self) -> None:
+        """
+        Writes the queued traces and stops the writer thread.
+        """
+        if self.__writer.is_alive():
+            self.__queue.put(None)
+            self.__writer.join()
+        atexit.unregister(self.close)
+
+    def __run(self) -> None:
+        """
+        Writes the queued traces until the exporter is closed, one line per trace.
+        """
+        while True:
+            trace = self.__queue.get()
+            if trace is None:
+                return
+            traces = [trace]
+            # write everything queued meanwhile with a single write
+            while not self.__queue.empty():
+                trace = self.__queue.get()
+                if trace is None:
+                    self.__write(traces)
+                    return
+                traces.append(trace)
+            self.__write(traces)
+
+    def __write(self, traces: List[Trace]) -> None:
+        """
+        Appends traces to the file.
+
+        :param traces: The finished traces.
+        """
+        try:
+            with open(self.path, 'a') as file:
+                file.write(''.join(json.dumps(trace.to_json_data(), default=str) + '\n' for trace in traces))
+        except OSError:
+            self.__logger.exception(f'writing {len(traces)} traces to {self.path} failed')
+
+
+class Tracer:
+    """
+    Records nested spans of the requests and keeps the traces of the most recent ones.
+
+    The current span is kept in a context variable, so spans started in the thread pool of
+    run_blocking nest in the span of the request that submitted the work. A trace is finished
+    when its root span ends, it is kept if it took at least the minimum duration.
+
+    The mode may be changed while the application is running, spans are recorded according to
+    the mode at the time they start.
+
+    Attributes:
+        mode (str): 'off', 'memory' to keep the recent traces, or 'file' to also append them to a
+            JSON lines file.
+        min_duration_seconds (float): Traces finishing faster are dropped.
+        __traces (Deque[Trace]): The most recent traces, oldest first.
+        __lock (threading.Lock): Guards the traces and the creation of the exporter.
+        __path (Optional[str]): The JSON lines file of the 'file' mode.
+        __exporter (Optional[JsonLinesExporter]): Writes the traces, created once the first trace is
+            finished in 'file' mode.
+    """
+
+    def __init__(self, mode: str, max_traces: int, min_duration_seconds: float = 0, path: Optional[str] = None):
+        """
+        Initializes a Tracer.
+
+        :param mode: 'off', 'memory' or 'file'.
+        :param max_traces: Number of recent traces that are kept in memory.
+        :param min_duration_seconds: Traces finishing faster are dropped.
+        :param path: The JSON lines file of the 'file' mode.
+        :raises ValueError: If the mode is unknown, or if the 'file' mode has no path.
+        """
+        if mode not in ('off', 'memory', 'file'):
+            raise ValueError(f'unknown trace mode: {mode}')
+        if mode == 'file' and not path:
+            raise ValueError('the file trace mode needs a path')
+        self.mode = mode
+        self.min_duration_seconds = min_duration_seconds
+        self.__traces: Deque[Trace] = deque(maxlen=max_traces)
+        self.__lock = threading.Lock()
+        self.__path = path
+        self.__exporter: Optional[JsonLinesExporter] = None
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether spans are recorded.
+
+        :return: False in 'off' mode, True otherwise.
+        """
+        return self.mode != 'off'
+
+    def span(self, name: str, **attributes: Any):
+        """
+        Creates a context manager recording a span around a block.
+
+        :param name: Name of the span.
+        :param attributes: Details of the span.
+        :return: A SpanScope, or a NoSpanScope recording nothing if tracing is disabled.
+        """
+        if self.mode == 'off':
+            return _NO_SPAN_SCOPE
+        return SpanScope(self, name, attributes)
+
+    def start(self, name: str, **attributes: Any) -> Span:
+        """
+        Starts a span as child of the current span and makes it the current span. Without a
+        current span it starts a new trace.
+
+        :param name: Name of the span.
+        :param attributes: Details of the span.
+        :return: The started span, which has to be ended with end.
+        """
+        parent = _current_span.get()
+        span = Span(name, parent.trace if parent is not None else Trace(), parent, attributes)
+        _current_span.set(span)
+        return span
+
+    def end(self, span: Span, exception: Optional[BaseException] = None) -> None:
+        """
+        Ends a span and makes its parent the current span again. Ending the root span finishes
+        the trace.
+
+        :param span: The span returned by start.
+        :param exception: The exception the stage ended with, None if it succeeded.
+        """
+        span.duration_seconds = time.perf_counter() - span.started
+        if exception is not None:
+            span.error = type(exception).__name__
+        span.trace.add(span)
+        _current_span.set(span.parent)
+        if span.parent is None and span.duration_seconds >= self.min_duration_seconds:
+            self.__finish(span.trace)
+
+    def traces(self, min_duration_seconds: float = 0) -> List[Trace]:
+        """
+        Retrieves the kept traces.
+
+        :param min_duration_seconds: Only traces taking at least this long are returned.
+        :return: The most recent traces, newest first.
+        """
+        with self.__lock:
+            traces = list(reversed(self.__traces))
+        return [trace for trace in traces if self.__duration(trace) >= min_duration_seconds]
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        """
+        Retrieves a kept trace.
+
+        :param trace_id: The ID of the trace.
+        :return: The trace, None if it does not exist or has been dropped.
+        """
+        with self.__lock:
+            return next((trace for trace in self.__traces if trace.trace_id == trace_id), None)
+
+    def close(self) -> None:
+        """
+        Writes the exported traces that are still queued.
+        """
+        if self.__exporter is not None:
+            self.__exporter.close()
+
+    def __finish(self, trace: Trace) -> None:
+        """
+        Keeps a finished trace and exports it.
+
+        :param trace: The trace whose root span has ended.
+        """
+        with self.__lock:
+            self.__traces.append(trace)
+            if self.mode == 'file' and self.__path and self.__exporter is None:
+                self.__exporter = JsonLinesExporter(self.__path)
+            exporter = self.__exporter if self.mode == 'file' else None
+        if exporter is not None:
+            exporter.export(trace)
+
+    @staticmethod
+    def __duration(trace: Trace) -> float:
+        """
+        Retrieves the duration of a finished trace.
+
+        :param trace: The finished trace.
+        :return: The duration of its root span in seconds.
+        """
+        return max((span.duration_seconds for span in trace.spans if span.parent is None), default=0.0)
+
+
+def traced(name: Optional[str] = None, attributes: Sequence[str] = ()) -> Callable[[F], F]:
+    """
+    Decorator recording a span around every call of a function or coroutine function. Whether
+    tracing is enabled is checked on every call, so changing the mode of the tracer takes effect
+    right away, and a disabled tracer only costs that check.
+
+    :param name: Name of the span, the qualified name of the function if not given.
+    :param attributes: Names of parameters whose arguments are recorded as details of the span.
+    :return: The decorator.
+    """
+    def decorator(function: F) -> F:
+        tracer = get_tracer()
+        span_name = name or function.__qualname__
+        parameters = list(inspect.signature(function).parameters)
+        positions = [(attribute, parameters.index(attribute)) for attribute in attributes]
+
+        def span_attributes(args: tuple, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+            return {attribute: kwargs[attribute] if attribute in kwargs else args[position]
+                    for attribute, position in positions if attribute in kwargs or position < len(args)}
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                if tracer.mode == 'off':
+                    return await function(*args, **kwargs)
+                with tracer.span(span_name, **span_attributes(args, kwargs)):
+                    return await function(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if tracer.mode == 'off':
+                return function(*args, **kwargs)
+            with tracer.span(span_name, **span_attributes(args, kwargs)):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+_NO_SPAN_SCOPE = NoSpanScope()
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Return the process-wide tracer, configured on first use.
+
+    :return: The shared tracer.
+    """
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(Config.TRACE_MODE, Config.TRACE_BUFFER_SIZE, Config.TRACE_MIN_DURATION_MS / 1000,
+                                 Config.TRACE_FILE)
+    return _tracer
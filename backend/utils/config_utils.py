@@ -0,0 +1,69 @@
+import os
+
+from utils.fs_utils import Paths
+
+
+def env_int(name: str, default: int) -> int:
+    """
+    Read an integer setting from the environment.
+
+    :param name: Name of the environment variable.
+    :param default: Value to use if the variable is not set.
+    :return: The configured integer.
+    """
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def env_float(name: str, default: float) -> float:
+    """
+    Read a floating point setting from the environment.
+
+    :param name: Name of the environment variable.
+    :param default: Value to use if the variable is not set.
+    :return: The configured number.
+    """
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def env_str(name: str, default: str) -> str:
+    """
+    Read a text setting from the environment.
+
+    :param name: Name of the environment variable.
+    :param default: Value to use if the variable is not set.
+    :return: The configured text.
+    """
+    return os.environ.get(name) or default
+
+
+class Config:
+    WORKERS = env_int('LEASEBOT_WORKERS', 1)
+    SESSION_TTL_SECONDS = env_float('LEASEBOT_SESSION_TTL_SECONDS', 30 * 60)
+    SESSION_SWEEP_INTERVAL_SECONDS = env_float('LEASEBOT_SESSION_SWEEP_INTERVAL_SECONDS', 60)
+    MAX_SESSIONS = env_int('LEASEBOT_MAX_SESSIONS', 10_000)
+    PRESENCE_HEARTBEAT_SECONDS = env_float('LEASEBOT_PRESENCE_HEARTBEAT_SECONDS', 15)
+    PRESENCE_SYNC_INTERVAL_SECONDS = env_float('LEASEBOT_PRESENCE_SYNC_INTERVAL_SECONDS', 2)
+    SUMMARY_BACKEND = env_str('LEASEBOT_SUMMARY_BACKEND', 'sqlite')
+    SUMMARY_DATABASE = env_str('LEASEBOT_SUMMARY_DATABASE', Paths.SUMMARY_DATABASE)
+    RENDERED_SUMMARY_CACHE_SIZE = env_int('LEASEBOT_RENDERED_SUMMARY_CACHE_SIZE', 256)
+    SUMMARY_WRITE_MODE = env_str('LEASEBOT_SUMMARY_WRITE_MODE', 'behind')
+    SUMMARY_FLUSH_INTERVAL_SECONDS = env_float('LEASEBOT_SUMMARY_FLUSH_INTERVAL_SECONDS', 0.05)
+    SUMMARY_FLUSH_BATCH_SIZE = env_int('LEASEBOT_SUMMARY_FLUSH_BATCH_SIZE', 256)
+    BOT_STATE_STORE = env_str('LEASEBOT_BOT_STATE_STORE', 'memory')
+    BOT_STATE_DATABASE = env_str('LEASEBOT_BOT_STATE_DATABASE', Paths.CHAT_DATABASE)
+    APPEND_ATTEMPTS = env_int('LEASEBOT_APPEND_ATTEMPTS', 3)
+    APPEND_LEASE_SECONDS = env_float('LEASEBOT_APPEND_LEASE_SECONDS', 30)
+    DUPLICATE_WINDOW_MESSAGES = env_int('LEASEBOT_DUPLICATE_WINDOW_MESSAGES', 32)
+    SUMMARY_INDEX_TTL_SECONDS = env_float('LEASEBOT_SUMMARY_INDEX_TTL_SECONDS', 0 if WORKERS == 1 else 5)
+    BLOCKING_THREADS = env_int('LEASEBOT_BLOCKING_THREADS', 16)
+    PROFILE_MODE = env_str('LEASEBOT_PROFILE_MODE', 'off')
+    PROFILE_SAMPLE_RATE = env_float('LEASEBOT_PROFILE_SAMPLE_RATE', 0.01)
+    PROFILE_HEADER = env_str('LEASEBOT_PROFILE_HEADER', 'X-Profile')
+    PROFILE_BUFFER_SIZE = env_int('LEASEBOT_PROFILE_BUFFER_SIZE', 20)
+    TRACEMALLOC_FRAMES = env_int('LEASEBOT_TRACEMALLOC_FRAMES', 0)
+    TRACE_MODE = env_str('LEASEBOT_TRACE_MODE', 'off')
+    TRACE_BUFFER_SIZE = env_int('LEASEBOT_TRACE_BUFFER_SIZE', 100)
+    TRACE_MIN_DURATION_MS = env_float('LEASEBOT_TRACE_MIN_DURATION_MS', 0)
+    TRACE_FILE = env_str('LEASEBOT_TRACE_FILE', 'logs/traces.jsonl')
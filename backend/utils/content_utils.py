@@ -0,0 +1,64 @@
+import threading
+from typing import Optional
+
+from datastructures.BotContent import BotContent
+from utils.fs_utils import read_json, Paths
+
+_content: Optional[BotContent] = None
+_content_lock = threading.Lock()
+
+
+def get_bot_content() -> BotContent:
+    """
+    Return the process-wide bot content, loading it from the bot_data directory on first use.
+
+    :return: The shared, immutable bot content.
+    """
+    content = _content
+    if content is None:
+        with _content_lock:
+            content = _content if _content is not None else _swap_content(load_bot_content())
+    return content
+
+
+def reload_bot_content() -> BotContent:
+    """
+    Re-read the bot_data directory and replace the shared bot content.
+
+    Bots created afterwards use the new content, including bots restored from a snapshot to
+    continue a conversation. Running bots keep the content they were created with.
+
+    :return: The newly loaded bot content.
+    :raises InvalidStateMachineException: If the content does not fit the states, the current content is kept.
+    """
+    content = load_bot_content()
+    with _content_lock:
+        return _swap_content(content)
+
+
+def load_bot_content() -> BotContent:
+    """
+    Read and freeze the JSON files in the bot_data directory.
+
+    :return: The loaded bot content.
+    :raises FileNotFoundError: If one of the JSON files does not exist.
+    :raises InvalidStateMachineException: If the content does not fit the states.
+    """
+    return BotContent.from_json_data(
+        questions=read_json(Paths.BOT_QUESTIONS),
+        fallbacks=read_json(Paths.BOT_FALLBACKS),
+        transitions=read_json(Paths.BOT_TRANSITIONS),
+        greetings=read_json(Paths.BOT_GREETINGS),
+    )
+
+
+def _swap_content(content: BotContent) -> BotContent:
+    """
+    Replace the shared bot content. Must be called while holding the content lock.
+
+    :param content: The content to share from now on.
+    :return: The given content.
+    """
+    global _content
+    _content = content
+    return content
@@ -0,0 +1,65 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from utils.RequestProfiler import profile_blocking
+from utils.config_utils import Config
+
+T = TypeVar('T')
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """
+    Return the process-wide thread pool for blocking work, creating it on first use.
+
+    :return: The shared thread pool, bounded by the configured number of threads.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=Config.BLOCKING_THREADS, thread_name_prefix='leasebot')
+    return _executor
+
+
+async def run_blocking(function: Callable[..., T], *args: Any) -> T:
+    """
+    Run a blocking function in the shared thread pool, so the event loop keeps serving other
+    requests meanwhile. The function sees the context variables of the caller, and is profiled
+    with the request of the caller if that request is being profiled.
+
+    A running function cannot be stopped. If the caller is cancelled, it still waits for the
+    function to finish, so locks held by the caller keep guarding the data the function uses.
+
+    :param function: The function to run.
+    :param args: Arguments of the function.
+    :return: The result of the function.
+    :raises Exception: Any exception raised by the function.
+    """
+    context = contextvars.copy_context()
+    future = asyncio.get_running_loop().run_in_executor(
+        get_blocking_executor(), functools.partial(context.run, profile_blocking, function, *args)
+    )
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        raise
+
+
+def shutdown_blocking_executor() -> None:
+    """
+    Wait for the submitted work to finish and stop the shared thread pool. A new pool is
+    created on the next use.
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
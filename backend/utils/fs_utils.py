@@ -1,8 +1,16 @@
+import fcntl
 import json
 import os
-import random
 import re
-from typing import Any, Dict, List
+import time
+import uuid
+from typing import Any, Dict, Iterable, List
+
+from utils.MetricsRegistry import get_metrics_registry, timed
+
+_fs_seconds = get_metrics_registry().histogram(
+    'leasebot_fs_operation_duration_seconds', 'Time spent in file system operations, by operation', ('operation',)
+)
 
 
 class Paths:
@@ -13,7 +21,13 @@ class Paths:
     BOT_GREETINGS = f'{BOT_DATA_DIR}/greetings.json'
 
     SUMMARY_DIR = 'summaries'
+    SUMMARY_DATABASE = f'{SUMMARY_DIR}/summaries.db'
     SUMMARY_PATTERN = r'summary_(\d{2}).json'
+    SUMMARY_MAX_ID = 99
+    RESERVATION_TIMEOUT_SECONDS = 300
+
+    CHAT_DIR = 'chats'
+    CHAT_DATABASE = f'{CHAT_DIR}/chats.db'
 
 
 def read_summary_with_id(id: int) -> Any:
@@ -39,6 +53,7 @@ def summary_name_from_id(id: int) -> str:
     return f'summary_{id:02}.json'
 
 
+@timed(_fs_seconds.labels('read_json'))
 def read_json(path: str) -> Any:
     """
     Read and parse JSON data from a file.
@@ -53,6 +68,7 @@ def read_json(path: str) -> Any:
         return json.load(file)
 
 
+@timed(_fs_seconds.labels('save_json'))
 def save_json(data: Dict) -> int:
     """
     Save data to a JSON file and return its assigned ID.
@@ -61,32 +77,178 @@ def save_json(data: Dict) -> int:
     :return: The ID assigned to the saved summary.
 
     """
-    id = next_free_id()
-    summary_name = summary_name_from_id(id)
-    path = os.path.join(Paths.SUMMARY_DIR, summary_name)
-    with open(path, 'w') as file:
-        json.dump(data, file, indent=2)
+    id = reserve_summary_id(saved_summary_ids())
+    write_summary_with_id(id, data)
     return id
 
 
-def next_free_id() -> int:
+def summary_path_from_id(id: int) -> str:
+    """
+    Generate the path of the summary file from its ID.
+
+    :param id: The ID of the summary.
+    :return: The path of the summary file.
+    """
+    return os.path.join(Paths.SUMMARY_DIR, summary_name_from_id(id))
+
+
+def reservation_path_from_id(id: int) -> str:
+    """
+    Generate the path of the file reserving a summary ID.
+
+    :param id: The ID of the summary.
+    :return: The path of the reservation file.
+    """
+    return os.path.join(Paths.SUMMARY_DIR, f'.summary_{id:02}.reserved')
+
+
+def takeover_lock_path_from_id(id: int) -> str:
+    """
+    Generate the path of the file locked while a stale reservation of a summary ID is taken over.
+
+    :param id: The ID of the summary.
+    :return: The path of the lock file.
+    """
+    return os.path.join(Paths.SUMMARY_DIR, f'.summary_{id:02}.lock')
+
+
+@timed(_fs_seconds.labels('write_summary_with_id'))
+def write_summary_with_id(id: int, data: Dict) -> None:
+    """
+    Write data to the summary JSON file with the given ID, replacing an existing summary,
+    and release the reservation of the ID.
+
+    The data is written to a temporary file first, which then replaces the summary file in
+    one atomic step, so readers never see a partially written summary. The temporary file is
+    created with the permissions open gives new files, so the summary file gets them as well.
+    The reservation is released even if the write fails.
+
+    :param id: The ID of the summary to write.
+    :param data: The data to save.
+    """
+    try:
+        temporary_path = os.path.join(Paths.SUMMARY_DIR, f'.summary_{uuid.uuid4().hex}.tmp')
+        descriptor = os.open(temporary_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+        try:
+            with os.fdopen(descriptor, 'w') as file:
+                json.dump(data, file, indent=2)
+            os.replace(temporary_path, summary_path_from_id(id))
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+    finally:
+        release_summary_id(id)
+
+
+@timed(_fs_seconds.labels('remove_summary_with_id'))
+def remove_summary_with_id(id: int) -> None:
+    """
+    Remove the summary JSON file with the given ID.
+
+    :param id: The ID of the summary to remove.
+    :raises FileNotFoundError: If the summary file does not exist.
+    """
+    os.remove(summary_path_from_id(id))
+
+
+@timed(_fs_seconds.labels('reserve_summary_id'))
+def reserve_summary_id(taken_ids: Iterable[int]) -> int:
+    """
+    Reserve the smallest free summary ID, atomically across threads and processes.
+
+    An ID is reserved by exclusively creating its reservation file, which succeeds for one
+    caller only. IDs known to be taken are skipped without touching the file system. Saved
+    summaries are never replaced, so once all IDs are in use no further summary can be saved.
+
+    :param taken_ids: IDs of the saved summaries known to the caller.
+    :return: The reserved ID.
+    :raises IOError: If every ID is in use or reserved by another writer.
+    """
+    id_set = set(taken_ids)
+    for id in range(1, Paths.SUMMARY_MAX_ID + 1):
+        if id not in id_set and try_reserve_summary_id(id):
+            return id
+    raise IOError('No summary id available')
+
+
+def try_reserve_summary_id(id: int) -> bool:
+    """
+    Try to reserve a summary ID by exclusively creating its reservation file.
+
+    Reservations older than Paths.RESERVATION_TIMEOUT_SECONDS are left over by crashed
+    writers and are taken over, see take_over_stale_reservation.
+
+    :param id: The ID to reserve.
+    :return: True if the ID was reserved, False if it is reserved or a summary with this ID exists.
     """
-    Find the next available ID for saving a summary.
+    reservation_path = reservation_path_from_id(id)
+    try:
+        os.close(os.open(reservation_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+    except FileExistsError:
+        if not is_stale_reservation(reservation_path) or not take_over_stale_reservation(id):
+            return False
 
-    :return: The next available ID.
+    if os.path.exists(summary_path_from_id(id)):
+        release_summary_id(id)
+        return False
+    return True
+
+
+def take_over_stale_reservation(id: int) -> bool:
     """
-    id_set = set(saved_summary_ids())
-    smallest_id = 1
+    Take over the reservation of a summary ID left over by a crashed writer, atomically across processes.
 
-    while smallest_id in id_set:
-        smallest_id += 1
+    The callers taking over the ID hold an exclusive lock on its lock file, so only one of them
+    checks the reservation and replaces it at a time. The stale reservation is removed and created
+    again exclusively, so a caller reserving the ID in between without taking it over wins instead,
+    and every ID has a single owner.
 
-    if smallest_id >= 100:
-        return remove_random_summary()
+    :param id: The ID with a stale reservation.
+    :return: True if the reservation was taken over, False if another caller was faster.
+    """
+    reservation_path = reservation_path_from_id(id)
+    descriptor = os.open(takeover_lock_path_from_id(id), os.O_CREAT | os.O_RDWR, 0o666)
+    try:
+        fcntl.flock(descriptor, fcntl.LOCK_EX)
+        if not is_stale_reservation(reservation_path):
+            return False
+        release_summary_id(id)
+        try:
+            os.close(os.open(reservation_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+        except FileExistsError:
+            return False
+        return True
+    finally:
+        os.close(descriptor)
 
-    return smallest_id
 
+def is_stale_reservation(reservation_path: str) -> bool:
+    """
+    Check whether a reservation file has been left over by a crashed writer.
 
+    :param reservation_path: The path of the reservation file.
+    :return: True if the reservation is older than the timeout, False otherwise.
+    """
+    try:
+        age = time.time() - os.path.getmtime(reservation_path)
+    except FileNotFoundError:
+        return False
+    return age > Paths.RESERVATION_TIMEOUT_SECONDS
+
+
+def release_summary_id(id: int) -> None:
+    """
+    Release the reservation of a summary ID.
+
+    :param id: The reserved ID.
+    """
+    try:
+        os.remove(reservation_path_from_id(id))
+    except FileNotFoundError:
+        pass
+
+
+@timed(_fs_seconds.labels('saved_summary_ids'))
 def saved_summary_ids() -> List[int]:
     """
     Retrieve a list of IDs of saved summaries.
@@ -102,16 +264,3 @@ def saved_summary_ids() -> List[int]:
             number = int(match.group(1))
             summary_numbers.append(number)
     return summary_numbers
-
-
-def remove_random_summary() -> int:
-    """
-    Remove a randomly selected summary file and return its ID.
-
-    :return: The ID of the removed summary.
-    """
-    id = random.randint(1, 99)
-    summary_name = summary_name_from_id(id)
-    path = os.path.join(Paths.SUMMARY_DIR, summary_name)
-    os.remove(path)
-    return id
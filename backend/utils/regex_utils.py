@@ -1,12 +1,17 @@
 import re
 from datetime import datetime
+from typing import Optional
 
+from utils.Tracer import traced
 
-def find_summary_id(content: str) -> int:
+
+@traced()
+def find_summary_id(content: str, max_id: Optional[int] = 99) -> int:
     """
     Find the first valid summary ID in the given content.
 
     :param content: The text to search for a summary ID.
+    :param max_id: The highest valid summary ID, None if IDs are unbounded.
     :return int: The found summary ID.
     :raises ValueError: If no valid summary ID is found.
     """
@@ -15,11 +20,12 @@ def find_summary_id(content: str) -> int:
 
     for match in matches:
         number = int(match)
-        if number < 100:  # Check if the number is a valid summary ID
+        if max_id is None or number <= max_id:  # Check if the number is a valid summary ID
             return number
     raise ValueError('No id given')  # Raise error if no valid ID is found
 
 
+@traced()
 def find_date(content: str) -> datetime:
     """
     Find the first valid date in DD-MM-YYYY format in the given content.
@@ -40,6 +46,7 @@ def find_date(content: str) -> datetime:
     raise ValueError('No valid date found')  # Raise error if no valid date is found
 
 
+@traced()
 def find_number(content: str) -> int:
     """
     Find the first valid integer number in the given content.
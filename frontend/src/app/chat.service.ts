@@ -1,5 +1,6 @@
 import {Injectable} from '@angular/core';
-import {catchError, Observable, of} from "rxjs";
+import {catchError, concatMap, from, Observable, of, Subject, Subscription, take, tap} from "rxjs";
+import {webSocket, WebSocketSubject} from "rxjs/webSocket";
 import {ChatSession} from "./models/chat-session";
 import {HttpClient, HttpHeaders} from "@angular/common/http";
 import {Message} from "./models/message";
@@ -24,15 +25,30 @@ import {Router} from "@angular/router";
  * (c) 2024 Technische Hochschule Deggendorf. All rights reserved.
  */
 
+interface PendingMessage {
+  chatId: number;
+  message: Message;
+  response: Subject<Message>;
+}
+
 @Injectable({
   providedIn: 'root'
 })
 export class ChatService {
   private readonly SERVICE_ROUTE: string = '/chats';
+  private readonly SOCKET_RETRY_MIN_MS: number = 1000;
+  private readonly SOCKET_RETRY_MAX_MS: number = 60000;
   private readonly SERVICE_URL: string;
+  private readonly SOCKET_URL: string;
   private httpOptions = {
     headers: new HttpHeaders({'Content-Type': 'application/json'})
   }
+  private socket?: WebSocketSubject<Message>;
+  private socketSubscription?: Subscription;
+  private socketChatId?: number;
+  private socketRetryDelayMs: number = this.SOCKET_RETRY_MIN_MS;
+  private socketRetryAt: number = 0;
+  private pendingMessages: PendingMessage[] = [];
 
   constructor(
     private http: HttpClient,
@@ -41,6 +57,7 @@ export class ChatService {
     private notificationService: NotificationService,
   ) {
     this.SERVICE_URL = this.configService.getApiHost() + this.SERVICE_ROUTE;
+    this.SOCKET_URL = this.SERVICE_URL.replace(/^http/, 'ws');
   }
 
   createChatSessionFromName(name: string): Observable<number> {
@@ -59,7 +76,27 @@ export class ChatService {
       );
   }
 
+  // the client id lets the backend answer a message only once, even if it is sent again over REST
   sendMessage(chatId: number, message: Message): Observable<Message> {
+    message.client_id ??= `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    const socket = this.getSocket(chatId);
+    if (!socket) {
+      return this.postMessage(chatId, message);
+    }
+    const response = new Subject<Message>();
+    this.pendingMessages.push({chatId, message, response});
+    socket.next(message);
+    return response.pipe(take(1));
+  }
+
+  disconnect(): void {
+    const pendingMessages = this.pendingMessages;
+    this.socketSubscription?.unsubscribe();
+    this.resetSocket();
+    pendingMessages.forEach(pending => pending.response.complete());
+  }
+
+  private postMessage(chatId: number, message: Message): Observable<Message> {
     const url = `${this.SERVICE_URL}/id/${chatId}/message`;
     return this.http.post<Message>(url, message, this.httpOptions)
       .pipe(
@@ -67,6 +104,50 @@ export class ChatService {
       )
   }
 
+  private getSocket(chatId: number): WebSocketSubject<Message> | undefined {
+    if (Date.now() < this.socketRetryAt || typeof WebSocket === 'undefined') {
+      return undefined;
+    }
+    if (this.socket && this.socketChatId === chatId) {
+      return this.socket;
+    }
+    this.disconnect();
+    const socket = webSocket<Message>(`${this.SOCKET_URL}/id/${chatId}/ws`);
+    this.socketSubscription = socket.subscribe({
+      next: (response: Message) => {
+        this.socketRetryDelayMs = this.SOCKET_RETRY_MIN_MS;
+        this.pendingMessages.shift()?.response.next(response);
+      },
+      error: (error: any) => this.failSocket(error),
+      complete: () => this.failSocket(new Error('Connection closed')),
+    });
+    this.socket = socket;
+    this.socketChatId = chatId;
+    return socket;
+  }
+
+  // messages are sent over REST until the socket is opened again, after a delay doubling with every failure;
+  // unanswered messages are sent once more over REST, the backend answers those it already got with the same response
+  private failSocket(error: any): void {
+    const pendingMessages = this.pendingMessages;
+    this.resetSocket();
+    this.socketRetryAt = Date.now() + this.socketRetryDelayMs;
+    this.socketRetryDelayMs = Math.min(this.socketRetryDelayMs * 2, this.SOCKET_RETRY_MAX_MS);
+    console.warn('Chat socket failed, sending the unanswered messages over REST', error);
+    from(pendingMessages).pipe(
+      concatMap(pending => this.postMessage(pending.chatId, pending.message).pipe(
+        tap(response => pending.response.next(response))
+      ))
+    ).subscribe();
+  }
+
+  private resetSocket(): void {
+    this.socket = undefined;
+    this.socketSubscription = undefined;
+    this.socketChatId = undefined;
+    this.pendingMessages = [];
+  }
+
   private handleError<T>(operation = 'operation', result?: T) {
     return (error: any): Observable<T> => {
       console.error(error);
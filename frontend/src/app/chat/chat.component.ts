@@ -1,4 +1,4 @@
-import {Component, ElementRef, OnInit, ViewChild} from '@angular/core';
+import {Component, ElementRef, OnDestroy, OnInit, ViewChild} from '@angular/core';
 import {ChatService} from "../chat.service";
 import {Router} from "@angular/router";
 import {ChatSession} from "../models/chat-session";
@@ -48,7 +48,7 @@ import {ChatStorageService} from "../chat-storage.service";
   ],
   styleUrls: ['./chat.component.css']
 })
-export class ChatComponent implements OnInit {
+export class ChatComponent implements OnInit, OnDestroy {
   private chatId: number;
   private chatSession?: ChatSession;
   protected user?: User;
@@ -68,6 +68,10 @@ export class ChatComponent implements OnInit {
     this.getChat();
   }
 
+  ngOnDestroy(): void {
+    this.chatService.disconnect();
+  }
+
   private getChat(): void {
     this.chatId = this.chatStorageService.getId();
     if (this.chatId !== 0) {
@@ -20,4 +20,5 @@ export interface Message {
   sender: string,
   content: string
   is_bot_message: boolean
+  client_id?: string
 }
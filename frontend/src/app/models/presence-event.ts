@@ -0,0 +1,11 @@
+import {User} from "./user";
+
+export interface PresenceEntry {
+  chat_id: number,
+  user: User
+}
+
+export interface PresenceEvent {
+  event: 'snapshot' | 'join' | 'leave',
+  entries: PresenceEntry[]
+}
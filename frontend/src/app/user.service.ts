@@ -2,6 +2,7 @@ import {Injectable} from '@angular/core';
 import {HttpClient} from "@angular/common/http";
 import {catchError, Observable, of} from "rxjs";
 import {User} from "./models/user";
+import {PresenceEvent} from "./models/presence-event";
 import {NotificationService} from "./notification.service";
 import {ConfigService} from "./config.service";
 
@@ -27,6 +28,8 @@ import {ConfigService} from "./config.service";
 })
 export class UserService {
   private readonly SERVICE_ROUTE: string = '/users';
+  private readonly STREAM_ROUTE: string = '/stream';
+  private readonly PRESENCE_EVENTS: PresenceEvent['event'][] = ['snapshot', 'join', 'leave'];
   private readonly SERVICE_URL: string;
 
   constructor(
@@ -45,6 +48,37 @@ export class UserService {
       )
   }
 
+  watchLoggedInUsers(): Observable<User[]> {
+    if (typeof EventSource === 'undefined') {
+      return this.getLoggedInUsers();
+    }
+    const url = this.SERVICE_URL + this.STREAM_ROUTE;
+    return new Observable<User[]>(subscriber => {
+      const usersByChatId = new Map<number, User>();
+      const eventSource = new EventSource(url);
+      const applyEvent = (message: MessageEvent) => {
+        const presenceEvent: PresenceEvent = JSON.parse(message.data);
+        this.applyPresenceEvent(usersByChatId, presenceEvent);
+        subscriber.next(Array.from(usersByChatId.values()));
+      };
+      this.PRESENCE_EVENTS.forEach(event => eventSource.addEventListener(event, applyEvent));
+      return () => eventSource.close();
+    });
+  }
+
+  private applyPresenceEvent(usersByChatId: Map<number, User>, presenceEvent: PresenceEvent): void {
+    if (presenceEvent.event === 'snapshot') {
+      usersByChatId.clear();
+    }
+    for (const entry of presenceEvent.entries) {
+      if (presenceEvent.event === 'leave') {
+        usersByChatId.delete(entry.chat_id);
+      } else {
+        usersByChatId.set(entry.chat_id, entry.user);
+      }
+    }
+  }
+
   private handleError<T>(operation = 'operation', result?: T) {
     return (error: any): Observable<T> => {
       console.error(error);
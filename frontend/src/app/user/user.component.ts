@@ -1,7 +1,7 @@
 import {Component, OnDestroy, OnInit} from '@angular/core';
 import {User} from "../models/user";
 import {UserService} from "../user.service";
-import {interval, Subscription, switchMap} from 'rxjs';
+import {Subscription} from 'rxjs';
 import {NgForOf, NgIf} from "@angular/common";
 import {ChatStorageService} from "../chat-storage.service";
 
@@ -44,7 +44,6 @@ export class UserComponent implements OnInit, OnDestroy {
 
   ngOnInit() {
     this.subscribeToUsers();
-    this.getUsersFromBackend();
   }
 
   ngOnDestroy(): void {
@@ -52,19 +51,10 @@ export class UserComponent implements OnInit, OnDestroy {
   }
 
   private subscribeToUsers(): void {
-    this.usersSubscription = interval(5_000).pipe(
-      switchMap(() => this.userService.getLoggedInUsers())
-    ).subscribe((users: User[]) => {
-      this.loggedInUsers = users;
-    });
-  }
-
-  private getUsersFromBackend() {
-    this.userService.getLoggedInUsers().subscribe(
-      (users: User[]) => {
-        this.loggedInUsers = users
-      }
-    );
+    this.usersSubscription = this.userService.watchLoggedInUsers()
+      .subscribe((users: User[]) => {
+        this.loggedInUsers = users;
+      });
   }
 
   getUsers(): User[] {